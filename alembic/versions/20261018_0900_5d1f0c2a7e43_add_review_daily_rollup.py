@@ -0,0 +1,107 @@
+"""add_review_daily_rollup
+
+Revision ID: 5d1f0c2a7e43
+Revises: bc4b4f6ccd11
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1f0c2a7e43'
+down_revision = 'bc4b4f6ccd11'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    rollup = op.create_table('review_daily_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('deck_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.Column('state_before', sa.String(length=20), nullable=False),
+        sa.Column('again_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('good_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('easy_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('lapse_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('time_taken_ms', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.ForeignKeyConstraint(['deck_id'], ['decks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Create indexes
+    op.create_index('ix_review_daily_rollup_key', 'review_daily_rollup', ['user_id', 'deck_id', 'date', 'state_before'], unique=True)
+    op.create_index('ix_review_daily_rollup_user_date', 'review_daily_rollup', ['user_id', 'date'])
+    op.create_index(op.f('ix_review_daily_rollup_id'), 'review_daily_rollup', ['id'])
+    op.create_index(op.f('ix_review_daily_rollup_user_id'), 'review_daily_rollup', ['user_id'])
+    op.create_index(op.f('ix_review_daily_rollup_deck_id'), 'review_daily_rollup', ['deck_id'])
+
+    # Backfill from existing review history (aggregated in the database;
+    # day keys are normalised to midnight datetimes in Python so SQLite and
+    # PostgreSQL store the same representation the ORM writes)
+    review_logs = sa.table('review_logs',
+        sa.column('user_id', sa.Integer),
+        sa.column('card_id', sa.Integer),
+        sa.column('rating', sa.String),
+        sa.column('state_before', sa.String),
+        sa.column('time_taken_ms', sa.Integer),
+        sa.column('reviewed_at', sa.DateTime)
+    )
+    cards = sa.table('cards',
+        sa.column('id', sa.Integer),
+        sa.column('deck_id', sa.Integer)
+    )
+
+    day_col = sa.func.date(review_logs.c.reviewed_at)
+    is_again = review_logs.c.rating == 'again'
+    query = sa.select(
+        review_logs.c.user_id,
+        cards.c.deck_id,
+        day_col,
+        review_logs.c.state_before,
+        sa.func.sum(sa.case((is_again, 1), else_=0)),
+        sa.func.sum(sa.case((review_logs.c.rating == 'good', 1), else_=0)),
+        sa.func.sum(sa.case((review_logs.c.rating == 'easy', 1), else_=0)),
+        sa.func.sum(sa.case((sa.and_(is_again, review_logs.c.state_before == 'review'), 1), else_=0)),
+        sa.func.coalesce(sa.func.sum(review_logs.c.time_taken_ms), 0)
+    ).select_from(
+        review_logs.join(cards, cards.c.id == review_logs.c.card_id)
+    ).group_by(review_logs.c.user_id, cards.c.deck_id, day_col, review_logs.c.state_before)
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            'user_id': user_id,
+            'deck_id': deck_id,
+            'date': datetime.fromisoformat(str(day)[:10]),
+            'state_before': state_before,
+            'again_count': again,
+            'good_count': good,
+            'easy_count': easy,
+            'lapse_count': lapses,
+            'time_taken_ms': time_ms,
+            'created_at': now,
+            'updated_at': now
+        }
+        for user_id, deck_id, day, state_before, again, good, easy, lapses, time_ms
+        in op.get_bind().execute(query)
+    ]
+    if rows:
+        op.bulk_insert(rollup, rows)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_review_daily_rollup_deck_id'), table_name='review_daily_rollup')
+    op.drop_index(op.f('ix_review_daily_rollup_user_id'), table_name='review_daily_rollup')
+    op.drop_index(op.f('ix_review_daily_rollup_id'), table_name='review_daily_rollup')
+    op.drop_index('ix_review_daily_rollup_user_date', table_name='review_daily_rollup')
+    op.drop_index('ix_review_daily_rollup_key', table_name='review_daily_rollup')
+    op.drop_table('review_daily_rollup')
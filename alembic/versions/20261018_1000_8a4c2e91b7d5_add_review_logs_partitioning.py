@@ -0,0 +1,134 @@
+"""add_review_logs_partitioning
+
+Revision ID: 8a4c2e91b7d5
+Revises: 5d1f0c2a7e43
+Create Date: 2026-10-18 10:00:00.000000
+
+PostgreSQL only: rebuild review_logs as a table range-partitioned by month
+on reviewed_at (partitions review_logs_pYYYYMM plus a default partition).
+The primary key becomes (id, reviewed_at) because PostgreSQL requires the
+partition key in every unique constraint; ids still come from the same
+sequence. SQLite has no partitioning and is left unchanged (cold months are
+archived with app.services.review_archive instead).
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4c2e91b7d5'
+down_revision = '5d1f0c2a7e43'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "id, card_id, user_id, rating, state_before, state_after, time_taken_ms, "
+    "interval_before, interval_after, ease_factor_before, ease_factor_after, reviewed_at"
+)
+
+
+def _add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + (month.month - 1) + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes() -> None:
+    op.create_index('ix_review_logs_id', 'review_logs', ['id'])
+    op.create_index('ix_review_logs_card_id', 'review_logs', ['card_id'])
+    op.create_index('ix_review_logs_user_id', 'review_logs', ['user_id'])
+    op.create_index('ix_review_logs_reviewed_at', 'review_logs', ['reviewed_at'])
+    op.create_index('ix_review_logs_user_date', 'review_logs', ['user_id', 'reviewed_at'])
+
+
+def _drop_indexes() -> None:
+    for name in ('ix_review_logs_user_date', 'ix_review_logs_reviewed_at', 'ix_review_logs_user_id',
+                 'ix_review_logs_card_id', 'ix_review_logs_id'):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # Keep the id sequence alive while the old table is dropped
+    op.execute("ALTER SEQUENCE review_logs_id_seq OWNED BY NONE")
+    op.rename_table('review_logs', 'review_logs_legacy')
+    _drop_indexes()
+    op.execute("ALTER TABLE review_logs_legacy DROP CONSTRAINT IF EXISTS review_logs_pkey")
+
+    op.execute("""
+        CREATE TABLE review_logs (
+            id INTEGER NOT NULL DEFAULT nextval('review_logs_id_seq'),
+            card_id INTEGER NOT NULL REFERENCES cards(id) ON DELETE CASCADE,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            rating VARCHAR(10) NOT NULL,
+            state_before VARCHAR(20) NOT NULL,
+            state_after VARCHAR(20) NOT NULL,
+            time_taken_ms INTEGER,
+            interval_before FLOAT NOT NULL,
+            interval_after FLOAT NOT NULL,
+            ease_factor_before FLOAT NOT NULL,
+            ease_factor_after FLOAT NOT NULL,
+            reviewed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, reviewed_at)
+        ) PARTITION BY RANGE (reviewed_at)
+    """)
+    op.execute("ALTER SEQUENCE review_logs_id_seq OWNED BY review_logs.id")
+
+    # Monthly partitions from the oldest review through MONTHS_AHEAD
+    now = datetime.utcnow()
+    oldest = bind.execute(sa.text("SELECT min(reviewed_at) FROM review_logs_legacy")).scalar() or now
+    month = datetime(oldest.year, oldest.month, 1)
+    last = _add_months(datetime(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE review_logs_p{month:%Y%m} PARTITION OF review_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+        )
+        month = _add_months(month, 1)
+    # Catch-all so inserts never fail if partitions were not created in time
+    op.execute("CREATE TABLE review_logs_default PARTITION OF review_logs DEFAULT")
+
+    _create_indexes()
+
+    op.execute(f"INSERT INTO review_logs ({COLUMNS}) SELECT {COLUMNS} FROM review_logs_legacy")
+    op.drop_table('review_logs_legacy')
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER SEQUENCE review_logs_id_seq OWNED BY NONE")
+    op.rename_table('review_logs', 'review_logs_partitioned')
+    _drop_indexes()
+    op.execute("ALTER TABLE review_logs_partitioned DROP CONSTRAINT IF EXISTS review_logs_pkey")
+
+    op.execute("""
+        CREATE TABLE review_logs (
+            id INTEGER NOT NULL DEFAULT nextval('review_logs_id_seq') PRIMARY KEY,
+            card_id INTEGER NOT NULL REFERENCES cards(id) ON DELETE CASCADE,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            rating VARCHAR(10) NOT NULL,
+            state_before VARCHAR(20) NOT NULL,
+            state_after VARCHAR(20) NOT NULL,
+            time_taken_ms INTEGER,
+            interval_before FLOAT NOT NULL,
+            interval_after FLOAT NOT NULL,
+            ease_factor_before FLOAT NOT NULL,
+            ease_factor_after FLOAT NOT NULL,
+            reviewed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("ALTER SEQUENCE review_logs_id_seq OWNED BY review_logs.id")
+    _create_indexes()
+
+    op.execute(f"INSERT INTO review_logs ({COLUMNS}) SELECT {COLUMNS} FROM review_logs_partitioned")
+    # Dropping the parent drops every partition
+    op.execute("DROP TABLE review_logs_partitioned")
@@ -0,0 +1,26 @@
+"""add_load_balance_setting
+
+Revision ID: c3e7a1f04b92
+Revises: 8a4c2e91b7d5
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e7a1f04b92'
+down_revision = '8a4c2e91b7d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('user_settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('load_balance_enabled', sa.Boolean(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_settings', schema=None) as batch_op:
+        batch_op.drop_column('load_balance_enabled')
@@ -0,0 +1,44 @@
+"""add_scheduler_engines
+
+Revision ID: e71b5d3a9c20
+Revises: c3e7a1f04b92
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e71b5d3a9c20'
+down_revision = 'c3e7a1f04b92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('user_settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scheduler_engine', sa.String(length=10), nullable=False, server_default='sm2'))
+        batch_op.add_column(sa.Column('fsrs_weights', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('fsrs_desired_retention', sa.Float(), nullable=False, server_default='0.9'))
+
+    with op.batch_alter_table('decks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scheduler_engine', sa.String(length=10), nullable=True))
+
+    with op.batch_alter_table('sched_states', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stability', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('difficulty', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('sched_states', schema=None) as batch_op:
+        batch_op.drop_column('difficulty')
+        batch_op.drop_column('stability')
+
+    with op.batch_alter_table('decks', schema=None) as batch_op:
+        batch_op.drop_column('scheduler_engine')
+
+    with op.batch_alter_table('user_settings', schema=None) as batch_op:
+        batch_op.drop_column('fsrs_desired_retention')
+        batch_op.drop_column('fsrs_weights')
+        batch_op.drop_column('scheduler_engine')
@@ -0,0 +1,32 @@
+"""add_sm2_params
+
+Revision ID: 4b9e0d2f6a18
+Revises: e71b5d3a9c20
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b9e0d2f6a18'
+down_revision = 'e71b5d3a9c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('user_settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sm2_ef_initial', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('sm2_lapse_multiplier', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('sm2_easy_bonus', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('scheduler_fit', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_settings', schema=None) as batch_op:
+        batch_op.drop_column('scheduler_fit')
+        batch_op.drop_column('sm2_easy_bonus')
+        batch_op.drop_column('sm2_lapse_multiplier')
+        batch_op.drop_column('sm2_ef_initial')
@@ -3,13 +3,19 @@ Review Session API endpoints.
 Implements REQ-5: Review Session UI from PRD.
 """
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import get_db, get_read_db
+from app.api.deps import CurrentUser, clocked_etag, get_current_user
 from app.models.database import User, Card, Deck
 from app.schemas.schemas import CardResponse
+from app.services import scheduler_engines
+from app.services.review_events import count_stream
 
 # Import review-specific schemas (these are at root level)
 import sys
@@ -44,17 +50,6 @@ import queue_builder
 router = APIRouter()
 
 
-def get_default_user(db: Session) -> User:
-    """Get default user for POC (single-user assumption)."""
-    user = db.query(User).filter(User.username == "default_user").first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Default user not found. Run migrations."
-        )
-    return user
-
-
 def build_card_response(card: Card, db: Session) -> CardResponse:
     """Build a CardResponse with all related data."""
     from app.api.cards import build_card_response as cards_build
@@ -77,7 +72,8 @@ def card_stub_to_response(stub, db: Session) -> CardStubResponse:
         state=stub.state,
         tags=stub.tags,
         due_at=stub.due_at.isoformat() if stub.due_at else None,
-        created_at=stub.created_at.isoformat() if stub.created_at else datetime.utcnow().isoformat()
+        created_at=stub.created_at.isoformat() if stub.created_at else datetime.utcnow().isoformat(),
+        preview_intervals=stub.preview_intervals
     )
 
 
@@ -87,41 +83,72 @@ def generate_session_id() -> str:
     return f"session_{uuid.uuid4().hex[:16]}"
 
 
-@router.get("/stats", response_model=QueueStatsResponse)
+@router.get("/stats", response_model=QueueStatsResponse, dependencies=[Depends(clocked_etag)])
 def get_queue_stats(
     deck_ids: Optional[List[int]] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get queue statistics and daily progress.
     
     PRD REQ-6, REQ-9: Show due counts and today's stats.
     """
-    user = get_default_user(db)
-    
-    stats = queue_builder.get_queue_stats(db, user.id)
+    return _queue_stats(db, user.id, deck_ids)
+
+
+def _queue_stats(db: Session, user_id: int, deck_ids: Optional[List[int]]) -> QueueStatsResponse:
+    # Read-only session (may be a replica): never create today's counter here
+    stats = queue_builder.get_queue_stats(db, user_id, create_counter=False)
     
     # If filtering by decks, get filtered counts
     if deck_ids:
-        filtered_counts = queue_builder.get_queue_counts(db, user.id, deck_ids)
+        filtered_counts = queue_builder.get_queue_counts(db, user_id, deck_ids)
         stats["due_counts"] = filtered_counts
     
     return QueueStatsResponse(**stats)
 
 
+@router.get("/events")
+async def stream_queue_events(
+    deck_ids: Optional[List[int]] = Query(None),
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Live queue counts as Server-Sent Events, instead of polling /stats.
+    
+    Sends a "counts" event (the /stats payload), then a "delta" event with
+    the changed sections whenever a write or the periodic refresh changes
+    them. Counts are read from the primary so they include the write that
+    triggered them.
+    """
+    bind = db.get_bind()  # the request's session closes before streaming starts
+    user_id = user.id
+    
+    def load_counts() -> dict:
+        with Session(bind=bind) as session:
+            return _queue_stats(session, user_id, deck_ids).model_dump()
+    
+    return StreamingResponse(
+        count_stream(user_id, lambda: run_in_threadpool(load_counts), settings.review_events_refresh_s),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/stats/session", response_model=SessionStatsResponse)
 def get_session_stats(
     scope: str = Query("all", description="'all' for All Decks, 'deck' for Specific Deck"),
     deck_id: Optional[int] = Query(None, description="Required if scope='deck'"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get session-based queue statistics showing counts per section (New, Learning, Review).
     
     Phase 4 PRD implementation: Shows structured session statistics instead of single next-card logic.
     """
-    user = get_default_user(db)
-    
     # Validate inputs
     if scope not in ["all", "deck"]:
         raise HTTPException(
@@ -136,45 +163,37 @@ def get_session_stats(
         )
     
     try:
-        # Build session to get section counts
-        sections, meta = queue_builder.build_session_queue(
-            db, user.id, scope, deck_id
-        )
-        
-        # Get traditional stats for limits and daily progress
-        traditional_stats = queue_builder.get_queue_stats(db, user.id)
+        # Count what a session build would allocate, without loading cards
+        plan = queue_builder.plan_session_counts(db, user.id, scope, deck_id)
+        progress = queue_builder.daily_progress(queue_builder.get_global_limits(db, user.id), plan.counter)
         
         # Structure section counts
-        section_counts = {
-            "new": len(sections.new),
-            "learning": len(sections.learning), 
-            "review": len(sections.review)
-        }
+        section_counts = plan.sections
         
         # Calculate total available (respecting daily limits)
         total_available = section_counts["learning"]  # Learning unlimited
-        total_available += min(section_counts["review"], traditional_stats["remaining"]["reviews"])
-        total_available += min(section_counts["new"], traditional_stats["remaining"]["new"])
+        total_available += min(section_counts["review"], progress["remaining"]["reviews"])
+        total_available += min(section_counts["new"], progress["remaining"]["new"])
         
-        # Optional: Per-deck breakdown for All Decks sessions
+        # Optional: Per-deck breakdown for All Decks sessions, decks in order
+        # of first appearance in the session (New, then Learning, then Review)
         deck_breakdown = None
-        if scope == "all" and len(sections.new + sections.learning + sections.review) > 0:
+        if scope == "all" and sum(section_counts.values()) > 0:
             deck_breakdown = {}
-            all_cards = sections.new + sections.learning + sections.review
-            deck_names = {card.deck_id: f"Deck {card.deck_id}" for card in all_cards}
-            
-            for deck_id_key, deck_name in deck_names.items():
-                deck_breakdown[deck_name] = {
-                    "new": len([c for c in sections.new if c.deck_id == deck_id_key]),
-                    "learning": len([c for c in sections.learning if c.deck_id == deck_id_key]),
-                    "review": len([c for c in sections.review if c.deck_id == deck_id_key])
-                }
+            for section in (plan.new, plan.learning, plan.review):
+                for deck_id_key in plan.deck_order:
+                    if deck_id_key in section:
+                        deck_breakdown.setdefault(f"Deck {deck_id_key}", {
+                            "new": plan.new.get(deck_id_key, 0),
+                            "learning": plan.learning.get(deck_id_key, 0),
+                            "review": plan.review.get(deck_id_key, 0)
+                        })
         
         return SessionStatsResponse(
             sections=section_counts,
-            limits=traditional_stats["limits"],
-            today=traditional_stats["today"],
-            remaining=traditional_stats["remaining"],
+            limits=progress["limits"],
+            today=progress["today"],
+            remaining=progress["remaining"],
             total_available=total_available,
             deck_breakdown=deck_breakdown
         )
@@ -189,7 +208,8 @@ def get_session_stats(
 @router.post("/start", response_model=dict)
 def start_review_session(
     session_start: ReviewSessionStart,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Start a review session and get the first card.
@@ -197,8 +217,6 @@ def start_review_session(
     PRD REQ-5, REQ-6: Begin session with queue priorities.
     Returns ReviewCard format (card + scheduling info).
     """
-    user = get_default_user(db)
-    
     # Get next card from queue
     next_card = queue_builder.get_next_card(
         db, 
@@ -235,15 +253,14 @@ def start_review_session(
 @router.get("/next", response_model=ReviewSessionResponse)
 def get_next_card(
     deck_ids: Optional[List[int]] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get the next card to review.
     
     PRD REQ-5: Continue session with next card.
     """
-    user = get_default_user(db)
-    
     # Get next card from queue
     next_card = queue_builder.get_next_card(db, user.id, deck_ids)
     
@@ -262,19 +279,14 @@ def get_next_card(
     # Get queue stats
     stats = queue_builder.get_queue_stats(db, user.id)
     
-    # Calculate preview times
-    sched_state = next_card.sched_state
-    if sched_state:
-        preview_times = scheduler.get_next_review_times(
-            sched_state.state,
-            sched_state.interval_days,
-            sched_state.ease_factor,
-            sched_state.learning_step
-        )
-    else:
-        preview_times = scheduler.get_next_review_times(
-            "new", 0.0, scheduler.EF_INITIAL, 0
-        )
+    # Calculate preview times with the deck's scheduling engine
+    now = datetime.utcnow()
+    engine = scheduler_engines.get_engine(db, user.id, next_card.deck_id)
+    previews = engine.preview([next_card.sched_state], now)
+    preview_times = {
+        rating: now + timedelta(days=float(days[0]))
+        for rating, days in previews.items()
+    }
     
     return ReviewSessionResponse(
         card=card_response,
@@ -290,7 +302,8 @@ def get_next_card(
 @router.post("/session/build", response_model=SessionBuildResponse)
 def build_session(
     request: SessionBuildRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Build a structured Phase 4 session with three sections (New → Learning → Review).
@@ -299,8 +312,6 @@ def build_session(
     - All Decks: Uses global limits + per-deck caps, round-robin allocation
     - Specific Deck: Uses only that deck's limits, ignores global limits
     """
-    user = get_default_user(db)
-    
     # Validate request
     if request.scope not in ["all", "deck"]:
         raise HTTPException(
@@ -320,7 +331,8 @@ def build_session(
             db=db,
             user_id=user.id,
             scope=request.scope,
-            deck_id=request.deck_id
+            deck_id=request.deck_id,
+            seed=request.seed
         )
         
         # Convert to API response format
@@ -346,7 +358,8 @@ def build_session(
             total_review=meta.total_review,
             deck_order=meta.deck_order,
             global_limits=meta.global_limits,
-            per_deck_limits=per_deck_limits
+            per_deck_limits=per_deck_limits,
+            seed=meta.seed
         )
         
         session_id = generate_session_id()
@@ -372,7 +385,8 @@ def build_session(
 @router.post("/answer/enhanced", response_model=ReviewAnswerEnhancedResponse)
 def answer_card_enhanced(
     answer: ReviewAnswerEnhancedRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Phase 4 enhanced answer endpoint that handles in-session repeats.
@@ -380,8 +394,6 @@ def answer_card_enhanced(
     Updates scheduler state on every rating but only logs Good/Easy ratings.
     'Again' ratings trigger client-side reinsertion logic.
     """
-    user = get_default_user(db)
-    
     # Get card
     card = db.query(Card).filter(
         Card.id == answer.card_id,
@@ -410,7 +422,8 @@ def answer_card_enhanced(
     try:
         # Process rating with scheduler (always updates state)
         updated_state = scheduler.process_rating(
-            db, card, answer.rating, user.id
+            db, card, answer.rating, user.id,
+            time_taken_ms=answer.elapsed_ms
         )
         
         # Determine if this was logged (Good/Easy only)
@@ -441,7 +454,8 @@ def answer_card_enhanced(
 @router.post("/answer", response_model=dict)
 def answer_card(
     answer: ReviewAnswerRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Submit an answer/rating for a card.
@@ -449,8 +463,6 @@ def answer_card(
     PRD REQ-4, REQ-5: Process rating with SM-2 algorithm.
     Returns RatingResponse format (next_card, remaining, session_complete).
     """
-    user = get_default_user(db)
-    
     # Get card
     card = db.query(Card).filter(
         Card.id == answer.card_id,
@@ -11,10 +11,14 @@ from datetime import datetime, date
 from typing import List, Dict, Optional, Tuple, NamedTuple
 from dataclasses import dataclass
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, text
+from sqlalchemy import and_, bindparam, case, func, or_
 import random
 
+import numpy as np
+
 from app.models.database import Card, SchedState, User, Deck, DailyCounter, DailyDeckCounter, UserSettings
+from app.services import scheduler_engines
+from app.services.limits_cache import limits_cache
 from deck_counter_helpers import get_deck_usage_today
 
 
@@ -28,6 +32,8 @@ class CardStub:
     tags: List[str]
     due_at: Optional[datetime]
     created_at: datetime
+    # Days until due after each rating ("again"/"good"/"easy"), filled at build time
+    preview_intervals: Optional[Dict[str, float]] = None
 
 
 @dataclass
@@ -56,6 +62,38 @@ class SessionMeta:
     deck_order: List[str]
     global_limits: Dict[str, int]
     per_deck_limits: Dict[int, DeckLimits]
+    seed: Optional[int] = None  # Shuffle seed that reproduces the session
+
+
+@dataclass
+class SessionPlan:
+    """Section sizes per deck that build_session_queue would produce."""
+    new: Dict[int, int]
+    learning: Dict[int, int]
+    review: Dict[int, int]
+    deck_order: List[int]  # Round-robin visit order (deck ids)
+    global_limits: Dict[str, int]
+    counter: DailyCounter
+    
+    @property
+    def sections(self) -> Dict[str, int]:
+        return {
+            "new": sum(self.new.values()),
+            "learning": sum(self.learning.values()),
+            "review": sum(self.review.values())
+        }
+
+
+@dataclass
+class _SessionScope:
+    """Decks and capacities of a session, shared by build and plan."""
+    deck_ids: List[int]
+    deck_names: List[str]
+    deck_id_map: Dict[str, int]
+    global_limits: Dict[str, int]
+    deck_limits: Optional[Dict[int, DeckLimits]]
+    new_remaining: int
+    review_remaining: int
 
 
 # PRD line 92: Default daily limits
@@ -67,6 +105,8 @@ def get_global_limits(db: Session, user_id: int) -> Dict[str, int]:
     """
     Get global daily limits from user settings.
     
+    Served from limits_cache; invalidated by PUT /api/settings.
+    
     Args:
         db: Database session
         user_id: User ID
@@ -74,6 +114,11 @@ def get_global_limits(db: Session, user_id: int) -> Dict[str, int]:
     Returns:
         Dict with "new" and "review" global limits
     """
+    cached = limits_cache.get_global(user_id)
+    if cached is not None:
+        return cached
+    
+    version = limits_cache.version(user_id)
     settings = db.query(UserSettings).filter(
         UserSettings.user_id == user_id
     ).first()
@@ -82,16 +127,24 @@ def get_global_limits(db: Session, user_id: int) -> Dict[str, int]:
     default_new = 12
     default_review = 150
     
-    return {
+    limits = {
         "new": settings.new_per_day if settings and settings.new_per_day else default_new,
         "review": settings.review_per_day if settings and settings.review_per_day else default_review
     }
+    # Without a row the defaults are provisional: GET /api/settings creates
+    # one with the model defaults, so only real rows are cached
+    if settings is not None:
+        limits_cache.store_global(user_id, version, limits)
+    return limits
 
 
 def get_deck_limits_map(db: Session, user_id: int, deck_ids: List[int], global_limits: Dict[str, int]) -> Dict[int, DeckLimits]:
     """
     Build per-deck limit tracking map.
     
+    Deck overrides are served from limits_cache; only uncached decks are
+    queried. Invalidated by deck update/delete.
+    
     Args:
         db: Database session
         user_id: User ID
@@ -101,16 +154,27 @@ def get_deck_limits_map(db: Session, user_id: int, deck_ids: List[int], global_l
     Returns:
         Dict mapping deck_id -> DeckLimits
     """
-    decks = db.query(Deck).filter(
-        Deck.id.in_(deck_ids),
-        Deck.user_id == user_id
-    ).all()
+    rows, missing = limits_cache.get_decks(user_id, deck_ids)
+    
+    if missing:
+        version = limits_cache.version(user_id)
+        loaded = {
+            deck_id: (new_per_day, review_per_day)
+            for deck_id, new_per_day, review_per_day in db.query(
+                Deck.id, Deck.new_per_day, Deck.review_per_day
+            ).filter(
+                Deck.id.in_(missing),
+                Deck.user_id == user_id
+            ).all()
+        }
+        limits_cache.store_decks(user_id, version, loaded)
+        rows.update(loaded)
     
     limits_map = {}
-    for deck in decks:
-        limits_map[deck.id] = DeckLimits(
-            new_cap=deck.new_per_day if deck.new_per_day is not None else global_limits["new"],
-            review_cap=deck.review_per_day if deck.review_per_day is not None else global_limits["review"],
+    for deck_id, (new_per_day, review_per_day) in rows.items():
+        limits_map[deck_id] = DeckLimits(
+            new_cap=new_per_day if new_per_day is not None else global_limits["new"],
+            review_cap=review_per_day if review_per_day is not None else global_limits["review"],
             new_used=0,
             review_used=0
         )
@@ -118,58 +182,125 @@ def get_deck_limits_map(db: Session, user_id: int, deck_ids: List[int], global_l
     return limits_map
 
 
-def build_card_pools_by_deck(
-    db: Session, 
-    user_id: int, 
+# Session seeds stay below 2**53 so they survive JSON round trips to JavaScript
+SEED_BITS = 53
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def new_session_seed() -> int:
+    """Random seed for a session that was not given one."""
+    return random.getrandbits(SEED_BITS)
+
+
+def shuffle_keys(card_ids: np.ndarray, seed: int) -> np.ndarray:
+    """
+    Stable pseudo-random sort keys: splitmix64 of card_id under seed.
+    
+    Sorting cards by key shuffles them; the same seed always gives the
+    same order, and a card's key does not depend on which other cards are
+    in the pool.
+    """
+    x = np.asarray(card_ids, dtype=np.uint64) * _GOLDEN_GAMMA + np.uint64(seed % 2**64)
+    x ^= x >> np.uint64(30)
+    x *= _MIX_1
+    x ^= x >> np.uint64(27)
+    x *= _MIX_2
+    x ^= x >> np.uint64(31)
+    return x
+
+
+def take_shuffled(card_ids: np.ndarray, count: int, seed: int) -> List[int]:
+    """
+    The first `count` of card_ids in shuffle order, without sorting them
+    all: argpartition selects them in linear time, then only those are sorted.
+    """
+    if count <= 0 or len(card_ids) == 0:
+        return []
+    keys = shuffle_keys(card_ids, seed)
+    if count < len(card_ids):
+        chosen = np.argpartition(keys, count - 1)[:count]
+    else:
+        chosen = np.arange(len(card_ids))
+    return card_ids[chosen[np.argsort(keys[chosen], kind="stable")]].tolist()
+
+
+def candidate_ids_by_deck(
+    db: Session,
+    user_id: int,
     deck_ids: List[int],
     now: datetime
+) -> Tuple[Dict[int, np.ndarray], Dict[int, np.ndarray], Dict[int, np.ndarray]]:
+    """
+    Ids of the cards eligible for each section, by deck, in one query.
+    
+    New: no SchedState or state='new'; Learning/Review: that state and due.
+    Cards not yet due are filtered out in SQL, so only candidates are read.
+    
+    Returns:
+        Tuple of (new_ids, learning_ids, review_ids), deck_id -> id array
+    """
+    sections: Tuple[Dict[int, List[int]], Dict[int, List[int]], Dict[int, List[int]]] = ({}, {}, {})
+    rows = db.query(Card.id, Card.deck_id, SchedState.state).outerjoin(SchedState).filter(
+        Card.user_id == user_id,
+        Card.deck_id.in_(deck_ids),
+        Card.suspended == False,
+        or_(SchedState.state.is_(None), SchedState.state == "new", SchedState.due_at <= now)
+    ).all()
+    for card_id, deck_id, state in rows:
+        if state is None or state == "new":
+            section = sections[0]
+        elif state in ("learning", "review"):
+            section = sections[1] if state == "learning" else sections[2]
+        else:
+            continue
+        section.setdefault(deck_id, []).append(card_id)
+    
+    return tuple(
+        {deck_id: np.array(ids, dtype=np.int64) for deck_id, ids in section.items()}
+        for section in sections
+    )
+
+
+def build_card_pools_by_deck(
+    db: Session,
+    candidates: Tuple[Dict[int, np.ndarray], Dict[int, np.ndarray], Dict[int, np.ndarray]],
+    takes: Tuple[Dict[int, int], Dict[int, int], Dict[int, int]],
+    seed: int
 ) -> Tuple[Dict[int, List[Card]], Dict[int, List[Card]], Dict[int, List[Card]]]:
     """
-    Build randomized card pools by deck for each section.
+    Build shuffled card pools by deck for each section.
+    
+    Each deck's pool holds only the cards the round-robin will take from it
+    (takes, from round_robin_counts), picked and ordered by shuffle_keys
+    under seed; only those cards are loaded.
     
     Args:
         db: Database session
-        user_id: User ID
-        deck_ids: List of deck IDs to include
-        now: Current timestamp
+        candidates: Result of candidate_ids_by_deck
+        takes: Cards to take per deck for each section
+        seed: Session seed
         
     Returns:
         Tuple of (new_pools, learning_pools, review_pools)
     """
-    new_pools = {}
-    learning_pools = {}
-    review_pools = {}
-    
-    for deck_id in deck_ids:
-        # Build New pool (cards with no SchedState or state='new')
-        new_cards = db.query(Card).outerjoin(SchedState).filter(
-            Card.user_id == user_id,
-            Card.deck_id == deck_id,
-            Card.suspended == False,
-            (SchedState.state == "new") | (SchedState.state == None)
-        ).order_by(text("RANDOM()")).all()
-        new_pools[deck_id] = new_cards
-        
-        # Build Learning pool (due Learning cards)
-        learning_cards = db.query(Card).join(SchedState).filter(
-            Card.user_id == user_id,
-            Card.deck_id == deck_id,
-            Card.suspended == False,
-            SchedState.state == "learning",
-            SchedState.due_at <= now
-        ).order_by(text("RANDOM()")).all()
-        learning_pools[deck_id] = learning_cards
-        
-        # Build Review pool (due Review cards)
-        review_cards = db.query(Card).join(SchedState).filter(
-            Card.user_id == user_id,
-            Card.deck_id == deck_id,
-            Card.suspended == False,
-            SchedState.state == "review",
-            SchedState.due_at <= now
-        ).order_by(text("RANDOM()")).all()
-        review_pools[deck_id] = review_cards
+    chosen = tuple(
+        {deck_id: take_shuffled(ids, section_takes.get(deck_id, 0), seed) for deck_id, ids in section.items()}
+        for section, section_takes in zip(candidates, takes)
+    )
+    
+    card_ids = [card_id for section in chosen for ids in section.values() for card_id in ids]
+    cards = {}
+    if card_ids:
+        selected = bindparam("card_ids", card_ids, expanding=True, literal_execute=True)
+        cards = {card.id: card for card in db.query(Card).filter(Card.id.in_(selected)).all()}
     
+    new_pools, learning_pools, review_pools = (
+        {deck_id: [cards[card_id] for card_id in ids] for deck_id, ids in section.items()}
+        for section in chosen
+    )
     return new_pools, learning_pools, review_pools
 
 
@@ -243,6 +374,72 @@ def round_robin_allocate(
     return result
 
 
+def round_robin_counts(
+    visit_order: List[int],
+    pool_sizes: Dict[int, int],
+    deck_limits: Optional[Dict[int, DeckLimits]] = None,
+    global_remaining: Optional[int] = None,
+    section_type: str = "new"
+) -> Dict[int, int]:
+    """
+    Cards round_robin_allocate would take from each deck, from pool sizes.
+    
+    Each deck offers min(pool, cap - used) cards and round r takes one per
+    visit from every deck with cards left, so after r full rounds deck d
+    has given min(offer_d, r * visits_d). Binary search finds the last full
+    round within global_remaining; the remainder is handed out in visit
+    order, as the loop would.
+    
+    Args:
+        visit_order: Deck ids in round-robin order ([deck_id_map[name] for name in deck_names])
+        pool_sizes: Dict mapping deck_id -> pool size
+        deck_limits, global_remaining, section_type: As for round_robin_allocate
+        
+    Returns:
+        Dict mapping deck_id -> cards taken (decks taking none omitted)
+    """
+    visits: Dict[int, int] = {}
+    for deck_id in visit_order:
+        visits[deck_id] = visits.get(deck_id, 0) + 1
+    
+    offer = {}
+    for deck_id in visits:
+        available = pool_sizes.get(deck_id, 0)
+        limit_obj = deck_limits.get(deck_id) if deck_limits else None
+        if limit_obj and section_type == "new":
+            available = min(available, max(0, limit_obj.new_cap - limit_obj.new_used))
+        elif limit_obj and section_type == "review":
+            available = min(available, max(0, limit_obj.review_cap - limit_obj.review_used))
+        if available > 0:
+            offer[deck_id] = available
+    
+    if global_remaining is None or sum(offer.values()) <= global_remaining:
+        return offer
+    if global_remaining <= 0:
+        return {}
+    
+    def taken_after(rounds: int) -> int:
+        return sum(min(available, rounds * visits[deck_id]) for deck_id, available in offer.items())
+    
+    low, high = 0, max(offer.values())  # taken_after(high) > global_remaining
+    while high - low > 1:
+        middle = (low + high) // 2
+        if taken_after(middle) <= global_remaining:
+            low = middle
+        else:
+            high = middle
+    
+    taken = {deck_id: min(available, low * visits[deck_id]) for deck_id, available in offer.items()}
+    left = global_remaining - sum(taken.values())
+    for deck_id in visit_order:
+        if left == 0:
+            break
+        if deck_id in offer and taken[deck_id] < offer[deck_id]:
+            taken[deck_id] += 1
+            left -= 1
+    return {deck_id: count for deck_id, count in taken.items() if count > 0}
+
+
 def card_to_stub(card: Card) -> CardStub:
     """
     Convert Card to CardStub for session queue.
@@ -273,7 +470,35 @@ def card_to_stub(card: Card) -> CardStub:
     )
 
 
-def get_today_counter(db: Session, user_id: int, today: date = None) -> DailyCounter:
+def attach_preview_intervals(
+    db: Session,
+    user_id: int,
+    cards: List[Card],
+    stubs: List[CardStub],
+    now: datetime
+) -> None:
+    """
+    Fill stub.preview_intervals for a whole session with one vectorized
+    preview call per scheduling engine in use (decks may override the
+    user's engine). Cards without a sched_state are previewed as new cards.
+    """
+    if not stubs:
+        return
+    
+    engines = scheduler_engines.get_engines(db, user_id, sorted({card.deck_id for card in cards}))
+    groups: Dict[int, List[int]] = {}
+    for index, card in enumerate(cards):
+        groups.setdefault(id(engines[card.deck_id]), []).append(index)
+    
+    for indices in groups.values():
+        engine = engines[cards[indices[0]].deck_id]
+        previews = engine.preview([cards[i].sched_state for i in indices], now)
+        columns = {rating: days.tolist() for rating, days in previews.items()}
+        for position, index in enumerate(indices):
+            stubs[index].preview_intervals = {rating: days[position] for rating, days in columns.items()}
+
+
+def get_today_counter(db: Session, user_id: int, today: date = None, create: bool = True) -> DailyCounter:
     """
     Get or create today's daily counter.
     
@@ -281,6 +506,8 @@ def get_today_counter(db: Session, user_id: int, today: date = None) -> DailyCou
         db: Database session
         user_id: User ID
         today: Today's date (for testing)
+        create: If False, never write; a missing counter is returned as an
+            unsaved zeroed DailyCounter (for read-only/replica sessions)
         
     Returns:
         DailyCounter for today
@@ -308,6 +535,8 @@ def get_today_counter(db: Session, user_id: int, today: date = None) -> DailyCou
             introduced_new_per_deck={},
             reviews_done_per_deck={}
         )
+        if not create:
+            return counter
         db.add(counter)
         db.flush()  # Use flush instead of commit to keep transaction open
     
@@ -370,13 +599,76 @@ def get_queue_counts(
     }
 
 
+def _session_scope(
+    db: Session,
+    user_id: int,
+    scope: str,
+    deck_id: Optional[int],
+    counter: DailyCounter
+) -> Optional[_SessionScope]:
+    """Decks, limits and remaining capacities of a session (None: no decks)."""
+    # Determine deck scope
+    if scope == "deck":
+        deck_ids = [deck_id]
+        # Get deck info for specific deck session
+        deck = db.query(Deck).filter(Deck.id == deck_id, Deck.user_id == user_id).first()
+        if not deck:
+            raise ValueError(f"Deck {deck_id} not found")
+        
+        # For specific deck, use only deck limits (ignore global)
+        global_limits = {"new": deck.new_per_day or 12, "review": deck.review_per_day or 150}
+        deck_limits = None  # No per-deck limits needed for single deck
+    else:
+        # All Decks session
+        deck_ids = [d.id for d in db.query(Deck.id).filter(Deck.user_id == user_id).all()]
+        if not deck_ids:
+            return None
+        
+        global_limits = get_global_limits(db, user_id)
+        deck_limits = get_deck_limits_map(db, user_id, deck_ids, global_limits)
+        
+        # Phase 4: Get today's per-deck usage for All Decks sessions
+        deck_usage = get_deck_usage_today(db, user_id, deck_ids, counter.date.date())
+        
+        # Apply per-deck usage to deck limits
+        for usage_deck_id, usage in deck_usage.items():
+            if usage_deck_id in deck_limits:
+                deck_limits[usage_deck_id].new_used = usage["introduced_new"]
+                deck_limits[usage_deck_id].review_used = usage["reviews_done"]
+    
+    # Get deck names for ordering (alphabetical)
+    decks = db.query(Deck.id, Deck.name).filter(
+        Deck.id.in_(deck_ids),
+        Deck.user_id == user_id
+    ).order_by(Deck.name).all()
+    
+    # Calculate remaining capacities
+    if scope == "all":
+        new_remaining = max(0, global_limits["new"] - counter.introduced_new)
+        review_remaining = max(0, global_limits["review"] - counter.reviews_done)
+    else:
+        new_remaining = global_limits["new"]  # No global counter for specific deck
+        review_remaining = global_limits["review"]
+    
+    return _SessionScope(
+        deck_ids=deck_ids,
+        deck_names=[deck.name for deck in decks],
+        deck_id_map={deck.name: deck.id for deck in decks},
+        global_limits=global_limits,
+        deck_limits=deck_limits,
+        new_remaining=new_remaining,
+        review_remaining=review_remaining
+    )
+
+
 def build_session_queue(
     db: Session,
     user_id: int,
     scope: str = "all",  # "all" or "deck"
     deck_id: Optional[int] = None,
     now: datetime = None,
-    today: date = None
+    today: date = None,
+    seed: Optional[int] = None
 ) -> Tuple[SessionSections, SessionMeta]:
     """
     Build structured session queue with three sections (New -> Learning -> Review).
@@ -392,6 +684,8 @@ def build_session_queue(
         deck_id: Required if scope="deck"
         now: Current timestamp
         today: Today's date
+        seed: Shuffle seed (random if None, reported in meta.seed); the same
+            seed over the same cards and limits gives the same session
         
     Returns:
         Tuple of (SessionSections, SessionMeta)
@@ -407,64 +701,32 @@ def build_session_queue(
     
     # Get counter for today
     counter = get_today_counter(db, user_id, today)
-    
-    # Determine deck scope
-    if scope == "deck":
-        deck_ids = [deck_id]
-        # Get deck info for specific deck session
-        deck = db.query(Deck).filter(Deck.id == deck_id, Deck.user_id == user_id).first()
-        if not deck:
-            raise ValueError(f"Deck {deck_id} not found")
-        
-        # For specific deck, use only deck limits (ignore global)
-        global_limits = {"new": deck.new_per_day or 12, "review": deck.review_per_day or 150}
-        deck_limits = None  # No per-deck limits needed for single deck
-    else:
-        # All Decks session
-        deck_ids = [d.id for d in db.query(Deck).filter(Deck.user_id == user_id).all()]
-        if not deck_ids:
-            return SessionSections([], [], []), SessionMeta(0, 0, 0, [], {}, {})
-        
-        global_limits = get_global_limits(db, user_id)
-        deck_limits = get_deck_limits_map(db, user_id, deck_ids, global_limits)
-        
-        # Phase 4: Get today's per-deck usage for All Decks sessions
-        deck_usage = get_deck_usage_today(db, user_id, deck_ids, counter.date.date())
-        
-        # Apply per-deck usage to deck limits
-        for deck_id, usage in deck_usage.items():
-            if deck_id in deck_limits:
-                deck_limits[deck_id].new_used = usage["introduced_new"]
-                deck_limits[deck_id].review_used = usage["reviews_done"]
-    
-    # Get deck names for ordering (alphabetical)
-    decks = db.query(Deck).filter(
-        Deck.id.in_(deck_ids),
-        Deck.user_id == user_id
-    ).order_by(Deck.name).all()
-    
-    deck_names = [deck.name for deck in decks]
-    deck_id_map = {deck.name: deck.id for deck in decks}
-    
-    # Build card pools by deck
-    new_pools, learning_pools, review_pools = build_card_pools_by_deck(
-        db, user_id, deck_ids, now
+    scope_info = _session_scope(db, user_id, scope, deck_id, counter)
+    if scope_info is None:
+        return SessionSections([], [], []), SessionMeta(0, 0, 0, [], {}, {})
+    deck_ids = scope_info.deck_ids
+    deck_names = scope_info.deck_names
+    deck_id_map = scope_info.deck_id_map
+    deck_limits = scope_info.deck_limits
+    
+    # Pick each deck's share of every section by seeded shuffle keys
+    if seed is None:
+        seed = new_session_seed()
+    candidates = candidate_ids_by_deck(db, user_id, deck_ids, now)
+    visit_order = [deck_id_map[name] for name in deck_names]
+    takes = (
+        round_robin_counts(visit_order, _sizes(candidates[0]), deck_limits, scope_info.new_remaining, "new"),
+        round_robin_counts(visit_order, _sizes(candidates[1]), None, None, "learning"),
+        round_robin_counts(visit_order, _sizes(candidates[2]), deck_limits, scope_info.review_remaining, "review")
     )
-    
-    # Calculate remaining capacities
-    if scope == "all":
-        global_new_remaining = max(0, global_limits["new"] - counter.introduced_new)
-        global_review_remaining = max(0, global_limits["review"] - counter.reviews_done)
-    else:
-        global_new_remaining = global_limits["new"]  # No global counter for specific deck
-        global_review_remaining = global_limits["review"]
+    new_pools, learning_pools, review_pools = build_card_pools_by_deck(db, candidates, takes, seed)
     
     # Round-robin allocation for each section
     
     # 1. New section
     new_cards = round_robin_allocate(
         deck_names, new_pools, deck_id_map, 
-        deck_limits, global_new_remaining, "new"
+        deck_limits, scope_info.new_remaining, "new"
     )
     
     # 2. Learning section (uncapped)
@@ -476,15 +738,21 @@ def build_session_queue(
     # 3. Review section
     review_cards = round_robin_allocate(
         deck_names, review_pools, deck_id_map,
-        deck_limits, global_review_remaining, "review"
+        deck_limits, scope_info.review_remaining, "review"
     )
     
-    # Convert to stubs
+    # Convert to stubs, with next-interval previews for the whole session
     sections = SessionSections(
         new=[card_to_stub(card) for card in new_cards],
         learning=[card_to_stub(card) for card in learning_cards],
         review=[card_to_stub(card) for card in review_cards]
     )
+    attach_preview_intervals(
+        db, user_id,
+        new_cards + learning_cards + review_cards,
+        sections.new + sections.learning + sections.review,
+        now
+    )
     
     # Build metadata
     meta = SessionMeta(
@@ -492,13 +760,82 @@ def build_session_queue(
         total_learning=len(learning_cards),
         total_review=len(review_cards),
         deck_order=deck_names,
-        global_limits=global_limits,
-        per_deck_limits=deck_limits or {}
+        global_limits=scope_info.global_limits,
+        per_deck_limits=deck_limits or {},
+        seed=seed
     )
     
     return sections, meta
 
 
+def _sizes(pools: Dict[int, np.ndarray]) -> Dict[int, int]:
+    return {deck_id: len(ids) for deck_id, ids in pools.items()}
+
+
+def plan_session_counts(
+    db: Session,
+    user_id: int,
+    scope: str = "all",
+    deck_id: Optional[int] = None,
+    now: datetime = None,
+    today: date = None
+) -> SessionPlan:
+    """
+    Section sizes of build_session_queue without loading any card.
+    
+    Pool sizes come from one grouped count query; round_robin_counts then
+    applies the same limits the build would. Never creates today's counter.
+    
+    Args:
+        As for build_session_queue
+        
+    Returns:
+        SessionPlan with per-deck counts for each section
+    """
+    if now is None:
+        now = datetime.utcnow()
+    if today is None:
+        today = now.date()
+    
+    if scope == "deck" and deck_id is None:
+        raise ValueError("deck_id required for scope='deck'")
+    
+    counter = get_today_counter(db, user_id, today, create=False)
+    scope_info = _session_scope(db, user_id, scope, deck_id, counter)
+    if scope_info is None:
+        return SessionPlan({}, {}, {}, [], {}, counter)
+    
+    state = SchedState.state
+    is_due = SchedState.due_at <= now
+    rows = db.query(
+        Card.deck_id,
+        func.count(case(((state == "new") | (state == None), 1))),
+        func.count(case(((state == "learning") & is_due, 1))),
+        func.count(case(((state == "review") & is_due, 1)))
+    ).outerjoin(SchedState).filter(
+        Card.user_id == user_id,
+        Card.deck_id.in_(scope_info.deck_ids),
+        Card.suspended == False
+    ).group_by(Card.deck_id).all()
+    new_pools = {row[0]: row[1] for row in rows}
+    learning_pools = {row[0]: row[2] for row in rows}
+    review_pools = {row[0]: row[3] for row in rows}
+    
+    visit_order = [scope_info.deck_id_map[name] for name in scope_info.deck_names]
+    return SessionPlan(
+        new=round_robin_counts(
+            visit_order, new_pools, scope_info.deck_limits, scope_info.new_remaining, "new"
+        ),
+        learning=round_robin_counts(visit_order, learning_pools, None, None, "learning"),
+        review=round_robin_counts(
+            visit_order, review_pools, scope_info.deck_limits, scope_info.review_remaining, "review"
+        ),
+        deck_order=visit_order,
+        global_limits=scope_info.global_limits,
+        counter=counter
+    )
+
+
 # Legacy function - kept for backward compatibility
 def build_queue(
     db: Session,
@@ -553,7 +890,8 @@ def get_next_card(
 def get_queue_stats(
     db: Session,
     user_id: int,
-    now: datetime = None
+    now: datetime = None,
+    create_counter: bool = True
 ) -> Dict:
     """
     Get comprehensive queue statistics.
@@ -564,6 +902,7 @@ def get_queue_stats(
         db: Database session
         user_id: User ID
         now: Current timestamp
+        create_counter: If False, do not create today's counter (read-only sessions)
         
     Returns:
         Dict with queue stats and daily progress
@@ -573,22 +912,28 @@ def get_queue_stats(
     
     today = now.date()
     limits = get_global_limits(db, user_id)
-    counter = get_today_counter(db, user_id, today)
+    counter = get_today_counter(db, user_id, today, create=create_counter)
     counts = get_queue_counts(db, user_id, None, now)
-    
-    # Calculate available slots
-    reviews_remaining = max(0, limits["review"] - counter.reviews_done)
-    new_remaining = max(0, limits["new"] - counter.introduced_new)
+    progress = daily_progress(limits, counter)
+    remaining = progress["remaining"]
     
     # Total cards in today's queue
     total_due = (
         counts["learning"] +
-        min(counts["review"], reviews_remaining) +
-        min(counts["new"], new_remaining)
+        min(counts["review"], remaining["reviews"]) +
+        min(counts["new"], remaining["new"])
     )
     
     return {
         "due_counts": counts,
+        **progress,
+        "total_due": total_due
+    }
+
+
+def daily_progress(limits: Dict[str, int], counter: DailyCounter) -> Dict:
+    """The "limits", "today" and "remaining" parts of get_queue_stats."""
+    return {
         "limits": limits,
         "today": {
             "reviews_done": counter.reviews_done,
@@ -599,8 +944,7 @@ def get_queue_stats(
             "date": counter.date.isoformat()
         },
         "remaining": {
-            "reviews": reviews_remaining,
-            "new": new_remaining
-        },
-        "total_due": total_due
+            "reviews": max(0, limits["review"] - counter.reviews_done),
+            "new": max(0, limits["new"] - counter.introduced_new)
+        }
     }
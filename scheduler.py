@@ -10,11 +10,16 @@ Based on SuperMemo SM-2 algorithm with modifications:
 - Phase 4: New cards -> Review directly with 1-day interval
 """
 from datetime import datetime, timedelta
-from typing import Tuple, Literal
+from typing import Dict, Literal, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from app.models.database import Card, SchedState, ReviewLog, DailyCounter, DailyDeckCounter
+from app.services import load_balancer, scheduler_engines
+from app.services.review_rollup import record_review
+from app.services.stats_cache import closed_days
 from deck_counter_helpers import update_deck_counters
 
 # PRD lines 62-65: Default learning steps
@@ -38,10 +43,22 @@ EASY_BONUS = 1.3
 Rating = Literal["again", "good", "easy"]
 
 
+class SM2Params(NamedTuple):
+    """Per-user SM-2 parameters (fitted by app.services.param_optimizer)."""
+    ef_initial: float = EF_INITIAL
+    lapse_multiplier: float = LAPSE_MULTIPLIER
+    easy_bonus: float = EASY_BONUS
+    learning_steps_minutes: Tuple[int, ...] = tuple(LEARNING_STEPS_MINUTES)
+
+
+DEFAULT_SM2_PARAMS = SM2Params()
+
+
 def calculate_next_state(
     sched_state: SchedState,
     rating: Rating,
-    now: datetime
+    now: datetime,
+    params: Optional[SM2Params] = None
 ) -> Tuple[str, datetime, float, float, int]:
     """
     Calculate next scheduling state based on current state and rating.
@@ -52,10 +69,14 @@ def calculate_next_state(
         sched_state: Current scheduling state
         rating: User rating ("again", "good", "easy")
         now: Current timestamp
+        params: User's SM-2 parameters (defaults to the module constants)
         
     Returns:
         Tuple of (new_state, due_at, interval_days, ease_factor, learning_step)
     """
+    if params is None:
+        params = DEFAULT_SM2_PARAMS
+    
     state = sched_state.state
     interval = sched_state.interval_days
     ef = sched_state.ease_factor
@@ -63,6 +84,8 @@ def calculate_next_state(
     
     # NEW STATE - Phase 4: Graduate directly to Review (skip Learning)
     if state == "new":
+        # New cards have never been answered; start from the user's initial EF
+        ef = params.ef_initial
         if rating == "again":
             # Phase 4: New cards remain New on Again (in-session repeats handled client-side)
             # No due timestamp change for in-session repeats
@@ -100,7 +123,7 @@ def calculate_next_state(
             # PRD line 66: Reset to first step
             return (
                 "learning",
-                now + timedelta(minutes=LEARNING_STEPS_MINUTES[0]),
+                now + timedelta(minutes=params.learning_steps_minutes[0]),
                 0.0,
                 ef,
                 0
@@ -108,11 +131,11 @@ def calculate_next_state(
         elif rating == "good":
             # PRD line 67: Advance step or graduate
             next_step = step + 1
-            if next_step < len(LEARNING_STEPS_MINUTES):
+            if next_step < len(params.learning_steps_minutes):
                 # Advance to next learning step
                 return (
                     "learning",
-                    now + timedelta(minutes=LEARNING_STEPS_MINUTES[next_step]),
+                    now + timedelta(minutes=params.learning_steps_minutes[next_step]),
                     0.0,
                     ef,
                     next_step
@@ -140,7 +163,7 @@ def calculate_next_state(
     elif state == "review":
         if rating == "again":
             # PRD line 66: Lapse - reduce interval and EF
-            new_interval = max(1.0, round(interval * LAPSE_MULTIPLIER))
+            new_interval = max(1.0, round(interval * params.lapse_multiplier))
             new_ef = max(EF_MIN, ef - 0.2)
             return (
                 "review",
@@ -168,9 +191,9 @@ def calculate_next_state(
         else:  # easy
             # PRD line 68: Bonus multiplier and EF boost
             if interval < REVIEW_INTERVAL_6:
-                new_interval = round(REVIEW_INTERVAL_6 * EASY_BONUS)
+                new_interval = round(REVIEW_INTERVAL_6 * params.easy_bonus)
             else:
-                new_interval = round(interval * ef * EASY_BONUS)
+                new_interval = round(interval * ef * params.easy_bonus)
             
             new_ef = min(EF_MAX, ef + 0.15)
             return (
@@ -192,7 +215,8 @@ def process_rating(
     user_id: int,
     now: datetime = None,
     log_review: bool = True,
-    update_per_deck: bool = True
+    update_per_deck: bool = True,
+    time_taken_ms: Optional[int] = None
 ) -> SchedState:
     """
     Process a card rating and update scheduling state.
@@ -207,6 +231,7 @@ def process_rating(
         now: Current timestamp (for testing)
         log_review: If False, skip ReviewLog and counter updates (for Again repeats)
         update_per_deck: If True, update per-deck counters (Phase 4)
+        time_taken_ms: Time spent answering, stored on the ReviewLog
         
     Returns:
         Updated SchedState
@@ -222,11 +247,16 @@ def process_rating(
     old_state = sched_state.state
     old_interval = sched_state.interval_days
     old_ef = sched_state.ease_factor
+    old_due = sched_state.due_at
     
-    # Calculate new state
-    new_state, due_at, interval, ef, step = calculate_next_state(
-        sched_state, rating, now
-    )
+    # Calculate new state with the deck's scheduling engine (SM-2 by default)
+    engine = scheduler_engines.get_engine(db, user_id, card.deck_id)
+    update = engine.next_state(sched_state, rating, now)
+    new_state, due_at, interval, ef, step = update[:5]
+    
+    # Opt-in load balancing: move review due dates to the least-loaded nearby day
+    if new_state == "review" and load_balancer.is_enabled(db, user_id):
+        due_at, interval = load_balancer.balance_due(db, user_id, due_at, interval, now)
     
     # Update sched_state
     sched_state.state = new_state
@@ -234,6 +264,9 @@ def process_rating(
     sched_state.interval_days = interval
     sched_state.ease_factor = ef
     sched_state.learning_step = step
+    if update.stability is not None:
+        sched_state.stability = update.stability
+        sched_state.difficulty = update.difficulty
     sched_state.version += 1
     
     # Track lapses
@@ -256,6 +289,7 @@ def process_rating(
             interval_after=interval,
             ease_factor_before=old_ef,
             ease_factor_after=ef,
+            time_taken_ms=time_taken_ms,
             reviewed_at=now
         )
         db.add(review_log)
@@ -294,6 +328,9 @@ def process_rating(
                 sched_state.interval_days = interval
                 sched_state.ease_factor = ef
                 sched_state.learning_step = step
+                if update.stability is not None:
+                    sched_state.stability = update.stability
+                    sched_state.difficulty = update.difficulty
                 sched_state.version += 1
                 if rating == "again" and old_state == "review":
                     sched_state.lapses += 1
@@ -333,13 +370,93 @@ def process_rating(
                     reviews_done=reviews_completed,
                     today=now.date()
                 )
+        
+        # Keep the daily stats rollup in step with review_logs (same transaction)
+        record_review(
+            db,
+            user_id=user_id,
+            deck_id=card.deck_id,
+            reviewed_at=now,
+            state_before=old_state,
+            rating=rating,
+            time_taken_ms=time_taken_ms
+        )
     
     db.commit()
+    load_balancer.note_move(user_id, old_state, old_due, new_state, due_at)
+    if log_review:
+        closed_days.note_review(user_id, now)
     db.refresh(sched_state)
     
     return sched_state
 
 
+def preview_intervals(
+    states: Sequence[str],
+    intervals: Sequence[float],
+    efs: Sequence[float],
+    steps: Sequence[int],
+    params: Optional[SM2Params] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized preview of the next interval for each rating, for many cards.
+    
+    Mirrors calculate_next_state: element i of each result array is the
+    number of days from now until card i would be due again after that
+    rating (learning steps as fractions of a day, 0 where the due time is
+    unchanged, e.g. Again on a new card).
+    
+    Args:
+        states: Card states ("new", "learning", "review")
+        intervals: Current intervals in days
+        efs: Current ease factors
+        steps: Current learning steps
+        params: User's SM-2 parameters (defaults to the module constants)
+        
+    Returns:
+        Dict with keys "again", "good", "easy" -> float64 arrays of days
+    """
+    if params is None:
+        params = DEFAULT_SM2_PARAMS
+    
+    state = np.asarray(states, dtype=object)
+    interval = np.asarray(intervals, dtype=np.float64)
+    ef = np.asarray(efs, dtype=np.float64)
+    step = np.asarray(steps, dtype=np.int64)
+    
+    is_new = state == "new"
+    is_learning = state == "learning"
+    is_review = state == "review"
+    conditions = [is_new, is_learning, is_review]
+    
+    step_days = np.asarray(params.learning_steps_minutes, dtype=np.float64) / 1440.0
+    next_step = step + 1
+    learning_good = np.where(
+        next_step < len(step_days),
+        step_days[np.clip(next_step, 0, len(step_days) - 1)],
+        REVIEW_INTERVAL_1
+    )
+    young = interval < REVIEW_INTERVAL_6
+    
+    again = np.select(conditions, [
+        0.0,
+        step_days[0],
+        np.maximum(1.0, np.round(interval * params.lapse_multiplier))
+    ], default=0.0)
+    good = np.select(conditions, [
+        REVIEW_INTERVAL_1,
+        learning_good,
+        np.where(young, REVIEW_INTERVAL_6, np.round(interval * ef))
+    ], default=0.0)
+    easy = np.select(conditions, [
+        REVIEW_INTERVAL_1,
+        REVIEW_INTERVAL_1,
+        np.where(young, np.round(REVIEW_INTERVAL_6 * params.easy_bonus), np.round(interval * ef * params.easy_bonus))
+    ], default=0.0)
+    
+    return {"again": again, "good": good, "easy": easy}
+
+
 def get_next_review_times(
     current_state: str,
     interval: float,
@@ -365,20 +482,8 @@ def get_next_review_times(
     if now is None:
         now = datetime.utcnow()
     
-    # Create a temporary sched_state-like object
-    class TempState:
-        def __init__(self):
-            self.state = current_state
-            self.interval_days = interval
-            self.ease_factor = ef
-            self.learning_step = step
-            self.due_at = now
-    
-    temp = TempState()
-    
-    results = {}
-    for rating in ["again", "good", "easy"]:
-        _, due_at, _, _, _ = calculate_next_state(temp, rating, now)
-        results[rating] = due_at
-    
-    return results
+    previews = preview_intervals([current_state], [interval], [ef], [step])
+    return {
+        rating: now + timedelta(days=float(days[0]))
+        for rating, days in previews.items()
+    }
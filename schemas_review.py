@@ -110,6 +110,10 @@ class CardStubResponse(BaseModel):
     tags: List[str]
     due_at: Optional[str] = Field(None, description="Due timestamp in ISO format")
     created_at: str = Field(description="Creation timestamp in ISO format")
+    preview_intervals: Optional[Dict[str, float]] = Field(
+        None,
+        description="Days until due after each rating (again/good/easy)"
+    )
 
 
 class SessionSectionsResponse(BaseModel):
@@ -135,12 +139,16 @@ class SessionMetaResponse(BaseModel):
     deck_order: List[str]
     global_limits: Dict[str, int]
     per_deck_limits: Dict[int, DeckLimitsResponse]
+    seed: Optional[int] = Field(None, description="Shuffle seed; send it back to rebuild the same order")
 
 
 class SessionBuildRequest(BaseModel):
     """Request to build a structured session."""
     scope: str = Field(description="'all' for All Decks, 'deck' for Specific Deck")
     deck_id: Optional[int] = Field(None, description="Required if scope='deck'")
+    seed: Optional[int] = Field(
+        None, ge=0, lt=2**53, description="Shuffle seed of a previous session (random if omitted)"
+    )
     
 
 class SessionBuildResponse(BaseModel):
@@ -2,52 +2,71 @@
 Card CRUD API endpoints.
 Implements REQ-2: Cards and REQ-7: Suspend/Unsuspend from PRD.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import Query as OrmQuery, Session
+from sqlalchemy import bindparam, exists, func, insert, literal, or_, and_, select, true, update
 from datetime import datetime
 
-from app.db.session import get_db
-from app.models.database import Card, Deck, Tag, User, SchedState
+from app.db.session import get_db, get_read_db
+from app.api.deps import CurrentUser, get_current_user
+from app.models.database import Card, Deck, Tag, User, SchedState, card_tags
+from app.services import card_deletion
+from app.services.load_balancer import due_histograms
+from app.services.review_rollup import move_card_reviews
+from app.services.stats_cache import closed_days
+from app.services.tag_index import (
+    TagQueryError,
+    card_tag_index,
+    get_user_index,
+    resolve_tag_query,
+    tag_card_counts,
+)
 from app.schemas.schemas import (
     CardCreate,
     CardUpdate,
     CardResponse,
     CardListResponse,
+    CardBatchCreate,
+    CardBatchResponse,
     CardBrowseFilter,
+    CardBulkRequest,
+    CardBulkResponse,
+    CardFilter,
     TagResponse
 )
 
 router = APIRouter()
 
 
-def get_default_user(db: Session) -> User:
-    """Get default user for POC (single-user assumption)."""
-    user = db.query(User).filter(User.username == "default_user").first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Default user not found. Run migrations."
-        )
-    return user
-
-
-def build_card_response(card: Card, db: Session) -> CardResponse:
-    """Build a CardResponse with all related data."""
+def build_card_response(
+    card: Card,
+    db: Session,
+    tag_counts: Optional[Dict[int, int]] = None
+) -> CardResponse:
+    """
+    Build a CardResponse with all related data.
+    
+    tag_counts maps tag_id -> card count; list endpoints pass one map for the
+    whole page (see tag_card_counts), otherwise the card's tags are counted
+    with a single GROUP BY.
+    """
     # Get deck name
     deck_name = card.deck.name if card.deck else ""
     
     # Get tags
+    tags = card.tags
+    if tag_counts is None:
+        tag_counts = tag_card_counts(db, card.user_id, [tag.id for tag in tags]) if tags else {}
     tag_responses = [
         TagResponse(
             id=tag.id,
             user_id=tag.user_id,
             name=tag.name,
-            card_count=0,  # Not calculating for performance
+            card_count=tag_counts.get(tag.id, 0),
             created_at=tag.created_at
         )
-        for tag in card.tags
+        for tag in tags
     ]
     
     # Get scheduling state if exists
@@ -74,51 +93,55 @@ def build_card_response(card: Card, db: Session) -> CardResponse:
     )
 
 
-@router.get("/", response_model=CardListResponse)
-def list_cards(
-    deck_ids: Optional[List[int]] = Query(None),
-    tag_ids: Optional[List[int]] = Query(None),
-    state: Optional[str] = Query(None),
-    suspended: Optional[bool] = Query(None),
-    search: Optional[str] = Query(None),
-    page: int = Query(1, ge=1),
-    page_size: int = Query(50, ge=1, le=200),
-    sort_by: str = Query("created_at"),
-    sort_order: str = Query("desc"),
-    db: Session = Depends(get_db)
-):
+def filter_cards(db: Session, user_id: int, card_filter: CardFilter) -> Optional[OrmQuery]:
     """
-    List and search cards with filters.
+    Query for the user's cards matching a browse filter, or None when the tag
+    filter already rules out every card.
     
-    REQ-2: Browse cards with filtering.
-    REQ-8: Browse/search with filters.
+    tag_ids matches cards with any of the tags; tag_query takes an expression
+    such as `verbs AND (n5 OR n4) AND NOT "needs review"` (tag names). Both
+    are resolved to card ids from the in-memory tag index before querying.
+    
+    Raises:
+        HTTPException: 400 for a malformed tag_query
     """
-    user = get_default_user(db)
+    # Resolve tag filters to card ids first (no SQL once the index is warm)
+    tag_card_ids = None
+    if card_filter.tag_query:
+        try:
+            tag_card_ids = resolve_tag_query(db, user_id, card_filter.tag_query)
+        except TagQueryError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    elif card_filter.tag_ids:
+        tag_card_ids = get_user_index(db, user_id).any_of(card_filter.tag_ids)
+    
+    if tag_card_ids is not None and len(tag_card_ids) == 0:
+        return None
     
     # Base query
-    query = db.query(Card).filter(Card.user_id == user.id)
+    query = db.query(Card).filter(Card.user_id == user_id)
     
     # Apply filters
-    if deck_ids:
-        query = query.filter(Card.deck_id.in_(deck_ids))
+    if card_filter.deck_ids:
+        query = query.filter(Card.deck_id.in_(card_filter.deck_ids))
     
-    if suspended is not None:
-        query = query.filter(Card.suspended == suspended)
+    if card_filter.suspended is not None:
+        query = query.filter(Card.suspended == card_filter.suspended)
     
     # Filter by state (requires join with sched_states)
-    if state:
+    if card_filter.state:
         query = query.join(SchedState, Card.id == SchedState.card_id)
-        query = query.filter(SchedState.state == state)
+        query = query.filter(SchedState.state == card_filter.state)
     
-    # Filter by tags (requires join with card_tags and tags)
-    if tag_ids:
-        from app.models.database import card_tags
-        query = query.join(card_tags, Card.id == card_tags.c.card_id)
-        query = query.filter(card_tags.c.tag_id.in_(tag_ids))
+    # Filter by tag-matched ids (inlined: the list can exceed bind parameter limits)
+    if tag_card_ids is not None:
+        query = query.filter(Card.id.in_(
+            bindparam("tag_card_ids", tag_card_ids.tolist(), expanding=True, literal_execute=True)
+        ))
     
     # Search in front/back
-    if search:
-        search_pattern = f"%{search}%"
+    if card_filter.search:
+        search_pattern = f"%{card_filter.search}%"
         query = query.filter(
             or_(
                 Card.front.ilike(search_pattern),
@@ -127,6 +150,37 @@ def list_cards(
             )
         )
     
+    return query
+
+
+@router.get("/", response_model=CardListResponse)
+def list_cards(
+    deck_ids: Optional[List[int]] = Query(None),
+    tag_ids: Optional[List[int]] = Query(None),
+    tag_query: Optional[str] = Query(None, max_length=500),
+    state: Optional[str] = Query(None),
+    suspended: Optional[bool] = Query(None),
+    search: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    sort_by: str = Query("created_at"),
+    sort_order: str = Query("desc"),
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    """
+    List and search cards with filters (see filter_cards).
+    
+    REQ-2: Browse cards with filtering.
+    REQ-8: Browse/search with filters.
+    """
+    query = filter_cards(db, user.id, CardFilter(
+        deck_ids=deck_ids, tag_ids=tag_ids, tag_query=tag_query,
+        state=state, suspended=suspended, search=search
+    ))
+    if query is None:
+        return CardListResponse(cards=[], total=0, page=page, page_size=page_size, has_more=False)
+    
     # Count total before pagination
     total = query.count()
     
@@ -140,8 +194,9 @@ def list_cards(
     offset = (page - 1) * page_size
     cards = query.offset(offset).limit(page_size).all()
     
-    # Build responses
-    card_responses = [build_card_response(card, db) for card in cards]
+    # Build responses (tag counts for the whole page in one query)
+    tag_counts = tag_card_counts(db, user.id, {tag.id for card in cards for tag in card.tags})
+    card_responses = [build_card_response(card, db, tag_counts) for card in cards]
     
     return CardListResponse(
         cards=card_responses,
@@ -152,18 +207,118 @@ def list_cards(
     )
 
 
+@router.post("/bulk", response_model=CardBulkResponse)
+def bulk_update_cards(
+    request: CardBulkRequest,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Suspend, unsuspend, move, tag, untag or delete many cards at once.
+    
+    REQ-2, REQ-3, REQ-7: bulk versions of the per-card endpoints.
+    Cards are selected by card_ids or by a browse filter (same fields as
+    GET /api/cards/) and resolved to ids with one SELECT; the change then
+    runs as a few set-based statements in one transaction. Ids that are not
+    the user's cards are ignored.
+    """
+    if (request.card_ids is None) == (request.filter is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide exactly one of card_ids or filter"
+        )
+    operation = request.operation
+    if operation == "move" and request.deck_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="move requires deck_id")
+    if operation in ("add_tags", "remove_tags") and not request.tag_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{operation} requires tag_ids")
+    
+    if operation == "move":
+        deck = db.query(Deck.id).filter(Deck.id == request.deck_id, Deck.user_id == user.id).first()
+        if not deck:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Deck {request.deck_id} not found"
+            )
+    tag_ids = set(request.tag_ids or [])
+    if tag_ids:
+        found = {row[0] for row in db.query(Tag.id).filter(Tag.id.in_(tag_ids), Tag.user_id == user.id)}
+        if found != tag_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Tags {sorted(tag_ids - found)} not found"
+            )
+    
+    # Resolve the selection once, so every statement sees the same cards
+    # (deleting sched_states would otherwise change a state filter's result)
+    if request.card_ids is not None:
+        query = db.query(Card).filter(Card.user_id == user.id, Card.id.in_(set(request.card_ids)))
+    else:
+        query = filter_cards(db, user.id, request.filter)
+    card_ids = [row[0] for row in query.with_entities(Card.id)] if query is not None else []
+    if not card_ids:
+        return CardBulkResponse(operation=operation, matched=0, affected=0)
+    selected = bindparam("card_ids", card_ids, expanding=True, literal_execute=True)
+    now = datetime.utcnow()
+    
+    try:
+        if operation in ("suspend", "unsuspend"):
+            value = operation == "suspend"
+            affected = db.execute(
+                update(Card).where(Card.id.in_(selected), Card.suspended != value)
+                .values(suspended=value, updated_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        elif operation == "move":
+            move_card_reviews(db, card_ids, request.deck_id)
+            affected = db.execute(
+                update(Card).where(Card.id.in_(selected), Card.deck_id != request.deck_id)
+                .values(deck_id=request.deck_id, updated_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        elif operation == "add_tags":
+            # INSERT ... SELECT every (card, tag) pair not already linked
+            pairs = select(Card.id, Tag.id, literal(now)).join(Tag, true()).where(
+                Card.id.in_(selected),
+                Tag.id.in_(tag_ids),
+                ~exists().where(card_tags.c.card_id == Card.id, card_tags.c.tag_id == Tag.id)
+            )
+            affected = db.execute(
+                card_tags.insert().from_select(["card_id", "tag_id", "created_at"], pairs)
+            ).rowcount
+        elif operation == "remove_tags":
+            affected = db.execute(
+                card_tags.delete().where(card_tags.c.card_id.in_(selected), card_tags.c.tag_id.in_(tag_ids))
+            ).rowcount
+        else:
+            affected = card_deletion.delete_cards(db, card_ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    db.expire_all()
+    if operation in ("suspend", "unsuspend", "delete"):
+        due_histograms.invalidate(user.id)
+    if operation in ("add_tags", "remove_tags", "delete"):
+        card_tag_index.invalidate(user.id)
+    if operation in ("move", "delete"):
+        closed_days.invalidate(user.id)
+    
+    return CardBulkResponse(operation=operation, matched=len(card_ids), affected=affected)
+
+
 @router.post("/", response_model=CardResponse, status_code=status.HTTP_201_CREATED)
 def create_card(
     card_in: CardCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Create a new card.
     
     REQ-2: User can create a card with front/back; assign to deck.
     """
-    user = get_default_user(db)
-    
     # Verify deck exists and belongs to user
     deck = db.query(Deck).filter(
         Deck.id == card_in.deck_id,
@@ -213,22 +368,99 @@ def create_card(
     db.add(sched_state)
     db.commit()
     db.refresh(card)
+    card_tag_index.set_card_tags(user.id, card.id, [tag.id for tag in card.tags])
     
     return build_card_response(card, db)
 
 
+@router.post("/batch", response_model=CardBatchResponse, status_code=status.HTTP_201_CREATED)
+def create_cards_batch(
+    batch: CardBatchCreate,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Create many cards with their tags and initial scheduling states.
+    
+    REQ-2: batch version of POST /api/cards/. Cards are inserted with one
+    multi-row INSERT ... RETURNING, followed by one insert each for
+    sched_states and card_tags, all in a single transaction. Tag ids that
+    are not the user's are ignored, as in create_card.
+    """
+    deck_ids = {card_in.deck_id for card_in in batch.cards}
+    found = {row[0] for row in db.query(Deck.id).filter(Deck.id.in_(deck_ids), Deck.user_id == user.id)}
+    if found != deck_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Decks {sorted(deck_ids - found)} not found"
+        )
+    
+    requested_tags = {tag_id for card_in in batch.cards for tag_id in card_in.tag_ids}
+    user_tags = set()
+    if requested_tags:
+        user_tags = {row[0] for row in db.query(Tag.id).filter(Tag.id.in_(requested_tags), Tag.user_id == user.id)}
+    
+    now = datetime.utcnow()
+    try:
+        card_ids = list(db.scalars(
+            insert(Card).returning(Card.id, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": user.id,
+                    "deck_id": card_in.deck_id,
+                    "front": card_in.front,
+                    "back": card_in.back,
+                    "notes": card_in.notes,
+                    "suspended": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for card_in in batch.cards
+            ]
+        ))
+        db.execute(insert(SchedState), [
+            {
+                "card_id": card_id,
+                "user_id": user.id,
+                "state": "new",
+                "due_at": now,
+                "interval_days": 0.0,
+                "ease_factor": 2.5,
+                "learning_step": 0,
+                "lapses": 0,
+                "version": 0,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for card_id in card_ids
+        ])
+        links = [
+            {"card_id": card_id, "tag_id": tag_id, "created_at": now}
+            for card_id, card_in in zip(card_ids, batch.cards)
+            for tag_id in set(card_in.tag_ids) & user_tags
+        ]
+        if links:
+            db.execute(card_tags.insert(), links)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    card_tag_index.invalidate(user.id)
+    
+    return CardBatchResponse(created=len(card_ids), card_ids=card_ids)
+
+
 @router.get("/{card_id}", response_model=CardResponse)
 def get_card(
     card_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get a specific card by ID.
     
     REQ-2: View card details.
     """
-    user = get_default_user(db)
-    
     card = db.query(Card).filter(
         Card.id == card_id,
         Card.user_id == user.id
@@ -247,7 +479,8 @@ def get_card(
 def update_card(
     card_id: int,
     card_in: CardUpdate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Update a card.
@@ -255,8 +488,6 @@ def update_card(
     REQ-2: User can edit card text later.
     Move card to another deck.
     """
-    user = get_default_user(db)
-    
     card = db.query(Card).filter(
         Card.id == card_id,
         Card.user_id == user.id
@@ -269,7 +500,8 @@ def update_card(
         )
     
     # If moving to different deck, verify it exists
-    if card_in.deck_id is not None and card_in.deck_id != card.deck_id:
+    moved = card_in.deck_id is not None and card_in.deck_id != card.deck_id
+    if moved:
         deck = db.query(Deck).filter(
             Deck.id == card_in.deck_id,
             Deck.user_id == user.id
@@ -281,6 +513,10 @@ def update_card(
                 detail=f"Deck {card_in.deck_id} not found"
             )
     
+    if moved:
+        # Its logged reviews count on the new deck from now on
+        move_card_reviews(db, [card.id], card_in.deck_id)
+    
     # Update basic fields
     update_data = card_in.model_dump(exclude_unset=True, exclude={'tag_ids'})
     for field, value in update_data.items():
@@ -296,6 +532,12 @@ def update_card(
     
     db.commit()
     db.refresh(card)
+    if card_in.tag_ids is not None:
+        card_tag_index.set_card_tags(user.id, card.id, [tag.id for tag in card.tags])
+    if "suspended" in update_data:
+        due_histograms.invalidate(user.id)
+    if moved:
+        closed_days.invalidate(user.id)
     
     return build_card_response(card, db)
 
@@ -303,15 +545,14 @@ def update_card(
 @router.delete("/{card_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_card(
     card_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Delete a card.
     
     REQ-2: Deleting a card removes it from scheduling and lists.
     """
-    user = get_default_user(db)
-    
     card = db.query(Card).filter(
         Card.id == card_id,
         Card.user_id == user.id
@@ -323,9 +564,12 @@ def delete_card(
             detail=f"Card {card_id} not found"
         )
     
-    # Delete card (cascade will delete sched_state and review_logs)
-    db.delete(card)
+    # Delete card with its sched_state, review_logs and tag links
+    card_deletion.delete_cards(db, [card.id])
     db.commit()
+    due_histograms.invalidate(user.id)
+    card_tag_index.remove_card(user.id, card_id)
+    closed_days.invalidate(user.id)
     
     return None
 
@@ -334,7 +578,8 @@ def delete_card(
 def toggle_suspend(
     card_id: int,
     suspend: bool = Query(..., description="True to suspend, False to unsuspend"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Suspend or unsuspend a card.
@@ -342,8 +587,6 @@ def toggle_suspend(
     REQ-7: Suspend/unsuspend cards.
     Suspended cards are excluded from review queues.
     """
-    user = get_default_user(db)
-    
     card = db.query(Card).filter(
         Card.id == card_id,
         Card.user_id == user.id
@@ -357,6 +600,7 @@ def toggle_suspend(
     
     card.suspended = suspend
     db.commit()
+    due_histograms.invalidate(user.id)
     db.refresh(card)
     
     return build_card_response(card, db)
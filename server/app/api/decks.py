@@ -3,7 +3,8 @@ Deck CRUD API endpoints.
 Implements REQ-1: Decks from PRD.
 """
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime
@@ -15,34 +16,30 @@ root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.pa
 if root_dir not in sys.path:
     sys.path.insert(0, root_dir)
 
-from app.db.session import get_db
-from app.models.database import Deck, Card, SchedState, User, DailyCounter
+from app.db.session import get_db, get_read_db
+from app.api.deps import CurrentUser, clocked_etag, get_current_user
+from app.models.database import Deck, Card, SchedState, User
+from app.services.review_rollup import daily_rating_totals
 from app.schemas.schemas import (
     DeckCreate,
     DeckUpdate,
     DeckResponse,
     DeckListResponse,
-    DeckStats
+    DeckStats,
+    DeckDeleteJobResponse
 )
+from app.services.limits_cache import limits_cache
+from app.services.scheduler_engines import engine_cache
+from app.services import card_deletion
 from queue_builder import get_global_limits
 
 router = APIRouter()
 
 
-def get_default_user(db: Session) -> User:
-    """Get default user for POC (single-user assumption)."""
-    user = db.query(User).filter(User.username == "default_user").first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Default user not found. Run migrations."
-        )
-    return user
-
-
-@router.get("/", response_model=DeckListResponse)
+@router.get("/", response_model=DeckListResponse, dependencies=[Depends(clocked_etag)])
 def list_decks(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     List all decks for the user.
@@ -50,38 +47,6 @@ def list_decks(
     REQ-1: Returns all decks with card counts and due counts.
     Due counts respect daily limits.
     """
-    user = get_default_user(db)
-    
-    # Get today's counter to see how many cards have been reviewed
-    today = datetime.utcnow().date()
-    counter = db.query(DailyCounter).filter(
-        DailyCounter.user_id == user.id,
-        func.date(DailyCounter.date) == today
-    ).first()
-    
-    if not counter:
-        # Create today's counter if it doesn't exist
-        try:
-            counter = DailyCounter(
-                user_id=user.id,
-                date=today,
-                introduced_new=0,
-                reviews_done=0,
-                again_count=0,
-                good_count=0,
-                easy_count=0
-            )
-            db.add(counter)
-            db.commit()
-            db.refresh(counter)
-        except Exception:
-            # Counter was created by another request, just fetch it
-            db.rollback()
-            counter = db.query(DailyCounter).filter(
-                DailyCounter.user_id == user.id,
-                func.date(DailyCounter.date) == today
-            ).first()
-    
     # Get decks with card counts
     decks = db.query(Deck).filter(Deck.user_id == user.id).all()
     
@@ -132,6 +97,7 @@ def list_decks(
             "description": deck.description,
             "new_per_day": deck.new_per_day,
             "review_per_day": deck.review_per_day,
+            "scheduler_engine": deck.scheduler_engine,
             "card_count": card_count,
             "due_count": due_count,
             "new_count": new_count,
@@ -151,26 +117,28 @@ def list_decks(
 @router.post("/", response_model=DeckResponse, status_code=status.HTTP_201_CREATED)
 def create_deck(
     deck_in: DeckCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Create a new deck.
     
     REQ-1: User can create a deck with a name.
     """
-    user = get_default_user(db)
-    
     # Create deck
     deck = Deck(
         user_id=user.id,
         name=deck_in.name,
         description=deck_in.description,
         new_per_day=deck_in.new_per_day,
-        review_per_day=deck_in.review_per_day
+        review_per_day=deck_in.review_per_day,
+        scheduler_engine=deck_in.scheduler_engine
     )
     
     db.add(deck)
     db.commit()
+    if deck.scheduler_engine is not None:
+        engine_cache.invalidate(user.id)
     db.refresh(deck)
     
     # Return with counts
@@ -181,6 +149,7 @@ def create_deck(
         "description": deck.description,
         "new_per_day": deck.new_per_day,
         "review_per_day": deck.review_per_day,
+        "scheduler_engine": deck.scheduler_engine,
         "card_count": 0,
         "due_count": 0,
         "new_count": 0,
@@ -191,18 +160,32 @@ def create_deck(
     return DeckResponse(**deck_dict)
 
 
+@router.get("/delete-jobs/{job_id}", response_model=DeckDeleteJobResponse)
+def get_deck_delete_job(
+    job_id: str,
+    user: CurrentUser = Depends(get_current_user)
+):
+    """Status of a background deck deletion."""
+    job = card_deletion.deletion_jobs.status(job_id, user.id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Deletion job {job_id} not found"
+        )
+    return DeckDeleteJobResponse(**job)
+
+
 @router.get("/{deck_id}", response_model=DeckResponse)
 def get_deck(
     deck_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get a specific deck by ID.
     
     REQ-1: Deck shows card count and due count.
     """
-    user = get_default_user(db)
-    
     deck = db.query(Deck).filter(
         Deck.id == deck_id,
         Deck.user_id == user.id
@@ -255,6 +238,7 @@ def get_deck(
         "description": deck.description,
         "new_per_day": deck.new_per_day,
         "review_per_day": deck.review_per_day,
+        "scheduler_engine": deck.scheduler_engine,
         "card_count": card_count,
         "due_count": due_count,
         "new_count": new_count,
@@ -271,15 +255,14 @@ def get_deck(
 def update_deck(
     deck_id: int,
     deck_in: DeckUpdate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Update a deck.
     
     REQ-1: Rename deck, update description or limits.
     """
-    user = get_default_user(db)
-    
     deck = db.query(Deck).filter(
         Deck.id == deck_id,
         Deck.user_id == user.id
@@ -297,6 +280,8 @@ def update_deck(
         setattr(deck, field, value)
     
     db.commit()
+    limits_cache.invalidate_decks(user.id)
+    engine_cache.invalidate(user.id)
     db.refresh(deck)
     
     # Return with counts
@@ -338,6 +323,7 @@ def update_deck(
         "description": deck.description,
         "new_per_day": deck.new_per_day,
         "review_per_day": deck.review_per_day,
+        "scheduler_engine": deck.scheduler_engine,
         "card_count": card_count,
         "due_count": due_count,
         "new_count": new_count,
@@ -353,17 +339,22 @@ def update_deck(
 @router.delete("/{deck_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_deck(
     deck_id: int,
-    db: Session = Depends(get_db)
+    background: bool = Query(False, description="Delete in a background job (large decks)"),
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Delete a deck and all its cards.
     
     REQ-1: Delete deck requires confirmation and deletes all cards within.
     Note: Confirmation should be handled by frontend.
-    """
-    user = get_default_user(db)
     
-    deck = db.query(Deck).filter(
+    Rows are removed with set-based DELETEs (see app.services.card_deletion).
+    With background=true the deletion runs as a job committing one chunk of
+    cards at a time; the response is 202 with a job to poll at
+    GET /api/decks/delete-jobs/{job_id}.
+    """
+    deck = db.query(Deck.id).filter(
         Deck.id == deck_id,
         Deck.user_id == user.id
     ).first()
@@ -374,23 +365,29 @@ def delete_deck(
             detail=f"Deck {deck_id} not found"
         )
     
-    # Delete deck (cascade will delete cards)
-    db.delete(deck)
+    if background:
+        # End this session's read transaction so the job can write
+        db.commit()
+        job_id = card_deletion.deletion_jobs.submit(db.get_bind(), user.id, deck_id)
+        job = DeckDeleteJobResponse(**card_deletion.deletion_jobs.status(job_id, user.id))
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job.model_dump())
+    
+    card_deletion.delete_deck(db, deck_id)
     db.commit()
+    card_deletion.invalidate_deck_caches(user.id)
 
 
 @router.get("/{deck_id}/stats", response_model=DeckStats)
 def get_deck_stats(
     deck_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get detailed statistics for a deck.
     
     Returns card counts by state, average ease factor, and retention rate.
     """
-    user = get_default_user(db)
-    
     # Verify deck exists
     deck = db.query(Deck).filter(
         Deck.id == deck_id,
@@ -403,9 +400,6 @@ def get_deck_stats(
             detail=f"Deck {deck_id} not found"
         )
     
-    from datetime import datetime
-    from app.models.database import ReviewLog
-    
     # Total cards
     total_cards = db.query(func.count(Card.id)).filter(
         Card.deck_id == deck_id
@@ -457,22 +451,10 @@ def get_deck_stats(
         SchedState.state == 'review'
     ).scalar() or 2.5
     
-    # Retention rate (Good+Easy / Total reviews today)
-    today = datetime.utcnow().date()
-    total_reviews_today = db.query(func.count(ReviewLog.id)).join(
-        Card, Card.id == ReviewLog.card_id
-    ).filter(
-        Card.deck_id == deck_id,
-        func.date(ReviewLog.reviewed_at) == today
-    ).scalar() or 0
-    
-    successful_reviews = db.query(func.count(ReviewLog.id)).join(
-        Card, Card.id == ReviewLog.card_id
-    ).filter(
-        Card.deck_id == deck_id,
-        func.date(ReviewLog.reviewed_at) == today,
-        ReviewLog.rating.in_(['good', 'easy'])
-    ).scalar() or 0
+    # Retention rate (Good+Easy / Total reviews today), from the daily rollup
+    today_totals = daily_rating_totals(db, user.id, datetime.utcnow(), deck_id=deck_id)
+    total_reviews_today = sum(day.total for day in today_totals)
+    successful_reviews = sum(day.successful for day in today_totals)
     
     retention_rate = (successful_reviews / total_reviews_today * 100) if total_reviews_today > 0 else 0.0
     
@@ -0,0 +1,177 @@
+"""
+Shared API dependencies.
+
+User resolution is split in two so a future auth layer only has to replace
+``resolve_principal`` (e.g. with a token-derived username); the cache below
+is keyed by principal and works unchanged for multiple users.
+"""
+import zlib
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic, time
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.models.database import User
+from app.services.data_version import data_versions
+
+# POC single-user principal (see .github/copilot-instructions.md)
+DEFAULT_PRINCIPAL = "default_user"
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Resolved request user. Detached from any session, safe to cache."""
+    id: int
+    username: str
+    timezone: str
+
+
+class UserCache:
+    """
+    Process-wide principal -> CurrentUser cache.
+
+    Call invalidate() whenever a user row is created, renamed or deleted.
+    That only reaches this process, so entries also expire ttl_s seconds
+    after they were stored (settings.cache_ttl_s; 0 keeps them forever).
+    """
+
+    def __init__(self, ttl_s: Optional[float] = None, clock: Callable[[], float] = monotonic):
+        self.ttl_s = settings.cache_ttl_s if ttl_s is None else ttl_s
+        self._clock = clock
+        self._users: Dict[str, Tuple[CurrentUser, float]] = {}
+        self._lock = Lock()
+
+    def get(self, principal: str) -> Optional[CurrentUser]:
+        entry = self._users.get(principal)
+        if entry is None:
+            return None
+        user, stored_at = entry
+        if self.ttl_s > 0 and self._clock() - stored_at >= self.ttl_s:
+            return None
+        return user
+
+    def set(self, principal: str, user: CurrentUser) -> None:
+        with self._lock:
+            self._users[principal] = (user, self._clock())
+
+    def invalidate(self, principal: Optional[str] = None) -> None:
+        """Drop one principal, or every entry when principal is None."""
+        with self._lock:
+            if principal is None:
+                self._users.clear()
+            else:
+                self._users.pop(principal, None)
+
+
+user_cache = UserCache()
+
+
+def resolve_principal() -> str:
+    """Identify the caller. POC: always the default user (no auth)."""
+    return DEFAULT_PRINCIPAL
+
+
+def _to_current_user(user: User) -> CurrentUser:
+    return CurrentUser(id=user.id, username=user.username, timezone=user.timezone)
+
+
+def _note_user(request: Optional[Request], user: CurrentUser) -> CurrentUser:
+    """Remember the request's user for the write-tracking middleware (app.main)."""
+    if request is not None:
+        request.state.user_id = user.id
+    return user
+
+
+def get_current_user(
+    principal: str = Depends(resolve_principal),
+    db: Session = Depends(get_db),
+    request: Request = None
+) -> CurrentUser:
+    """
+    Resolve the request user, hitting the database only on a cache miss.
+    """
+    cached = user_cache.get(principal)
+    if cached is not None:
+        return _note_user(request, cached)
+
+    user = db.query(User).filter(User.username == principal).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Default user not found. Run migrations."
+        )
+
+    current = _to_current_user(user)
+    user_cache.set(principal, current)
+    return _note_user(request, current)
+
+
+def get_or_create_current_user(
+    principal: str = Depends(resolve_principal),
+    db: Session = Depends(get_db),
+    request: Request = None
+) -> CurrentUser:
+    """
+    Like get_current_user, but creates the user when missing
+    (used by the settings API, which bootstraps a fresh database).
+    """
+    cached = user_cache.get(principal)
+    if cached is not None:
+        return _note_user(request, cached)
+
+    user = db.query(User).filter(User.username == principal).first()
+    if not user:
+        user = User(username=principal, timezone="UTC")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+
+    current = _to_current_user(user)
+    user_cache.set(principal, current)
+    return _note_user(request, current)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against an If-None-Match header (list or *)."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def conditional_get(
+    user_dependency: Callable[..., CurrentUser] = get_current_user,
+    time_bucket_s: Optional[float] = None
+) -> Callable[..., None]:
+    """
+    Dependency for polled GET endpoints: sets an ETag derived from the user's
+    data version (app.services.data_version) and answers a matching
+    If-None-Match with 304 before the endpoint runs, without a query.
+
+    time_bucket_s: for responses that also change with the clock (due counts,
+    "today"), the ETag changes at least this often.
+    """
+    def check(request: Request, response: Response, user: CurrentUser = Depends(user_dependency)) -> None:
+        # Snapshot the version before the endpoint reads anything
+        parts = [data_versions.epoch, str(data_versions.version(user.id))]
+        if time_bucket_s:
+            parts.append(str(int(time() // time_bucket_s)))
+        parts.append(format(zlib.crc32(str(request.url).encode()), "08x"))
+        etag = f'W/"{"-".join(parts)}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    return check
+
+
+# ETag dependency for polled endpoints whose data also changes with the clock
+clocked_etag = conditional_get(time_bucket_s=settings.etag_time_bucket_s)
@@ -2,63 +2,69 @@
 Settings API endpoints.
 Implements REQ-10 (Dark Mode) and REQ-11 (Music).
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.db.session import get_db
-from app.models.database import User, UserSettings
-from app.schemas.schemas import UserSettingsResponse, UserSettingsUpdate
+from app.api.deps import CurrentUser, conditional_get, get_or_create_current_user
+from app.models.database import UserSettings
+from app.services.limits_cache import limits_cache
+from app.services.scheduler_engines import engine_cache
+from app.services.load_balancer import due_histograms
+from app.services.param_optimizer import optimizer_jobs
+from app.schemas.schemas import OptimizerJobResponse, UserSettingsResponse, UserSettingsUpdate
 
 router = APIRouter()
 
 
-def get_default_user(db: Session) -> User:
+def get_user_settings(db: Session, user_id: int) -> UserSettings:
     """
-    Get the default user (POC assumes single user).
-    Creates user and settings if they don't exist.
+    Get the user's settings row, creating defaults if it doesn't exist.
     """
-    user = db.query(User).filter(User.id == 1).first()
-    if not user:
-        user = User(id=1, username="default_user", timezone="UTC")
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    user_settings = db.query(UserSettings).filter(
+        UserSettings.user_id == user_id
+    ).first()
     
-    # Ensure settings exist
-    if not user.settings:
-        settings = UserSettings(
-            user_id=user.id,
+    if not user_settings:
+        user_settings = UserSettings(
+            user_id=user_id,
             learning_steps="10,1440",  # 10 min, 1 day
             dark_mode=False,
             music_enabled=False,
             music_volume=0.5
         )
-        db.add(settings)
+        db.add(user_settings)
         db.commit()
+        db.refresh(user_settings)
+        limits_cache.invalidate_settings(user_id)
+        engine_cache.invalidate(user_id)
     
-    return user
+    return user_settings
 
 
-@router.get("", response_model=UserSettingsResponse)
-async def get_settings(db: Session = Depends(get_db)):
+@router.get(
+    "", response_model=UserSettingsResponse,
+    dependencies=[Depends(conditional_get(get_or_create_current_user))]
+)
+async def get_settings(
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_or_create_current_user)
+):
     """
     Get user settings.
     
     Returns:
         UserSettingsResponse: Current user settings
     """
-    user = get_default_user(db)
-    
-    if not user.settings:
-        raise HTTPException(status_code=404, detail="Settings not found")
-    
-    return user.settings
+    return get_user_settings(db, user.id)
 
 
 @router.put("", response_model=UserSettingsResponse)
 async def update_settings(
     settings_update: UserSettingsUpdate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_or_create_current_user)
 ):
     """
     Update user settings.
@@ -69,10 +75,7 @@ async def update_settings(
     Returns:
         UserSettingsResponse: Updated settings
     """
-    user = get_default_user(db)
-    
-    if not user.settings:
-        raise HTTPException(status_code=404, detail="Settings not found")
+    user_settings = get_user_settings(db, user.id)
     
     # Update only provided fields
     update_data = settings_update.model_dump(exclude_unset=True)
@@ -86,9 +89,43 @@ async def update_settings(
         update_data['dark_mode'] = (update_data['theme_mode'] == 'night')
     
     for field, value in update_data.items():
-        setattr(user.settings, field, value)
+        setattr(user_settings, field, value)
     
     db.commit()
-    db.refresh(user.settings)
+    limits_cache.invalidate_settings(user.id)
+    engine_cache.invalidate(user.id)
+    due_histograms.invalidate_settings(user.id)
+    db.refresh(user_settings)
     
-    return user.settings
+    return user_settings
+
+
+@router.post("/optimize", response_model=OptimizerJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def start_optimizer(
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_or_create_current_user)
+):
+    """
+    Fit the user's SM-2 parameters from their review history.
+    
+    The fit runs in a worker process; poll GET /optimize/{job_id} for the
+    result. Fitted values are stored in the user's settings when done.
+    """
+    database_url = db.get_bind().url.render_as_string(hide_password=False)
+    job_id = optimizer_jobs.submit(database_url, user.id, settings.optimizer_workers)
+    return OptimizerJobResponse(job_id=job_id, status="pending")
+
+
+@router.get("/optimize/{job_id}", response_model=OptimizerJobResponse)
+def get_optimizer_job(
+    job_id: str,
+    user: CurrentUser = Depends(get_or_create_current_user)
+):
+    """Status of an optimizer run, with fit metrics once done."""
+    job = optimizer_jobs.status(job_id, user.id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Optimizer job {job_id} not found"
+        )
+    return OptimizerJobResponse(**job)
@@ -4,16 +4,31 @@ Provides daily stats, retention rates, and study streaks.
 """
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+import os
+import sys
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 
-from app.db.session import get_db
-from app.models.database import User, Card, ReviewLog, DailyCounter
+# Add parent directory to path to import root-level modules
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from app.db.session import get_read_db
+from app.api.deps import CurrentUser, clocked_etag, get_current_user
+from app.models.database import User, Card, DailyCounter, ReviewDailyRollup
+from app.services import analytics, forecast as forecast_service
+from app.services.review_rollup import day_start, total_review_count
+from app.services.stats_cache import cached_daily_counters, cached_daily_rating_totals
 from pydantic import BaseModel
+from queue_builder import get_global_limits
 
 router = APIRouter()
 
+# Upper bound for `days` look-back parameters
+MAX_LOOKBACK_DAYS = 3650
+
 
 class TodayStatsResponse(BaseModel):
     """Daily statistics response."""
@@ -33,19 +48,12 @@ class SessionStatsResponse(BaseModel):
     performance_trends: dict
     
 
-def get_default_user(db: Session) -> User:
-    """Get default user for POC (single-user assumption)."""
-    user = db.query(User).filter(User.username == "default_user").first()
-    if not user:
-        raise HTTPException(
-            status_code=500,
-            detail="Default user not found. Run migrations."
-        )
-    return user
 
-
-@router.get("/today", response_model=TodayStatsResponse)
-def get_today_stats(db: Session = Depends(get_db)):
+@router.get("/today", response_model=TodayStatsResponse, dependencies=[Depends(clocked_etag)])
+def get_today_stats(
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
+):
     """
     Get today's study statistics.
     
@@ -56,8 +64,6 @@ def get_today_stats(db: Session = Depends(get_db)):
     - study_streak: Current consecutive days of study
     - total_reviews: Total reviews across all time
     """
-    user = get_default_user(db)
-    
     # Get today's date range
     today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
     
@@ -89,10 +95,8 @@ def get_today_stats(db: Session = Depends(get_db)):
     # Calculate study streak
     streak = _calculate_study_streak(db, user.id, today_start)
     
-    # Get total reviews all time
-    total_reviews = db.query(ReviewLog).filter(
-        ReviewLog.user_id == user.id
-    ).count()
+    # Get total reviews all time (rollup also covers archived review logs)
+    total_reviews = total_review_count(db, user.id)
     
     return TodayStatsResponse(
         reviewed_today=reviewed_count,
@@ -104,42 +108,39 @@ def get_today_stats(db: Session = Depends(get_db)):
 
 
 def _calculate_study_streak(db: Session, user_id: int, today_start: datetime) -> int:
-    """Calculate consecutive days of study."""
-    streak = 0
-    check_date = today_start
+    """
+    Calculate consecutive days of study ending today (max 365).
     
-    # Check backwards from today
-    while True:
-        day_start = check_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        
-        # Check if user reviewed any cards on this day
-        has_reviews = db.query(ReviewLog).filter(
-            and_(
-                ReviewLog.user_id == user_id,
-                ReviewLog.reviewed_at >= day_start,
-                ReviewLog.reviewed_at < day_end
-            )
-        ).first() is not None
-        
-        if has_reviews:
-            streak += 1
-            check_date = check_date - timedelta(days=1)
-        else:
-            # Streak broken
-            break
-        
-        # Limit streak check to 365 days max
-        if streak >= 365:
-            break
+    Reads the distinct days with reviews over the last 365 days from the
+    daily rollup (one row per day bucket, unaffected by log archival) and
+    walks the sorted days in Python.
+    """
+    window_start = today_start - timedelta(days=364)
+    
+    rows = db.query(ReviewDailyRollup.date).filter(
+        and_(
+            ReviewDailyRollup.user_id == user_id,
+            ReviewDailyRollup.date >= window_start,
+            ReviewDailyRollup.date < today_start + timedelta(days=1)
+        )
+    ).distinct().all()
+    
+    study_days = {row[0].date() for row in rows}
+    
+    streak = 0
+    check_date = today_start.date()
+    while check_date in study_days and streak < 365:
+        streak += 1
+        check_date -= timedelta(days=1)
     
     return streak
 
 
 @router.get("/retention")
 def get_retention_stats(
-    days: Optional[int] = 30,
-    db: Session = Depends(get_db)
+    days: Optional[int] = Query(30, ge=1, le=MAX_LOOKBACK_DAYS),
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get retention statistics over time.
@@ -150,37 +151,17 @@ def get_retention_stats(
     Returns:
         Daily retention rates for the specified period
     """
-    user = get_default_user(db)
-    
     cutoff_date = datetime.now() - timedelta(days=days)
     
-    # Get reviews for the period
-    reviews = db.query(ReviewLog).filter(
-        and_(
-            ReviewLog.user_id == user.id,
-            ReviewLog.reviewed_at >= cutoff_date
-        )
-    ).all()
-    
-    # Group by date and calculate daily retention
-    daily_stats = {}
-    for review in reviews:
-        date_key = review.reviewed_at.date()
-        if date_key not in daily_stats:
-            daily_stats[date_key] = {"total": 0, "successful": 0}
-        
-        daily_stats[date_key]["total"] += 1
-        if review.rating in ['good', 'easy']:
-            daily_stats[date_key]["successful"] += 1
-    
-    # Calculate retention rates
+    # Served from the daily rollup: one row per day, whatever the review
+    # volume; closed days come from the stats cache
     result = []
-    for date, stats in sorted(daily_stats.items()):
-        retention = (stats["successful"] / stats["total"] * 100) if stats["total"] > 0 else 0
+    for day in cached_daily_rating_totals(db, user.id, cutoff_date):
+        retention = (day.successful / day.total * 100) if day.total > 0 else 0
         result.append({
-            "date": str(date),
+            "date": day.date.strftime('%Y-%m-%d'),
             "retention_rate": round(retention, 1),
-            "total_reviews": stats["total"]
+            "total_reviews": day.total
         })
     
     return {"period_days": days, "daily_stats": result}
@@ -188,8 +169,9 @@ def get_retention_stats(
 
 @router.get("/sessions", response_model=SessionStatsResponse)
 def get_session_stats(
-    days: Optional[int] = 30,
-    db: Session = Depends(get_db)
+    days: Optional[int] = Query(30, ge=1, le=MAX_LOOKBACK_DAYS),
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get Phase 4 session-based statistics.
@@ -200,24 +182,28 @@ def get_session_stats(
     Returns:
         Session completion rates, section breakdowns, daily counts
     """
-    user = get_default_user(db)
-    cutoff_date = datetime.now() - timedelta(days=days)
+    now = datetime.now()
+    cutoff_date = now - timedelta(days=days)
+    recent_cutoff = day_start(now - timedelta(days=7))
     
-    # Get all reviews for the period
-    reviews = db.query(ReviewLog).filter(
-        and_(
-            ReviewLog.user_id == user.id,
-            ReviewLog.reviewed_at >= cutoff_date
-        )
-    ).all()
+    # Rating counts from the daily rollup, split into the last 7 days vs.
+    # older (day granularity) for the trend calculation
+    rating_counts = {"again": 0, "good": 0, "easy": 0}
+    recent_total = recent_successful = older_total = older_successful = 0
+    for day in cached_daily_rating_totals(db, user.id, cutoff_date):
+        rating_counts["again"] += day.again
+        rating_counts["good"] += day.good
+        rating_counts["easy"] += day.easy
+        if day.date >= recent_cutoff:
+            recent_total += day.total
+            recent_successful += day.successful
+        else:
+            older_total += day.total
+            older_successful += day.successful
+    total_ratings = recent_total + older_total
     
-    # Get daily counters for the period
-    daily_counters = db.query(DailyCounter).filter(
-        and_(
-            DailyCounter.user_id == user.id,
-            DailyCounter.date >= cutoff_date.date()
-        )
-    ).all()
+    # Get daily counters for the period (closed days cached)
+    daily_counters = cached_daily_counters(db, user.id, cutoff_date)
     
     # Calculate session-based metrics
     total_sessions = len(daily_counters)  # Approximate: one session per day with activity
@@ -227,28 +213,14 @@ def get_session_stats(
     # Calculate completion rate (assume 100% for completed sessions)
     completion_rate = 100.0 if total_sessions > 0 else 0.0
     
-    # Section breakdown (aggregate from all reviews)
+    # Section breakdown: ReviewLog does not record the session section yet,
+    # so every logged review is attributed to the review section
     section_breakdown = {
         "new": 0,
-        "learning": 0, 
-        "review": 0
+        "learning": 0,
+        "review": total_ratings
     }
     
-    # Approximate section breakdown based on card states during reviews
-    for review in reviews:
-        # This is a simplified approximation since we don't track session sections in ReviewLog yet
-        # In a full implementation, we'd track session_section in ReviewLog
-        if hasattr(review, 'card_state'):
-            if review.card_state == 'new':
-                section_breakdown["new"] += 1
-            elif review.card_state == 'learning':
-                section_breakdown["learning"] += 1
-            else:
-                section_breakdown["review"] += 1
-        else:
-            # Default to review section for existing data
-            section_breakdown["review"] += 1
-    
     # Daily session counts
     daily_session_counts = {}
     for counter in daily_counters:
@@ -259,25 +231,6 @@ def get_session_stats(
             "new_cards": counter.introduced_new
         }
     
-    # Session success rates by section (approximated)
-    section_success_rates = {}
-    for section, count in section_breakdown.items():
-        if count > 0:
-            # Calculate success rate for this section (Good + Easy ratings)
-            section_reviews = [r for r in reviews if r.rating in ['good', 'easy']]
-            success_count = len(section_reviews)
-            section_success_rates[section] = {
-                "total": count,
-                "successful": success_count,
-                "rate": (success_count / count * 100) if count > 0 else 0.0
-            }
-        else:
-            section_success_rates[section] = {
-                "total": 0,
-                "successful": 0,
-                "rate": 0.0
-            }
-    
     # Convert daily_session_counts to list of dicts for frontend
     daily_sessions_list = []
     for date_str, data in daily_session_counts.items():
@@ -289,29 +242,19 @@ def get_session_stats(
         })
     
     # Performance trends calculations
-    total_ratings = len(reviews)
     if total_ratings > 0:
-        again_count = len([r for r in reviews if r.rating == 'again'])
-        good_count = len([r for r in reviews if r.rating == 'good'])
-        easy_count = len([r for r in reviews if r.rating == 'easy'])
-        
-        again_pct = (again_count / total_ratings) * 100
-        good_pct = (good_count / total_ratings) * 100
-        easy_pct = (easy_count / total_ratings) * 100
+        again_pct = (rating_counts["again"] / total_ratings) * 100
+        good_pct = (rating_counts["good"] / total_ratings) * 100
+        easy_pct = (rating_counts["easy"] / total_ratings) * 100
         
-        # Simple trend calculation (comparing recent vs older reviews)
-        recent_reviews = [r for r in reviews if r.reviewed_at >= datetime.now() - timedelta(days=7)]
-        if len(recent_reviews) > 0:
-            recent_success_rate = len([r for r in recent_reviews if r.rating in ['good', 'easy']]) / len(recent_reviews)
-            older_reviews = [r for r in reviews if r.reviewed_at < datetime.now() - timedelta(days=7)]
-            if len(older_reviews) > 0:
-                older_success_rate = len([r for r in older_reviews if r.rating in ['good', 'easy']]) / len(older_reviews)
-                if recent_success_rate > older_success_rate + 0.05:
-                    trend = 'improving'
-                elif recent_success_rate < older_success_rate - 0.05:
-                    trend = 'declining'
-                else:
-                    trend = 'stable'
+        # Simple trend calculation (comparing last 7 days vs older reviews)
+        if recent_total > 0 and older_total > 0:
+            recent_success_rate = recent_successful / recent_total
+            older_success_rate = older_successful / older_total
+            if recent_success_rate > older_success_rate + 0.05:
+                trend = 'improving'
+            elif recent_success_rate < older_success_rate - 0.05:
+                trend = 'declining'
             else:
                 trend = 'stable'
         else:
@@ -343,3 +286,100 @@ def get_session_stats(
         daily_sessions=daily_sessions_list,
         performance_trends=performance_trends
     )
+
+
+def _load_analytics_columns(
+    db: Session,
+    user_id: int,
+    days: Optional[int],
+    deck_id: Optional[int]
+) -> analytics.ReviewColumns:
+    since = datetime.now() - timedelta(days=days) if days else None
+    return analytics.load_review_columns(db, user_id, since=since, deck_id=deck_id)
+
+
+@router.get("/analytics/forgetting-curve")
+def get_forgetting_curve(
+    days: Optional[int] = Query(None, ge=1, le=MAX_LOOKBACK_DAYS),
+    deck_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Retention of review cards by days elapsed since their previous review.
+    
+    Args:
+        days: Only use reviews from the last N days (default: all history
+            still in review_logs; archived months are not included)
+        deck_id: Restrict to one deck
+    """
+    columns = _load_analytics_columns(db, user.id, days, deck_id)
+    return {
+        "total_reviews": len(columns),
+        "buckets": analytics.forgetting_curve(columns)
+    }
+
+
+@router.get("/analytics/ease-distribution")
+def get_ease_distribution(
+    days: Optional[int] = Query(None, ge=1, le=MAX_LOOKBACK_DAYS),
+    deck_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Distribution of each reviewed card's latest ease factor.
+    
+    Args:
+        days: Only use reviews from the last N days (default: all history
+            still in review_logs; archived months are not included)
+        deck_id: Restrict to one deck
+    """
+    columns = _load_analytics_columns(db, user.id, days, deck_id)
+    return analytics.ease_distribution(columns)
+
+
+@router.get("/analytics/retention-by-interval")
+def get_retention_by_interval(
+    days: Optional[int] = Query(None, ge=1, le=MAX_LOOKBACK_DAYS),
+    deck_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Retention of review cards grouped by their scheduled interval.
+    
+    Args:
+        days: Only use reviews from the last N days (default: all history
+            still in review_logs; archived months are not included)
+        deck_id: Restrict to one deck
+    """
+    columns = _load_analytics_columns(db, user.id, days, deck_id)
+    return {
+        "total_reviews": len(columns),
+        "buckets": analytics.retention_by_interval(columns)
+    }
+
+
+@router.get("/forecast")
+def get_forecast(
+    days: int = Query(30, ge=forecast_service.MIN_HORIZON_DAYS, le=forecast_service.MAX_HORIZON_DAYS),
+    new_per_day: Optional[int] = Query(None, ge=0, le=9999),
+    simulations: int = Query(forecast_service.DEFAULT_SIMULATIONS, ge=1, le=64),
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Forecast the daily review workload.
+    
+    Args:
+        days: Horizon in days (30-365)
+        new_per_day: New cards introduced per day (default: the user's global limit)
+        simulations: Monte Carlo runs; more runs give tighter low/high bands
+    
+    Returns:
+        Expected reviews per day with 10th/90th percentile bands
+    """
+    if new_per_day is None:
+        new_per_day = get_global_limits(db, user.id)["new"]
+    return forecast_service.forecast(db, user.id, days, new_per_day, simulations)
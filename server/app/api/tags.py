@@ -7,8 +7,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.api.deps import CurrentUser, get_current_user
 from app.models.database import Tag, User
+from app.services import card_deletion
+from app.services.tag_index import card_tag_index, tag_card_counts
 from app.schemas.schemas import (
     TagCreate,
     TagResponse,
@@ -18,42 +21,28 @@ from app.schemas.schemas import (
 router = APIRouter()
 
 
-def get_default_user(db: Session) -> User:
-    """Get default user for POC (single-user assumption)."""
-    user = db.query(User).filter(User.username == "default_user").first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Default user not found. Run migrations."
-        )
-    return user
-
-
 @router.get("/", response_model=TagListResponse)
 def list_tags(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     List all tags for the user.
     
     REQ-3: Show all tags with card counts.
     """
-    user = get_default_user(db)
-    
-    # Get tags with card counts
+    # Get tags, with card counts from one GROUP BY over card_tags
     tags = db.query(Tag).filter(Tag.user_id == user.id).all()
+    counts = tag_card_counts(db, user.id)
     
     tag_responses = []
     for tag in tags:
-        # Count cards with this tag
-        card_count = len(tag.cards)
-        
         tag_responses.append(
             TagResponse(
                 id=tag.id,
                 user_id=tag.user_id,
                 name=tag.name,
-                card_count=card_count,
+                card_count=counts.get(tag.id, 0),
                 created_at=tag.created_at
             )
         )
@@ -67,15 +56,14 @@ def list_tags(
 @router.post("/", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
 def create_tag(
     tag_in: TagCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Create a new tag.
     
     REQ-3: Add tags for categorizing cards.
     """
-    user = get_default_user(db)
-    
     # Check if tag already exists for this user
     existing_tag = db.query(Tag).filter(
         Tag.user_id == user.id,
@@ -97,6 +85,7 @@ def create_tag(
     db.add(tag)
     db.commit()
     db.refresh(tag)
+    card_tag_index.invalidate(user.id)
     
     return TagResponse(
         id=tag.id,
@@ -110,15 +99,14 @@ def create_tag(
 @router.get("/{tag_id}", response_model=TagResponse)
 def get_tag(
     tag_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get a specific tag by ID.
     
     REQ-3: View tag details with card count.
     """
-    user = get_default_user(db)
-    
     tag = db.query(Tag).filter(
         Tag.id == tag_id,
         Tag.user_id == user.id
@@ -130,7 +118,7 @@ def get_tag(
             detail=f"Tag {tag_id} not found"
         )
     
-    card_count = len(tag.cards)
+    card_count = tag_card_counts(db, user.id, [tag.id]).get(tag.id, 0)
     
     return TagResponse(
         id=tag.id,
@@ -144,7 +132,8 @@ def get_tag(
 @router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_tag(
     tag_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
 ):
     """
     Delete a tag.
@@ -152,8 +141,6 @@ def delete_tag(
     REQ-3: Remove tags.
     Note: This removes the tag from all cards (cascade).
     """
-    user = get_default_user(db)
-    
     tag = db.query(Tag).filter(
         Tag.id == tag_id,
         Tag.user_id == user.id
@@ -165,8 +152,9 @@ def delete_tag(
             detail=f"Tag {tag_id} not found"
         )
     
-    # Delete tag (cascade will remove from card_tags)
-    db.delete(tag)
+    # Delete tag and its card links (not the cards)
+    card_deletion.delete_tag(db, tag.id)
     db.commit()
+    card_tag_index.invalidate(user.id)
     
     return None
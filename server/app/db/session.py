@@ -1,28 +1,185 @@
 """
 Database session management.
 Provides SQLAlchemy engine and session factory.
+
+Pool sizing, statement timeout and SQLite pragmas come from Settings
+(db_pool_*, db_statement_timeout_ms, sqlite_*); see engine_options().
+
+Session routing rules (read replica, ``settings.read_database_url``):
+- ``get_db`` always uses the primary. Every endpoint that writes (including
+  review answers and anything that creates daily counters) must use it.
+- ``get_read_db`` is for strictly read-only GET endpoints. It uses the
+  replica when one is configured, otherwise the primary.
+- Read-your-writes: for ``read_your_writes_window_s`` seconds after any
+  commit that wrote on the primary (ORM flushes and Core INSERT/UPDATE/
+  DELETE through the session alike), ``get_read_db`` falls back to the
+  primary. The last write time is kept per process, so this only covers
+  writes served by the same worker; with several workers a read can still
+  reach a lagging replica.
+
+The data layer is synchronous on purpose; there is no AsyncSession engine.
+Endpoints are plain ``def`` functions that FastAPI runs on AnyIO worker
+threads (``settings.api_threadpool_size``). Long-lived idle clients use
+/api/review/events, whose streams wait on the event loop and only borrow a
+thread to recount. An async engine would have to either wrap this sync code
+in ``AsyncSession.run_sync`` (which runs its Python work, e.g. the queue
+builder's, on the event loop thread and stalls every other request
+meanwhile) or duplicate the queue builder, scheduler and caches as native
+async code.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.pool import QueuePool
+from typing import Any, Dict, Generator, Optional
+import time
 
 from app.core.config import settings
 
+
+def is_sqlite(url: str) -> bool:
+    """True if the URL points at SQLite (any driver)."""
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    Build create_engine keyword arguments for a URL.
+
+    - Pool sizing applies only where the dialect's default pool is a
+      QueuePool; in-memory SQLite (SingletonThreadPool) rejects
+      pool_size/max_overflow.
+    - statement_timeout is a PostgreSQL server setting, passed per connection.
+    """
+    parsed = make_url(url)
+    options: Dict[str, Any] = {
+        "echo": settings.sql_echo,
+        "pool_pre_ping": True,
+    }
+
+    if issubclass(parsed.get_dialect().get_pool_class(parsed), QueuePool):
+        options["pool_size"] = settings.db_pool_size
+        options["max_overflow"] = settings.db_max_overflow
+        options["pool_recycle"] = settings.db_pool_recycle
+
+    if parsed.get_backend_name() == "postgresql" and settings.db_statement_timeout_ms > 0:
+        timeout = settings.db_statement_timeout_ms
+        options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+
+    return options
+
+
+def configure_sqlite_pragmas(target: Engine) -> None:
+    """
+    Apply connect-time SQLite pragmas to every new DBAPI connection.
+
+    WAL lets readers proceed while a writer holds the lock; busy_timeout makes
+    writers wait instead of failing immediately with "database is locked".
+    """
+    @event.listens_for(target, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+            cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        finally:
+            cursor.close()
+
+
 # Create engine
-engine = create_engine(
-    settings.database_url,
-    echo=settings.debug,
-    pool_pre_ping=True,
-)
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
+if is_sqlite(settings.database_url):
+    configure_sqlite_pragmas(engine)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional read replica (falls back to the primary when unset)
+read_engine = engine
+ReadSessionLocal = SessionLocal
+
+if settings.read_database_url:
+    read_engine = create_engine(
+        settings.read_database_url, **engine_options(settings.read_database_url)
+    )
+    if is_sqlite(settings.read_database_url):
+        configure_sqlite_pragmas(read_engine)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 # Base class for models
 Base = declarative_base()
 
 
+class SessionRouter:
+    """
+    Chooses primary or replica sessions for read-only endpoints.
+
+    Commits on the primary that actually wrote (flushed rows or executed a
+    non-SELECT statement) are timestamped; reads within window_s of the last
+    such commit in this process stay on the primary, a best-effort
+    read-your-writes that does not track replica lag.
+    """
+
+    def __init__(
+        self,
+        primary: sessionmaker,
+        replica: Optional[sessionmaker] = None,
+        window_s: float = 5.0
+    ):
+        self.primary = primary
+        self.replica = replica if replica is not None else primary
+        self.window_s = window_s
+        self.last_write_at = float("-inf")
+
+        event.listen(primary, "after_flush", self._flag_write)
+        event.listen(primary, "do_orm_execute", self._flag_statement)
+        event.listen(primary, "after_commit", self._stamp_write)
+        event.listen(primary, "after_rollback", self._clear_write)
+
+    @property
+    def has_replica(self) -> bool:
+        return self.replica is not self.primary
+
+    @staticmethod
+    def _flag_write(session: Session, flush_context) -> None:
+        session.info["wrote"] = True
+
+    @staticmethod
+    def _flag_statement(orm_execute_state) -> None:
+        # Core/bulk UPDATE, INSERT and DELETE bypass the flush
+        if not orm_execute_state.is_select:
+            orm_execute_state.session.info["wrote"] = True
+
+    def _stamp_write(self, session: Session) -> None:
+        if session.info.pop("wrote", False):
+            self.note_write()
+
+    @staticmethod
+    def _clear_write(session: Session) -> None:
+        session.info.pop("wrote", None)
+
+    def note_write(self) -> None:
+        """Record a primary write (also callable for writes made outside the ORM)."""
+        self.last_write_at = time.monotonic()
+
+    def read_session(self) -> Session:
+        """Session for a read-only request."""
+        if not self.has_replica:
+            return self.primary()
+        if time.monotonic() - self.last_write_at < self.window_s:
+            return self.primary()
+        return self.replica()
+
+
+session_router = SessionRouter(
+    SessionLocal, ReadSessionLocal, settings.read_your_writes_window_s
+)
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     Dependency for FastAPI endpoints.
@@ -33,3 +190,15 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """
+    Dependency for read-only endpoints.
+    Yields a replica session when configured (see routing rules above).
+    """
+    db = session_router.read_session()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,11 +1,15 @@
 """
 Main FastAPI application entry point.
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.api import decks, cards, tags, settings as settings_api, import_api, stats
+from app.services.data_version import data_versions
 
 # Import review API from root level (will be refactored to app.api later)
 import sys
@@ -22,8 +26,16 @@ except ImportError as e:
     print(f"   Review endpoints will not be available.")
     review_router = None
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync endpoints run on AnyIO worker threads (see app.db.session)
+    to_thread.current_default_thread_limiter().total_tokens = settings.api_threadpool_size
+    yield
+
+
 # Create FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Kotoba Dojo API",
     description="Spaced-repetition flashcard app for Japanese learning",
     version="0.1.0",
@@ -44,6 +56,27 @@ app.add_middleware(
 )
 
 
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+@app.middleware("http")
+async def track_writes(request: Request, call_next):
+    """
+    Bump the caller's data version after every successful write request,
+    which invalidates ETags of polled GETs (see app.services.data_version).
+    Failed writes (4xx/5xx) and requests that matched no route bump nothing.
+    """
+    state = request.state  # created before the endpoint stores user_id in it
+    response = await call_next(request)
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        user_id = getattr(state, "user_id", None)
+        if user_id is not None:
+            data_versions.bump(user_id)
+        elif request.scope.get("endpoint") is not None:
+            data_versions.bump_all()
+    return response
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
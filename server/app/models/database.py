@@ -39,6 +39,7 @@ class User(Base):
     settings = relationship("UserSettings", back_populates="user", uselist=False, cascade="all, delete-orphan")
     daily_counters = relationship("DailyCounter", back_populates="user", cascade="all, delete-orphan")
     daily_deck_counters = relationship("DailyDeckCounter", back_populates="user", cascade="all, delete-orphan")
+    review_rollups = relationship("ReviewDailyRollup", back_populates="user", cascade="all, delete-orphan")
 
 
 class Deck(Base):
@@ -57,6 +58,9 @@ class Deck(Base):
     new_per_day = Column(Integer, nullable=True)  # NULL means use global default
     review_per_day = Column(Integer, nullable=True)
     
+    # Optional scheduling engine override ('sm2' or 'fsrs'); NULL means use the user's default
+    scheduler_engine = Column(String(10), nullable=True)
+    
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
@@ -64,6 +68,7 @@ class Deck(Base):
     user = relationship("User", back_populates="decks")
     cards = relationship("Card", back_populates="deck", cascade="all, delete-orphan")
     daily_deck_counters = relationship("DailyDeckCounter", back_populates="deck", cascade="all, delete-orphan")
+    review_rollups = relationship("ReviewDailyRollup", back_populates="deck", cascade="all, delete-orphan")
     
     # Indexes
     __table_args__ = (
@@ -153,6 +158,10 @@ class SchedState(Base):
     learning_step = Column(Integer, default=0, nullable=False)  # Current step in learning_steps
     lapses = Column(Integer, default=0, nullable=False)  # Number of times card has lapsed
     
+    # FSRS memory state (NULL until the card is first answered under the FSRS engine)
+    stability = Column(Float, nullable=True)  # Days until recall probability falls to 90%
+    difficulty = Column(Float, nullable=True)  # 1 (easy) - 10 (hard)
+    
     # Optimistic concurrency control (REQ-4, line 466)
     version = Column(Integer, default=0, nullable=False)
     
@@ -270,6 +279,46 @@ class DailyDeckCounter(Base):
     )
 
 
+class ReviewDailyRollup(Base):
+    """
+    Pre-aggregated review history for analytics (REQ-9).
+    One row per user, deck, day and state_before; maintained incrementally
+    by the scheduler and rebuildable from review_logs
+    (see app.services.review_rollup).
+    """
+    __tablename__ = 'review_daily_rollup'
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    deck_id = Column(Integer, ForeignKey('decks.id', ondelete='CASCADE'), nullable=False, index=True)
+    date = Column(DateTime, nullable=False)  # Day of reviewed_at at 00:00
+    state_before = Column(String(20), nullable=False)
+    
+    # Counts by rating
+    again_count = Column(Integer, default=0, nullable=False)
+    good_count = Column(Integer, default=0, nullable=False)
+    easy_count = Column(Integer, default=0, nullable=False)
+    
+    # Again on a review card
+    lapse_count = Column(Integer, default=0, nullable=False)
+    
+    # Sum of ReviewLog.time_taken_ms (NULLs count as 0)
+    time_taken_ms = Column(Integer, default=0, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    user = relationship("User", back_populates="review_rollups")
+    deck = relationship("Deck", back_populates="review_rollups")
+    
+    # Indexes
+    __table_args__ = (
+        Index('ix_review_daily_rollup_key', 'user_id', 'deck_id', 'date', 'state_before', unique=True),
+        Index('ix_review_daily_rollup_user_date', 'user_id', 'date'),
+    )
+
+
 class UserSettings(Base):
     """
     User-specific settings (REQ-10, REQ-11).
@@ -301,6 +350,16 @@ class UserSettings(Base):
     review_section_limit = Column(Integer, default=30, nullable=False)  # Max review cards per session
     auto_start_sessions = Column(Boolean, default=False, nullable=False)  # Auto-start next session after completion
     
+    # Scheduling
+    load_balance_enabled = Column(Boolean, default=False, nullable=False)  # Spread review due dates (fuzz)
+    scheduler_engine = Column(String(10), default='sm2', nullable=False)  # 'sm2' or 'fsrs'
+    fsrs_weights = Column(JSON, nullable=True)  # Fitted FSRS weights (17 floats); NULL means defaults
+    fsrs_desired_retention = Column(Float, default=0.9, nullable=False)  # Target recall probability at due date
+    sm2_ef_initial = Column(Float, nullable=True)  # Fitted SM-2 parameters; NULL means the scheduler default
+    sm2_lapse_multiplier = Column(Float, nullable=True)
+    sm2_easy_bonus = Column(Float, nullable=True)
+    scheduler_fit = Column(JSON, nullable=True)  # Metrics of the last parameter optimizer run
+    
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
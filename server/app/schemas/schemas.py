@@ -3,7 +3,7 @@ Pydantic schemas for API request/response validation.
 Based on PRD requirements REQ-1, REQ-2, REQ-3.
 """
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -17,6 +17,9 @@ class DeckBase(BaseModel):
     description: Optional[str] = Field(None, description="Optional deck description")
     new_per_day: Optional[int] = Field(None, ge=0, le=1000, description="Per-deck new cards limit")
     review_per_day: Optional[int] = Field(None, ge=0, le=1000, description="Per-deck review limit")
+    scheduler_engine: Optional[str] = Field(
+        None, pattern='^(sm2|fsrs)$', description="Scheduling engine override; None uses the user's default"
+    )
 
 
 class DeckCreate(DeckBase):
@@ -30,6 +33,7 @@ class DeckUpdate(BaseModel):
     description: Optional[str] = None
     new_per_day: Optional[int] = Field(None, ge=0, le=1000)
     review_per_day: Optional[int] = Field(None, ge=0, le=1000)
+    scheduler_engine: Optional[str] = Field(None, pattern='^(sm2|fsrs)$')
 
 
 class DeckResponse(DeckBase):
@@ -153,19 +157,54 @@ class CardListResponse(BaseModel):
     has_more: bool
 
 
-class CardBrowseFilter(BaseModel):
-    """Schema for browse/search filters (REQ-8)."""
+class CardFilter(BaseModel):
+    """Card selection filters shared by browse and bulk operations (REQ-8)."""
     deck_ids: Optional[List[int]] = Field(None, description="Filter by deck IDs")
-    tag_ids: Optional[List[int]] = Field(None, description="Filter by tag IDs")
+    tag_ids: Optional[List[int]] = Field(None, description="Filter by tag IDs (any of)")
+    tag_query: Optional[str] = Field(None, max_length=500, description="Tag expression with AND/OR/NOT")
     state: Optional[str] = Field(None, description="Filter by state: new, learning, review")
     suspended: Optional[bool] = Field(None, description="Filter by suspended status")
     search: Optional[str] = Field(None, description="Search in front/back text")
+
+
+class CardBrowseFilter(CardFilter):
+    """Schema for browse/search filters (REQ-8)."""
     page: int = Field(1, ge=1, description="Page number")
     page_size: int = Field(50, ge=1, le=200, description="Items per page")
     sort_by: str = Field("created_at", description="Sort field")
     sort_order: str = Field("desc", description="Sort order: asc or desc")
 
 
+class CardBatchCreate(BaseModel):
+    """Schema for creating many cards in one request."""
+    cards: List[CardCreate] = Field(..., min_length=1, max_length=5000, description="Cards to create")
+
+
+class CardBatchResponse(BaseModel):
+    """Ids of the cards created by a batch, in request order."""
+    created: int
+    card_ids: List[int]
+
+
+class CardBulkRequest(BaseModel):
+    """Bulk operation on cards selected by card_ids or filter (exactly one)."""
+    operation: str = Field(
+        ..., pattern='^(suspend|unsuspend|move|add_tags|remove_tags|delete)$',
+        description="suspend, unsuspend, move, add_tags, remove_tags or delete"
+    )
+    card_ids: Optional[List[int]] = Field(None, description="Cards to change")
+    filter: Optional[CardFilter] = Field(None, description="Browse filter selecting the cards to change")
+    deck_id: Optional[int] = Field(None, description="Target deck (move)")
+    tag_ids: Optional[List[int]] = Field(None, description="Tags to add or remove (add_tags, remove_tags)")
+
+
+class CardBulkResponse(BaseModel):
+    """Result of a bulk card operation."""
+    operation: str
+    matched: int = Field(..., description="Cards selected")
+    affected: int = Field(..., description="Cards (or card-tag links for tag operations) changed")
+
+
 # ============================================================================
 # Scheduling Schemas (REQ-4, REQ-5)
 # ============================================================================
@@ -260,6 +299,16 @@ class UserSettingsResponse(BaseModel):
     review_section_limit: int = 30
     auto_start_sessions: bool = False
     
+    # Scheduling
+    load_balance_enabled: bool = False
+    scheduler_engine: str = 'sm2'
+    fsrs_weights: Optional[List[float]] = None
+    fsrs_desired_retention: float = 0.9
+    sm2_ef_initial: Optional[float] = None
+    sm2_lapse_multiplier: Optional[float] = None
+    sm2_easy_bonus: Optional[float] = None
+    scheduler_fit: Optional[Dict[str, Any]] = None
+    
     model_config = ConfigDict(from_attributes=True)
 
 
@@ -282,6 +331,27 @@ class UserSettingsUpdate(BaseModel):
     learning_section_limit: Optional[int] = Field(None, ge=0, le=100, description="Max learning cards per session")
     review_section_limit: Optional[int] = Field(None, ge=0, le=150, description="Max review cards per session")
     auto_start_sessions: Optional[bool] = Field(None, description="Auto-start next session after completion")
+    
+    # Scheduling
+    load_balance_enabled: Optional[bool] = Field(None, description="Spread review due dates to avoid daily spikes")
+    scheduler_engine: Optional[str] = Field(None, pattern='^(sm2|fsrs)$', description="Default scheduling engine: 'sm2' or 'fsrs'")
+    fsrs_desired_retention: Optional[float] = Field(None, ge=0.7, le=0.97, description="FSRS target recall probability at the due date")
+
+
+class OptimizerJobResponse(BaseModel):
+    """Status of a scheduler parameter optimizer run."""
+    job_id: str
+    status: str = Field(description="pending, running, done or failed")
+    result: Optional[Dict[str, Any]] = Field(None, description="Fitted parameters and fit metrics when done")
+    error: Optional[str] = None
+
+
+class DeckDeleteJobResponse(BaseModel):
+    """Status of a background deck deletion."""
+    job_id: str
+    status: str = Field(description="pending, running, done or failed")
+    result: Optional[Dict[str, int]] = Field(None, description="deck_id and cards_deleted when done")
+    error: Optional[str] = None
 
 
 # ============================================================================
@@ -0,0 +1,188 @@
+"""
+Columnar review-history analytics (REQ-9).
+
+Loads review_logs for one user into NumPy arrays with chunked Core reads
+(no ORM objects) and computes metrics with vectorized group-bys
+(np.lexsort / np.digitize / np.bincount):
+
+- forgetting_curve: success rate by days elapsed since the card's
+  previous review
+- ease_distribution: histogram of each card's latest ease factor
+- retention_by_interval: success rate by scheduled interval (interval_before)
+
+Only hot review_logs are read; months moved out by
+app.services.review_archive are not included.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.database import Card, ReviewLog
+
+RATING_CODES = {"again": 0, "good": 1, "easy": 2}
+STATE_CODES = {"new": 0, "learning": 1, "review": 2}
+
+# Bucket lower edges in days; the last bucket is open-ended
+ELAPSED_DAY_EDGES = (0, 1, 2, 3, 5, 8, 15, 31, 61, 121)
+INTERVAL_DAY_EDGES = (0, 1, 3, 7, 14, 30, 60, 120, 240)
+EASE_BIN_WIDTH = 0.1
+EASE_RANGE = (1.3, 3.0)
+
+SECONDS_PER_DAY = 86400.0
+EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass
+class ReviewColumns:
+    """One user's review history as parallel arrays (one element per review)."""
+    card_id: np.ndarray         # int64
+    deck_id: np.ndarray         # int64
+    rating: np.ndarray          # int8, RATING_CODES
+    state_before: np.ndarray    # int8, STATE_CODES (-1 for unknown)
+    interval_before: np.ndarray  # float64, days
+    ease_after: np.ndarray      # float64
+    reviewed_at: np.ndarray     # float64, seconds since epoch
+
+    def __len__(self) -> int:
+        return len(self.card_id)
+
+    @classmethod
+    def empty(cls) -> "ReviewColumns":
+        return cls(
+            card_id=np.empty(0, dtype=np.int64),
+            deck_id=np.empty(0, dtype=np.int64),
+            rating=np.empty(0, dtype=np.int8),
+            state_before=np.empty(0, dtype=np.int8),
+            interval_before=np.empty(0, dtype=np.float64),
+            ease_after=np.empty(0, dtype=np.float64),
+            reviewed_at=np.empty(0, dtype=np.float64),
+        )
+
+
+def _chunk_to_columns(rows: Sequence[tuple]) -> ReviewColumns:
+    card_id, deck_id, rating, state_before, interval_before, ease_after, reviewed_at = zip(*rows)
+    return ReviewColumns(
+        card_id=np.fromiter(card_id, dtype=np.int64, count=len(rows)),
+        deck_id=np.fromiter(deck_id, dtype=np.int64, count=len(rows)),
+        rating=np.fromiter((RATING_CODES.get(r, 0) for r in rating), dtype=np.int8, count=len(rows)),
+        state_before=np.fromiter((STATE_CODES.get(s, -1) for s in state_before), dtype=np.int8, count=len(rows)),
+        interval_before=np.fromiter(interval_before, dtype=np.float64, count=len(rows)),
+        ease_after=np.fromiter(ease_after, dtype=np.float64, count=len(rows)),
+        reviewed_at=np.fromiter(((ts - EPOCH).total_seconds() for ts in reviewed_at), dtype=np.float64, count=len(rows)),
+    )
+
+
+def load_review_columns(
+    db: Session,
+    user_id: int,
+    since: Optional[datetime] = None,
+    deck_id: Optional[int] = None,
+    chunk_size: int = 50000
+) -> ReviewColumns:
+    """
+    Read a user's review_logs into ReviewColumns, chunk_size rows at a time.
+    Rows come back ordered by (card_id, reviewed_at); the sort is done with
+    np.lexsort rather than an ORDER BY over the whole history.
+    """
+    query = select(
+        ReviewLog.card_id,
+        Card.deck_id,
+        ReviewLog.rating,
+        ReviewLog.state_before,
+        ReviewLog.interval_before,
+        ReviewLog.ease_factor_after,
+        ReviewLog.reviewed_at
+    ).join(Card, Card.id == ReviewLog.card_id).where(ReviewLog.user_id == user_id)
+    if since is not None:
+        query = query.where(ReviewLog.reviewed_at >= since)
+    if deck_id is not None:
+        query = query.where(Card.deck_id == deck_id)
+
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    chunks = [_chunk_to_columns(rows) for rows in result.partitions(chunk_size)]
+    if not chunks:
+        return ReviewColumns.empty()
+
+    fields = ReviewColumns.__dataclass_fields__
+    merged = {name: np.concatenate([getattr(chunk, name) for chunk in chunks]) for name in fields}
+    order = np.lexsort((merged["reviewed_at"], merged["card_id"]))
+    return ReviewColumns(**{name: values[order] for name, values in merged.items()})
+
+
+def _bucket_labels(edges: Sequence[float]) -> List[str]:
+    labels = []
+    for low, high in zip(edges, edges[1:]):
+        labels.append(f"{low}" if high - low == 1 else f"{low}-{high - 1}")
+    labels.append(f"{edges[-1]}+")
+    return labels
+
+
+def _success_by_bucket(values: np.ndarray, success: np.ndarray, edges: Sequence[float]) -> List[Dict]:
+    """Group reviews into [edge_i, edge_i+1) buckets and count successes per bucket."""
+    buckets = np.digitize(values, edges) - 1
+    buckets = np.clip(buckets, 0, len(edges) - 1)
+    totals = np.bincount(buckets, minlength=len(edges))
+    successes = np.bincount(buckets, weights=success, minlength=len(edges))
+
+    rows = []
+    for label, low, total, ok in zip(_bucket_labels(edges), edges, totals, successes):
+        rows.append({
+            "bucket": label,
+            "min_days": low,
+            "reviews": int(total),
+            "retention_rate": round(float(ok) / total * 100, 1) if total else 0.0
+        })
+    return rows
+
+
+def forgetting_curve(columns: ReviewColumns) -> List[Dict]:
+    """
+    Success rate of review-state answers by days since the same card's
+    previous review. Requires columns ordered by (card_id, reviewed_at).
+    """
+    if len(columns) < 2:
+        return _success_by_bucket(np.empty(0), np.empty(0), ELAPSED_DAY_EDGES)
+
+    same_card = columns.card_id[1:] == columns.card_id[:-1]
+    elapsed = np.diff(columns.reviewed_at) / SECONDS_PER_DAY
+    is_review = columns.state_before[1:] == STATE_CODES["review"]
+    mask = same_card & is_review
+
+    success = (columns.rating[1:][mask] != RATING_CODES["again"]).astype(np.float64)
+    return _success_by_bucket(elapsed[mask], success, ELAPSED_DAY_EDGES)
+
+
+def retention_by_interval(columns: ReviewColumns) -> List[Dict]:
+    """Success rate of review-state answers by the interval they were scheduled at."""
+    mask = columns.state_before == STATE_CODES["review"]
+    success = (columns.rating[mask] != RATING_CODES["again"]).astype(np.float64)
+    return _success_by_bucket(columns.interval_before[mask], success, INTERVAL_DAY_EDGES)
+
+
+def ease_distribution(columns: ReviewColumns) -> Dict:
+    """
+    Histogram of each card's latest ease factor. Requires columns ordered by
+    (card_id, reviewed_at), so a card's last row is its latest review.
+    """
+    low, high = EASE_RANGE
+    edges = np.round(np.arange(low, high + EASE_BIN_WIDTH / 2, EASE_BIN_WIDTH), 2)
+    if len(columns) == 0:
+        latest = np.empty(0)
+    else:
+        last_of_card = np.append(columns.card_id[1:] != columns.card_id[:-1], True)
+        latest = columns.ease_after[last_of_card]
+
+    counts, _ = np.histogram(np.clip(latest, low, high), bins=edges)
+    return {
+        "cards": int(len(latest)),
+        "mean": round(float(latest.mean()), 3) if len(latest) else None,
+        "median": round(float(np.median(latest)), 3) if len(latest) else None,
+        "bins": [
+            {"min_ease": float(edges[i]), "max_ease": float(edges[i + 1]), "cards": int(counts[i])}
+            for i in range(len(counts))
+        ]
+    }
@@ -0,0 +1,146 @@
+"""
+Set-based deletion of cards, decks and tags (REQ-1, REQ-2, REQ-3).
+
+db.delete() on a Deck, Card or Tag makes the ORM cascade load every child
+row (cards, sched_states, review_logs, card_tags) into the session and
+delete them one by one. These helpers issue DELETE ... WHERE statements
+instead, children first, since SQLite does not enforce the ON DELETE
+CASCADE foreign keys here.
+
+Large decks are deleted in chunks of card ids. DeletionJobs runs that in a
+background thread with a commit per chunk, so a huge deck does not hold one
+long write transaction; the deck row goes last, so the deck stays listed
+(with a shrinking card count) until the job is done.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.database import (
+    Card,
+    DailyDeckCounter,
+    Deck,
+    ReviewDailyRollup,
+    ReviewLog,
+    SchedState,
+    Tag,
+    card_tags,
+)
+from app.services.data_version import data_versions
+from app.services.job_registry import JobRegistry
+from app.services.limits_cache import limits_cache
+from app.services.load_balancer import due_histograms
+from app.services.review_rollup import remove_card_reviews
+from app.services.scheduler_engines import engine_cache
+from app.services.stats_cache import closed_days
+from app.services.tag_index import card_tag_index
+
+DELETE_CHUNK_SIZE = 1000
+
+_CARD_CHILDREN = (card_tags, SchedState.__table__, ReviewLog.__table__)
+
+
+def delete_cards(db: Session, card_ids: Iterable[int]) -> int:
+    """
+    Delete cards and their tags, scheduling states and review logs, and take
+    their reviews out of the daily rollup. Does not commit; invalidate the
+    user's closed_days after committing.
+    """
+    card_ids = list(card_ids)
+    if not card_ids:
+        return 0
+    # Inlined: the list can exceed bind parameter limits
+    selected = bindparam("card_ids", card_ids, expanding=True, literal_execute=True)
+    remove_card_reviews(db, card_ids)
+    for table in _CARD_CHILDREN:
+        db.execute(table.delete().where(table.c.card_id.in_(selected)))
+    return db.execute(
+        delete(Card).where(Card.id.in_(selected)).execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def delete_deck(
+    db: Session,
+    deck_id: int,
+    chunk_size: int = DELETE_CHUNK_SIZE,
+    commit_chunks: bool = False,
+    user_id: Optional[int] = None
+) -> int:
+    """
+    Delete a deck, its cards (chunk_size at a time) and its counters.
+
+    With commit_chunks every chunk is committed (and user_id's caches
+    invalidated) as it goes; otherwise nothing is committed.
+
+    Returns:
+        Number of cards deleted
+    """
+    deleted = 0
+    while True:
+        chunk = db.scalars(select(Card.id).where(Card.deck_id == deck_id).limit(chunk_size)).all()
+        if not chunk:
+            break
+        deleted += delete_cards(db, chunk)
+        if commit_chunks:
+            db.commit()
+            due_histograms.invalidate(user_id)
+            card_tag_index.invalidate(user_id)
+            closed_days.invalidate(user_id)
+            data_versions.bump(user_id)
+
+    # Rollup rows left here only count archived reviews of the deck's cards
+    for model in (DailyDeckCounter, ReviewDailyRollup):
+        db.execute(delete(model).where(model.deck_id == deck_id))
+    db.execute(delete(Deck).where(Deck.id == deck_id).execution_options(synchronize_session=False))
+    if commit_chunks:
+        db.commit()
+    return deleted
+
+
+def delete_tag(db: Session, tag_id: int) -> None:
+    """Delete a tag and its card links (not the cards). Does not commit."""
+    db.execute(card_tags.delete().where(card_tags.c.tag_id == tag_id))
+    db.execute(delete(Tag).where(Tag.id == tag_id).execution_options(synchronize_session=False))
+
+
+def invalidate_deck_caches(user_id: int) -> None:
+    """Drop cached state that a deck deletion outdates (call after committing)."""
+    limits_cache.invalidate_decks(user_id)
+    engine_cache.invalidate(user_id)
+    due_histograms.invalidate(user_id)
+    card_tag_index.invalidate(user_id)
+    closed_days.invalidate(user_id)
+    data_versions.bump(user_id)
+
+
+def run_deck_deletion(
+    bind: Engine,
+    user_id: int,
+    deck_id: int,
+    chunk_size: int = DELETE_CHUNK_SIZE
+) -> Dict[str, int]:
+    """Job body: delete a deck with its own session, committing per chunk."""
+    with Session(bind=bind) as db:
+        try:
+            cards = delete_deck(db, deck_id, chunk_size, commit_chunks=True, user_id=user_id)
+        finally:
+            invalidate_deck_caches(user_id)
+    return {"deck_id": deck_id, "cards_deleted": cards}
+
+
+class DeletionJobs(JobRegistry):
+    """Deck deletions submitted by the API, run one at a time in a background thread."""
+
+    def _create_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="deck-delete")
+
+    def submit(self, bind: Engine, user_id: int, deck_id: int, **options) -> str:
+        """Queue a deck deletion; a deck already queued returns its existing job."""
+        return self._submit(user_id, partial(run_deck_deletion, bind, user_id, deck_id, **options), key=deck_id)
+
+
+deletion_jobs = DeletionJobs()
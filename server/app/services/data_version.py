@@ -0,0 +1,69 @@
+"""
+Per-user data versions for ETags and conditional GETs.
+
+Every write bumps the writing user's version:
+
+- app.main's middleware bumps after any POST/PUT/PATCH/DELETE request, for
+  the user get_current_user resolved (or for everyone when the endpoint
+  resolved none, e.g. the prebuilt import).
+- Writes made outside a request (background deck deletion, optimizer jobs)
+  call bump() themselves after committing.
+
+Polled GET endpoints derive a weak ETag from the version (see
+app.api.deps.conditional_get), so a matching If-None-Match is answered with
+304 from memory. Readers snapshot the version *before* loading data and
+writers bump *after* committing, so an ETag can be older than its data but
+never newer.
+
+Versions live in process, like the other caches; a random epoch per process
+keeps ETags from a previous run from matching after a restart. Watchers
+(see watch()) are told about every bump, e.g. to push live queue counts.
+"""
+import uuid
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+
+class DataVersions:
+    """Monotonic per-user write counters."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._versions: Dict[int, int] = {}
+        self._global = 0
+        self.epoch = uuid.uuid4().hex[:8]
+        self._watchers: List[Callable[[Optional[int]], None]] = []
+
+    def version(self, user_id: int) -> int:
+        """Current version of a user's data (includes bump_all calls)."""
+        return self._global + self._versions.get(user_id, 0)
+
+    def bump(self, user_id: int) -> None:
+        """Record a committed write for one user."""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        self._notify(user_id)
+
+    def bump_all(self) -> None:
+        """Record a committed write that may touch any user."""
+        with self._lock:
+            self._global += 1
+        self._notify(None)
+
+    def watch(self, callback: Callable[[Optional[int]], None]) -> None:
+        """Call callback(user_id) after every bump (None for bump_all), from the bumping thread."""
+        self._watchers.append(callback)
+
+    def _notify(self, user_id: Optional[int]) -> None:
+        for callback in self._watchers:
+            callback(user_id)
+
+    def clear(self) -> None:
+        """Forget all versions (e.g. when the database is recreated)."""
+        with self._lock:
+            self._versions.clear()
+            self._global = 0
+            self.epoch = uuid.uuid4().hex[:8]
+
+
+data_versions = DataVersions()
@@ -0,0 +1,342 @@
+"""
+Review workload forecast (REQ-9).
+
+Projects how many reviews a user will have due per day over the next
+30-365 days. The user's non-suspended cards are loaded into NumPy arrays
+and the SM-2 rules from the root-level scheduler module (intervals, EF
+bounds) with the user's SM-2 parameters (initial EF, easy bonus, lapse
+multiplier) are applied in a vectorized Monte Carlo: ratings are drawn
+from the user's recent rating mix (review_daily_rollup). Cards without a
+SchedState count as new, like in the review queue.
+
+Only SM-2 cards are simulated: cards of decks scheduled by FSRS are left
+out and reported as excluded_fsrs_cards.
+
+Only learning and review cards due inside the horizon are loaded (cards
+due later cannot add reviews to it); new cards are only counted. Due dates
+come back as SQL dates and each distinct day is parsed once.
+
+The simulation advances in review rounds rather than days: every card that
+still falls inside the horizon is reviewed once per round, so the work is
+proportional to the number of simulated reviews (a handful per card), not
+cards x days. Due counts per (simulation, day) are tallied with np.bincount.
+"""
+import os
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Collection, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.database import Card, Deck, ReviewDailyRollup, SchedState
+from app.services.scheduler_engines import UserEngines, get_user_engines
+
+# Add root directory to path to import the scheduler module
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+import scheduler  # noqa: E402
+
+MIN_HORIZON_DAYS = 30
+MAX_HORIZON_DAYS = 365
+DEFAULT_SIMULATIONS = 8
+
+# Rating mix used until the user has enough history of their own
+DEFAULT_REVIEW_PROBS = (0.10, 0.75, 0.15)  # again, good, easy
+DEFAULT_NEW_EASY_PROB = 0.15
+MIN_HISTORY_REVIEWS = 20
+HISTORY_DAYS = 90
+
+
+@dataclass
+class RatingMix:
+    """Probabilities used to draw simulated ratings."""
+    review: tuple  # (again, good, easy) for review-state cards
+    new_easy: float  # share of Easy among successful first answers
+
+
+@dataclass
+class CardArrays:
+    """Learning and review cards due inside the horizon as parallel arrays, plus the new cards."""
+    due_day: np.ndarray  # int32 days from today (overdue clipped to 0)
+    interval: np.ndarray  # float32 days
+    ease: np.ndarray  # float32
+    is_learning: np.ndarray  # bool
+    new_cards: int = 0
+
+
+def count_cards(db: Session, user_id: int, exclude_deck_ids: Collection[int] = ()) -> Tuple[int, int]:
+    """(active cards, new cards among them); cards without a SchedState are new."""
+    is_new = or_(SchedState.state.is_(None), SchedState.state == "new")
+    query = select(func.count(Card.id), func.count(case((is_new, 1)))).select_from(Card).outerjoin(
+        SchedState, SchedState.card_id == Card.id
+    ).where(
+        Card.user_id == user_id,
+        Card.suspended == False  # noqa: E712
+    )
+    if exclude_deck_ids:
+        query = query.where(Card.deck_id.notin_(exclude_deck_ids))
+    total, new = db.execute(query).one()
+    return int(total or 0), int(new or 0)
+
+
+def load_card_arrays(
+    db: Session,
+    user_id: int,
+    today_start: datetime,
+    horizon_days: int,
+    new_cards: int = 0,
+    chunk_size: int = 50000,
+    exclude_deck_ids: Collection[int] = ()
+) -> CardArrays:
+    """Read learning/review cards due before the horizon ends, in chunks."""
+    day_col = func.date(SchedState.due_at)
+    query = select(
+        SchedState.state,
+        day_col,
+        SchedState.interval_days,
+        SchedState.ease_factor
+    ).join(Card, Card.id == SchedState.card_id).where(
+        Card.user_id == user_id,
+        SchedState.state.in_(["learning", "review"]),
+        SchedState.due_at < today_start + timedelta(days=horizon_days),
+        Card.suspended == False  # noqa: E712
+    )
+    if exclude_deck_ids:
+        query = query.where(Card.deck_id.notin_(exclude_deck_ids))
+
+    today = today_start.date()
+    chunks = []
+    # Plain rows: the Core connection skips the ORM's per-row loading
+    result = db.connection().execute(query.execution_options(yield_per=chunk_size))
+    for rows in result.partitions(chunk_size):
+        state, day, interval, ease = zip(*rows)
+        count = len(rows)
+        # SQLite returns 'YYYY-MM-DD' strings, PostgreSQL returns dates
+        offsets = {d: (date.fromisoformat(str(d)[:10]) - today).days for d in set(day)}
+        chunks.append((
+            np.array(state, dtype=object) == "learning",
+            np.fromiter((offsets[d] for d in day), dtype=np.int32, count=count),
+            np.fromiter(interval, dtype=np.float32, count=count),
+            np.fromiter(ease, dtype=np.float32, count=count),
+        ))
+
+    if chunks:
+        is_learning, due_days, intervals, eases = (np.concatenate(parts) for parts in zip(*chunks))
+    else:
+        is_learning = np.empty(0, dtype=bool)
+        due_days = np.empty(0, dtype=np.int32)
+        intervals = np.empty(0, dtype=np.float32)
+        eases = np.empty(0, dtype=np.float32)
+
+    return CardArrays(
+        due_day=np.maximum(due_days, 0).astype(np.int32),
+        interval=intervals,
+        ease=eases,
+        is_learning=is_learning.astype(bool),
+        new_cards=new_cards,
+    )
+
+
+def fsrs_deck_ids(db: Session, user_id: int, engines: UserEngines) -> List[int]:
+    """The user's decks scheduled by FSRS (override, or the user's default)."""
+    if engines.default_name != "fsrs":
+        return sorted(deck_id for deck_id, name in engines.overrides.items() if name == "fsrs")
+    deck_ids = [row[0] for row in db.query(Deck.id).filter(Deck.user_id == user_id)]
+    return [deck_id for deck_id in deck_ids if engines.overrides.get(deck_id, "fsrs") == "fsrs"]
+
+
+def count_active_cards(db: Session, user_id: int, deck_ids: Collection[int]) -> int:
+    """Non-suspended cards in the given decks."""
+    return db.query(func.count(Card.id)).filter(
+        Card.user_id == user_id,
+        Card.deck_id.in_(deck_ids),
+        Card.suspended == False  # noqa: E712
+    ).scalar() or 0
+
+
+def load_rating_mix(db: Session, user_id: int, now: datetime) -> RatingMix:
+    """Rating probabilities from the last HISTORY_DAYS of the daily rollup."""
+    since = now - timedelta(days=HISTORY_DAYS)
+    rows = db.query(
+        ReviewDailyRollup.state_before,
+        func.sum(ReviewDailyRollup.again_count),
+        func.sum(ReviewDailyRollup.good_count),
+        func.sum(ReviewDailyRollup.easy_count)
+    ).filter(
+        ReviewDailyRollup.user_id == user_id,
+        ReviewDailyRollup.date >= since
+    ).group_by(ReviewDailyRollup.state_before).all()
+    counts = {state: (int(a or 0), int(g or 0), int(e or 0)) for state, a, g, e in rows}
+
+    review_probs = DEFAULT_REVIEW_PROBS
+    again, good, easy = counts.get("review", (0, 0, 0))
+    if again + good + easy >= MIN_HISTORY_REVIEWS:
+        total = again + good + easy
+        review_probs = (again / total, good / total, easy / total)
+
+    new_easy = DEFAULT_NEW_EASY_PROB
+    _, good, easy = counts.get("new", (0, 0, 0))
+    if good + easy >= MIN_HISTORY_REVIEWS:
+        new_easy = easy / (good + easy)
+
+    return RatingMix(review=review_probs, new_easy=new_easy)
+
+
+def simulate(
+    cards: CardArrays,
+    mix: RatingMix,
+    horizon_days: int,
+    new_per_day: int,
+    simulations: int = DEFAULT_SIMULATIONS,
+    seed: Optional[int] = None,
+    params: "scheduler.SM2Params" = scheduler.DEFAULT_SM2_PARAMS
+) -> Dict[str, np.ndarray]:
+    """
+    Run the Monte Carlo with the given SM-2 parameters and return per-day
+    arrays: review_counts (simulations x horizon) and new_counts (horizon).
+    """
+    rng = np.random.default_rng(seed)
+    horizon = int(horizon_days)
+
+    # New cards are introduced new_per_day at a time
+    introduced = min(cards.new_cards, max(new_per_day, 0) * horizon)
+    new_intro_day = (np.arange(introduced) // max(new_per_day, 1)).astype(np.int32)
+    new_counts = np.bincount(new_intro_day, minlength=horizon)[:horizon]
+
+    # Legacy learning cards are answered once on their due day and graduate
+    # to review at I1 (again only repeats them within the same day)
+    learning = cards.is_learning
+    learning_counts = np.bincount(cards.due_day[learning], minlength=horizon)[:horizon]
+    review = ~learning
+
+    # Review cards, graduated learning cards and introduced new cards (which
+    # get their first answer on the introduction day and come back after I1)
+    first_interval = int(scheduler.REVIEW_INTERVAL_1)
+    base_due = np.concatenate([
+        cards.due_day[review],
+        cards.due_day[learning] + first_interval,
+        new_intro_day + first_interval
+    ])
+    base_interval = np.concatenate([
+        cards.interval[review],
+        np.full(int(learning.sum()) + introduced, scheduler.REVIEW_INTERVAL_1, dtype=np.float32)
+    ])
+    base_ease = np.concatenate([
+        cards.ease[review],
+        cards.ease[learning],
+        np.full(introduced, params.ef_initial, dtype=np.float32)
+    ])
+    base_new = np.concatenate([np.zeros(int(review.sum() + learning.sum()), dtype=bool), np.ones(introduced, dtype=bool)])
+
+    n = len(base_due)
+    sim = np.repeat(np.arange(simulations, dtype=np.int32), n)
+    due = np.tile(base_due, simulations).astype(np.int32)
+    interval = np.tile(base_interval, simulations)
+    ease = np.tile(base_ease, simulations)
+
+    # First answer of introduced cards: Easy raises EF (interval stays I1)
+    first = np.tile(base_new, simulations)
+    easy_first = first & (rng.random(len(first)) < mix.new_easy)
+    ease[easy_first] = np.minimum(scheduler.EF_MAX, ease[easy_first] + 0.15)
+
+    review_counts = np.zeros(simulations * horizon, dtype=np.int64)
+    p_again, p_good, _ = mix.review
+    active = due < horizon
+    sim, due, interval, ease = sim[active], due[active], interval[active], ease[active]
+
+    while len(due):
+        review_counts += np.bincount(sim * horizon + due, minlength=simulations * horizon)
+
+        draw = rng.random(len(due))
+        again = draw < p_again
+        easy = draw >= p_again + p_good
+        young = interval < scheduler.REVIEW_INTERVAL_6
+
+        next_interval = np.where(young, scheduler.REVIEW_INTERVAL_6, np.round(interval * ease))
+        easy_interval = np.where(
+            young,
+            np.round(scheduler.REVIEW_INTERVAL_6 * params.easy_bonus),
+            np.round(interval * ease * params.easy_bonus)
+        )
+        lapse_interval = np.maximum(1.0, np.round(interval * params.lapse_multiplier))
+        next_interval = np.where(easy, easy_interval, next_interval)
+        next_interval = np.where(again, lapse_interval, next_interval).astype(np.float32)
+
+        ease = np.where(again, np.maximum(scheduler.EF_MIN, ease - 0.2), ease)
+        ease = np.where(easy, np.minimum(scheduler.EF_MAX, ease + 0.15), ease).astype(np.float32)
+
+        due = due + np.maximum(next_interval, 1).astype(np.int32)
+        interval = next_interval
+
+        active = due < horizon
+        sim, due, interval, ease = sim[active], due[active], interval[active], ease[active]
+
+    return {
+        "review_counts": review_counts.reshape(simulations, horizon) + learning_counts,
+        "new_counts": new_counts,
+    }
+
+
+def forecast(
+    db: Session,
+    user_id: int,
+    days: int,
+    new_per_day: int,
+    simulations: int = DEFAULT_SIMULATIONS,
+    now: Optional[datetime] = None,
+    seed: Optional[int] = None
+) -> Dict:
+    """
+    Forecast daily review load. `days` is clamped to [30, 365].
+
+    Returns:
+        Dict with the rating mix used and one entry per day
+        (expected reviews, 10th/90th percentile, new cards introduced)
+    """
+    if now is None:
+        now = datetime.utcnow()
+    horizon = min(max(int(days), MIN_HORIZON_DAYS), MAX_HORIZON_DAYS)
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    engines = get_user_engines(db, user_id)
+    fsrs_decks = fsrs_deck_ids(db, user_id, engines)
+    total_cards, new_cards = count_cards(db, user_id, fsrs_decks)
+    cards = load_card_arrays(db, user_id, today_start, horizon, new_cards, exclude_deck_ids=fsrs_decks)
+    excluded = count_active_cards(db, user_id, fsrs_decks) if fsrs_decks else 0
+    mix = load_rating_mix(db, user_id, now)
+    params = engines.by_name["sm2"].params
+    result = simulate(cards, mix, horizon, new_per_day, simulations, seed, params)
+
+    reviews = result["review_counts"]
+    expected = reviews.mean(axis=0)
+    low, high = np.percentile(reviews, [10, 90], axis=0)
+
+    daily = [
+        {
+            "date": (today_start + timedelta(days=day)).strftime("%Y-%m-%d"),
+            "expected_reviews": round(float(expected[day]), 1),
+            "reviews_low": int(low[day]),
+            "reviews_high": int(np.ceil(high[day])),
+            "new_cards": int(result["new_counts"][day])
+        }
+        for day in range(horizon)
+    ]
+    return {
+        "days": horizon,
+        "new_per_day": new_per_day,
+        "simulations": simulations,
+        "total_cards": total_cards,
+        "excluded_fsrs_cards": int(excluded),
+        "rating_mix": {
+            "again": round(mix.review[0], 3),
+            "good": round(mix.review[1], 3),
+            "easy": round(mix.review[2], 3)
+        },
+        "total_expected_reviews": round(float(expected.sum()), 1),
+        "daily": daily
+    }
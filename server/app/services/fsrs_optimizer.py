@@ -0,0 +1,278 @@
+"""
+FSRS weight optimizer (REQ-4).
+
+Fits a user's FSRS weights (app.services.scheduler_engines) to their review
+history so predicted recall matches what actually happened.
+
+The history is loaded with app.services.analytics.load_review_columns and
+laid out as a (cards x reviews) grid. Training replays the FSRS memory-state
+recurrence one review column at a time across all cards and scores each
+review-state answer (>= 1 day after the previous review) with the
+log-loss of the predicted recall probability. Gradients are central finite
+differences, but every perturbed weight vector is evaluated in the same
+replay (a (2*17+1) x cards array), so one Adam step costs one vectorized
+pass over the history.
+
+Only cards whose first loaded review was as a new card are used (archived
+months cut card histories short).
+
+Command line (from server/):
+    python -m app.services.fsrs_optimizer --user-id N [--iterations N] [--dry-run]
+"""
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.database import UserSettings
+from app.services.analytics import RATING_CODES, SECONDS_PER_DAY, STATE_CODES, load_review_columns
+from app.services.scheduler_engines import (
+    FSRS_DEFAULT_WEIGHTS,
+    FSRS_WEIGHT_BOUNDS,
+    GRADES,
+    engine_cache,
+    fsrs_init_difficulty,
+    fsrs_init_stability,
+    fsrs_retrievability,
+    fsrs_review,
+)
+
+MIN_TRAINING_REVIEWS = 100
+MAX_REVIEWS_PER_CARD = 64
+DEFAULT_ITERATIONS = 200
+LEARNING_RATE = 0.04
+TOLERANCE = 1e-5
+PATIENCE = 10
+
+# analytics rating code -> FSRS grade
+_GRADE_BY_CODE = np.zeros(len(RATING_CODES), dtype=np.int64)
+for _rating, _code in RATING_CODES.items():
+    _GRADE_BY_CODE[_code] = GRADES[_rating]
+
+
+@dataclass
+class TrainingData:
+    """Review histories as a (cards x reviews) grid."""
+    grades: np.ndarray  # int64 FSRS grades
+    elapsed: np.ndarray  # float64 whole days since the card's previous review
+    valid: np.ndarray  # bool, False for padding
+
+    @property
+    def scored_reviews(self) -> int:
+        """Reviews that contribute to the loss."""
+        return int((self.valid[:, 1:] & (self.elapsed[:, 1:] >= 1)).sum())
+
+
+@dataclass
+class FitResult:
+    """Outcome of one optimizer run."""
+    weights: List[float]
+    initial_loss: float
+    final_loss: float
+    iterations: int
+    converged: bool
+    reviews: int
+    cards: int
+    fit_seconds: float
+
+
+def build_training_data(
+    card_id: np.ndarray,
+    rating: np.ndarray,
+    state_before: np.ndarray,
+    reviewed_at: np.ndarray,
+    max_reviews: int = MAX_REVIEWS_PER_CARD
+) -> TrainingData:
+    """
+    Lay out review rows ordered by (card_id, reviewed_at) as a grid, keeping
+    the first max_reviews reviews of cards whose history starts as new.
+    """
+    if len(card_id) == 0:
+        empty = np.empty((0, max_reviews))
+        return TrainingData(empty.astype(np.int64), empty, empty.astype(bool))
+
+    _, starts, inverse = np.unique(card_id, return_index=True, return_inverse=True)
+    position = np.arange(len(card_id)) - starts[inverse]
+    keep = (state_before[starts] == STATE_CODES["new"])[inverse] & (position < max_reviews)
+
+    previous = np.concatenate([[0.0], reviewed_at[:-1]])
+    elapsed = np.where(position > 0, np.floor((reviewed_at - previous) / SECONDS_PER_DAY), 0.0)
+
+    # Renumber the kept cards 0..n-1
+    kept_cards, row = np.unique(inverse[keep], return_inverse=True)
+    shape = (len(kept_cards), int(position[keep].max()) + 1 if keep.any() else 1)
+    grades = np.ones(shape, dtype=np.int64)
+    elapsed_grid = np.zeros(shape)
+    valid = np.zeros(shape, dtype=bool)
+    grades[row, position[keep]] = _GRADE_BY_CODE[rating[keep]]
+    elapsed_grid[row, position[keep]] = elapsed[keep]
+    valid[row, position[keep]] = True
+    return TrainingData(grades, elapsed_grid, valid)
+
+
+def load_training_data(
+    db: Session,
+    user_id: int,
+    since: Optional[datetime] = None,
+    max_reviews: int = MAX_REVIEWS_PER_CARD
+) -> TrainingData:
+    """Load a user's review history as TrainingData."""
+    columns = load_review_columns(db, user_id, since=since)
+    return build_training_data(
+        columns.card_id, columns.rating, columns.state_before, columns.reviewed_at, max_reviews
+    )
+
+
+def batch_loss(weight_sets: np.ndarray, data: TrainingData) -> np.ndarray:
+    """
+    Mean log-loss of each weight vector (rows of weight_sets) over the data.
+
+    Returns:
+        Array with one loss per weight vector
+    """
+    # w[i] has shape (sets, 1) and broadcasts against (cards,) arrays
+    w = weight_sets.T[:, :, None]
+    sets = weight_sets.shape[0]
+    cards = data.grades.shape[0]
+
+    stability = np.broadcast_to(fsrs_init_stability(data.grades[:, 0], w), (sets, cards))
+    difficulty = np.broadcast_to(fsrs_init_difficulty(data.grades[:, 0], w), (sets, cards))
+    total = np.zeros(sets)
+    count = 0
+
+    for column in range(1, data.grades.shape[1]):
+        scored = data.valid[:, column] & (data.elapsed[:, column] >= 1)
+        if not scored.any():
+            if not data.valid[:, column].any():
+                break
+            continue
+        elapsed = data.elapsed[:, column]
+        grade = data.grades[:, column]
+
+        r = np.clip(fsrs_retrievability(elapsed, stability), 1e-6, 1 - 1e-6)
+        recalled = grade > 1
+        log_loss = -np.where(recalled, np.log(r), np.log(1.0 - r))
+        total += log_loss[:, scored].sum(axis=1)
+        count += int(scored.sum())
+
+        # Same-day reviews leave the memory state unchanged
+        new_stability, new_difficulty = fsrs_review(stability, difficulty, elapsed, grade, w)
+        stability = np.where(scored, new_stability, stability)
+        difficulty = np.where(scored, new_difficulty, difficulty)
+
+    return total / max(count, 1)
+
+
+def fit_weights(
+    data: TrainingData,
+    initial: Optional[List[float]] = None,
+    iterations: int = DEFAULT_ITERATIONS,
+    learning_rate: float = LEARNING_RATE
+) -> FitResult:
+    """Fit FSRS weights with Adam on finite-difference gradients."""
+    started = time.perf_counter()
+    lower, upper = (np.array(bound) for bound in zip(*FSRS_WEIGHT_BOUNDS))
+    weights = np.clip(np.asarray(initial or FSRS_DEFAULT_WEIGHTS, dtype=np.float64), lower, upper)
+    size = len(weights)
+
+    step = 1e-4 * (1.0 + np.abs(weights))
+    first_moment = np.zeros(size)
+    second_moment = np.zeros(size)
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+
+    initial_loss = best_loss = float(batch_loss(weights[None, :], data)[0])
+    best = weights.copy()
+    stalled = 0
+    converged = False
+    iteration = 0
+
+    for iteration in range(1, iterations + 1):
+        # Row 0: current weights; rows 1..2n: +/- step on each weight
+        offsets = np.diag(step)
+        weight_sets = np.vstack([weights, weights + offsets, weights - offsets])
+        losses = batch_loss(weight_sets, data)
+        current = float(losses[0])
+        gradient = (losses[1:size + 1] - losses[size + 1:]) / (2 * step)
+
+        if current < best_loss - TOLERANCE:
+            best_loss, best = current, weights.copy()
+            stalled = 0
+        else:
+            stalled += 1
+            if stalled >= PATIENCE:
+                converged = True
+                break
+
+        first_moment = beta1 * first_moment + (1 - beta1) * gradient
+        second_moment = beta2 * second_moment + (1 - beta2) * gradient ** 2
+        corrected_first = first_moment / (1 - beta1 ** iteration)
+        corrected_second = second_moment / (1 - beta2 ** iteration)
+        weights = np.clip(
+            weights - learning_rate * corrected_first / (np.sqrt(corrected_second) + epsilon),
+            lower, upper
+        )
+
+    final_loss = float(batch_loss(weights[None, :], data)[0])
+    if final_loss < best_loss:
+        best_loss, best = final_loss, weights
+
+    return FitResult(
+        weights=[round(float(value), 4) for value in best],
+        initial_loss=round(initial_loss, 5),
+        final_loss=round(best_loss, 5),
+        iterations=iteration,
+        converged=converged,
+        reviews=data.scored_reviews,
+        cards=int(data.grades.shape[0]),
+        fit_seconds=round(time.perf_counter() - started, 3),
+    )
+
+
+def optimize_user(
+    db: Session,
+    user_id: int,
+    iterations: int = DEFAULT_ITERATIONS,
+    save: bool = True
+) -> Optional[FitResult]:
+    """
+    Fit and (if save) store UserSettings.fsrs_weights for one user. Commits.
+    Returns None when there are fewer than MIN_TRAINING_REVIEWS scored reviews.
+    """
+    data = load_training_data(db, user_id)
+    if data.scored_reviews < MIN_TRAINING_REVIEWS:
+        return None
+
+    settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
+    result = fit_weights(data, initial=settings.fsrs_weights if settings else None, iterations=iterations)
+    if save and settings is not None:
+        settings.fsrs_weights = result.weights
+        db.commit()
+        engine_cache.invalidate(user_id)
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Fit FSRS weights from review history")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--dry-run", action="store_true", help="Fit without saving")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        fit = optimize_user(session, args.user_id, args.iterations, save=not args.dry_run)
+        if fit is None:
+            print(f"Not enough review history (need {MIN_TRAINING_REVIEWS} reviews)")
+        else:
+            print(f"✓ Log-loss {fit.initial_loss} -> {fit.final_loss} over {fit.reviews} reviews "
+                  f"({fit.iterations} iterations, {fit.fit_seconds}s)")
+            print(f"  weights: {fit.weights}")
+    finally:
+        session.close()
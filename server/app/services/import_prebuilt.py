@@ -7,6 +7,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from app.models.database import User, Deck, Card, Tag, SchedState, card_tags
 from app.db.seed_data import get_all_sample_data
+from app.services.tag_index import card_tag_index
 
 
 def import_prebuilt_decks(db: Session, user_id: int = 1) -> dict:
@@ -154,6 +155,7 @@ def import_prebuilt_decks(db: Session, user_id: int = 1) -> dict:
         total_cards += cards_count
     
     db.commit()
+    card_tag_index.invalidate(user_id)
     
     new_decks_count = sum(1 for d in imported_decks if not d.get("exists", False))
     
@@ -0,0 +1,124 @@
+"""
+Registry of background jobs submitted by the API.
+
+Jobs run on a lazily created executor and are looked up by a short random
+id; only the user who submitted a job can see its status. A job can carry a
+key (e.g. a deck id) so that resubmitting while it is still unfinished
+returns the existing job.
+
+A job counts as done only once its on_done callback has run, so a client
+that sees "done" also sees the callback's effects (e.g. invalidated caches
+in this process). Finished jobs are kept for ttl_seconds so clients can
+poll their result, then evicted on the next submit or status call.
+"""
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable, Optional
+
+JOB_TTL_SECONDS = 3600
+
+
+@dataclass
+class Job:
+    """A submitted job and its owner."""
+    user_id: int
+    future: Future
+    key: Optional[Hashable] = None
+    finished_at: Optional[float] = None
+    settled: Event = field(default_factory=Event)  # set after on_done ran
+
+
+class JobRegistry(ABC):
+    """Background jobs by id; subclasses supply the executor."""
+
+    def __init__(self, ttl_seconds: float = JOB_TTL_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._executor: Optional[Executor] = None
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[Hashable, str] = {}
+
+    @abstractmethod
+    def _create_executor(self) -> Executor:
+        """Executor for this registry's jobs, created on the first submit."""
+
+    def _shutdown_executor(self, executor: Executor) -> None:
+        executor.shutdown(wait=True)
+
+    def _submit(
+        self,
+        user_id: int,
+        task: Callable[[], Any],
+        key: Optional[Hashable] = None,
+        on_done: Optional[Callable[[Future], None]] = None
+    ) -> str:
+        """Run task on the executor; an unfinished job with the same key is returned instead."""
+        with self._lock:
+            self._prune()
+            if key is not None:
+                job_id = self._by_key.get(key)
+                if job_id is not None and not self._jobs[job_id].settled.is_set():
+                    return job_id
+            if self._executor is None:
+                self._executor = self._create_executor()
+            job_id = uuid.uuid4().hex[:16]
+            future = self._executor.submit(task)
+            job = Job(user_id, future, key)
+            self._jobs[job_id] = job
+            if key is not None:
+                self._by_key[key] = job_id
+        future.add_done_callback(lambda done: self._settle(job, done, on_done))
+        return job_id
+
+    def _settle(self, job: Job, future: Future, on_done: Optional[Callable[[Future], None]]) -> None:
+        try:
+            if on_done is not None:
+                on_done(future)
+        finally:
+            job.finished_at = self._clock()
+            job.settled.set()
+
+    def _prune(self) -> None:
+        """Evict jobs finished more than ttl_seconds ago (lock held)."""
+        cutoff = self._clock() - self.ttl_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at <= cutoff]:
+            job = self._jobs.pop(job_id)
+            if job.key is not None and self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def status(self, job_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+        """Job status for its owner (None if unknown or evicted)."""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        future = job.future
+        if not job.settled.is_set():
+            return {"job_id": job_id, "status": "running" if future.running() or future.done() else "pending"}
+        error = future.exception()
+        if error is not None:
+            return {"job_id": job_id, "status": "failed", "error": str(error)}
+        return {"job_id": job_id, "status": "done", "result": future.result()}
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> None:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.future.exception(timeout=timeout)
+            job.settled.wait(timeout)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._shutdown_executor(self._executor)
+                self._executor = None
@@ -0,0 +1,167 @@
+"""
+Per-user cache of daily limit configuration (REQ-6), and the versioned
+per-user cache base shared by the in-process caches.
+
+Global limits come from UserSettings and per-deck overrides from Deck; both
+change rarely but are read on every session build, /stats call and answer.
+
+Write paths (PUT /api/settings, deck update/delete) must call the matching
+invalidate_* method after committing. Each user has a version stamp that
+invalidation bumps; loaders snapshot the version *before* querying and
+store drops the result if the version moved meanwhile, so a read that raced
+a write can never repopulate the cache with stale rows.
+
+These caches live in each worker process, and invalidation only reaches
+the process that handled the write. A user's entries therefore also
+expire cache_ttl_s seconds after they were loaded (settings.cache_ttl_s).
+With one worker, invalidation alone keeps them exact. With several
+workers, or with writes from the command line (optimizers, imports, rollup
+rebuilds), another process can serve stale limits, histograms, engines or
+stats for up to cache_ttl_s.
+"""
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+SETTINGS = "settings"
+DECKS = "decks"
+
+# (new_per_day, review_per_day) as stored on Deck; None means "use global"
+DeckLimitRow = Tuple[Optional[int], Optional[int]]
+
+
+class VersionedUserCache:
+    """
+    Entries guarded by per-user version stamps (see the module docstring).
+
+    Entries are keyed by user id; subclasses with several entries per user
+    override _owner() to map a key to its user, and _put()/_drop() to store
+    and remove entries. Hooks run with the lock held; subclasses that read
+    _entries directly call _expire() first.
+    """
+
+    def __init__(self, ttl_s: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.ttl_s = settings.cache_ttl_s if ttl_s is None else ttl_s
+        self._clock = clock
+        self._lock = Lock()
+        self._versions: Dict[int, int] = {}
+        self._entries: Dict[Hashable, Any] = {}
+        self._loaded_at: Dict[int, float] = {}
+
+    def version(self, user_id: int) -> int:
+        """Current version stamp; snapshot it before loading."""
+        return self._versions.get(user_id, 0)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            self._expire(self._owner(key))
+            return self._entries.get(key)
+
+    def store(self, key: Hashable, version: int, entry: Any) -> None:
+        """Cache entry unless the owner was invalidated since version."""
+        with self._lock:
+            user_id = self._owner(key)
+            if version == self.version(user_id):
+                self._put(key, entry)
+                self._loaded_at.setdefault(user_id, self._clock())
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop a user's entries (call after committing)."""
+        with self._lock:
+            self._bump(user_id)
+            self._drop(user_id)
+            self._loaded_at.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Drop everything (e.g. when the database is recreated)."""
+        with self._lock:
+            for user_id in list(self._versions):
+                self._bump(user_id)
+            self._entries.clear()
+            self._loaded_at.clear()
+
+    def _expire(self, user_id: int) -> None:
+        """Drop the user's entries once the oldest is ttl_s old (0 disables)."""
+        loaded_at = self._loaded_at.get(user_id)
+        if loaded_at is not None and self.ttl_s > 0 and self._clock() - loaded_at >= self.ttl_s:
+            self._bump(user_id)
+            self._drop(user_id)
+            del self._loaded_at[user_id]
+
+    def _bump(self, user_id: int) -> None:
+        self._versions[user_id] = self.version(user_id) + 1
+
+    def _owner(self, key: Hashable) -> int:
+        return key
+
+    def _put(self, key: Hashable, entry: Any) -> None:
+        self._entries[key] = entry
+
+    def _drop(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+
+class LimitsCache(VersionedUserCache):
+    """Global and per-deck daily limits, keyed by (kind, user_id)."""
+
+    def _owner(self, key: Tuple[str, int]) -> int:
+        return key[1]
+
+    def _put(self, key: Tuple[str, int], entry: Any) -> None:
+        if key[0] == DECKS:
+            self._entries.setdefault(key, {}).update(entry)
+        else:
+            self._entries[key] = entry
+
+    def _drop(self, user_id: int) -> None:
+        for kind in (SETTINGS, DECKS):
+            self._entries.pop((kind, user_id), None)
+
+    def _invalidate_kind(self, kind: str, user_id: int) -> None:
+        with self._lock:
+            self._bump(user_id)
+            self._entries.pop((kind, user_id), None)
+            if not any((other, user_id) in self._entries for other in (SETTINGS, DECKS)):
+                self._loaded_at.pop(user_id, None)
+
+    # Global limits (UserSettings)
+
+    def get_global(self, user_id: int) -> Optional[Dict[str, int]]:
+        limits = self.get((SETTINGS, user_id))
+        return dict(limits) if limits is not None else None
+
+    def store_global(self, user_id: int, version: int, limits: Dict[str, int]) -> None:
+        self.store((SETTINGS, user_id), version, dict(limits))
+
+    # Per-deck limits (Deck)
+
+    def get_decks(
+        self, user_id: int, deck_ids: Iterable[int]
+    ) -> Tuple[Dict[int, DeckLimitRow], List[int]]:
+        """Return (cached rows by deck_id, deck_ids that must be loaded)."""
+        entries = self.get((DECKS, user_id)) or {}
+        found: Dict[int, DeckLimitRow] = {}
+        missing: List[int] = []
+        for deck_id in deck_ids:
+            row = entries.get(deck_id)
+            if row is not None:
+                found[deck_id] = row
+            else:
+                missing.append(deck_id)
+        return found, missing
+
+    def store_decks(self, user_id: int, version: int, rows: Dict[int, DeckLimitRow]) -> None:
+        self.store((DECKS, user_id), version, dict(rows))
+
+    # Invalidation (call after the write has been committed)
+
+    def invalidate_settings(self, user_id: int) -> None:
+        self._invalidate_kind(SETTINGS, user_id)
+
+    def invalidate_decks(self, user_id: int) -> None:
+        self._invalidate_kind(DECKS, user_id)
+
+
+limits_cache = LimitsCache()
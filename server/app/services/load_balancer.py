@@ -0,0 +1,173 @@
+"""
+Schedule load balancing ("fuzz") for review intervals (REQ-4, REQ-6).
+
+Without it every card graduated on the same day (e.g. after a large import)
+comes due on the same later days, producing review spikes. When a user opts
+in (UserSettings.load_balance_enabled), the scheduler moves each new review
+due date to the least-loaded day within a fuzz window that scales with the
+interval (none below 3 days, then 15% / 10% / 5%).
+
+Day loads come from a per-user due-count histogram (learning + review
+cards, non-suspended, by due date) cached in process:
+
+- The scheduler calls note_move() after committing an answer, which moves
+  one card between days in the cached histogram.
+- Writes that change due dates in bulk (card delete/suspend, deck delete)
+  call invalidate(); PUT /api/settings calls invalidate_settings().
+
+The histogram is a VersionedUserCache (app.services.limits_cache) entry.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.database import Card, SchedState, UserSettings
+from app.services.limits_cache import VersionedUserCache
+
+# (interval lower bound in days, fraction of the interval); first match wins
+FUZZ_FACTORS = ((20.0, 0.05), (7.0, 0.10), (3.0, 0.15))
+MAX_FUZZ_DAYS = 7
+
+
+def fuzz_range(interval_days: float) -> int:
+    """Days the due date may move either way for an interval."""
+    for lower, factor in FUZZ_FACTORS:
+        if interval_days >= lower:
+            return min(MAX_FUZZ_DAYS, max(1, int(round(interval_days * factor))))
+    return 0
+
+
+class DueHistogramCache(VersionedUserCache):
+    """Per-user due-day counts and the load-balance opt-in flag."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._enabled: Dict[int, bool] = {}
+
+    def _put(self, user_id: int, histogram: Dict[date, int]) -> None:
+        self._entries[user_id] = dict(histogram)
+
+    def _drop(self, user_id: int) -> None:
+        super()._drop(user_id)
+        self._enabled.pop(user_id, None)
+
+    def move(self, user_id: int, old_day: Optional[date], new_day: Optional[date]) -> None:
+        """Move one card between days (None = not counted, e.g. a new card)."""
+        with self._lock:
+            self._expire(user_id)
+            histogram = self._entries.get(user_id)
+            if histogram is None:
+                # A load may be in flight; make it discard its snapshot
+                self._bump(user_id)
+                return
+            if old_day is not None and histogram.get(old_day, 0) > 0:
+                histogram[old_day] -= 1
+            if new_day is not None:
+                histogram[new_day] = histogram.get(new_day, 0) + 1
+
+    def get_enabled(self, user_id: int) -> Optional[bool]:
+        with self._lock:
+            self._expire(user_id)
+            return self._enabled.get(user_id)
+
+    def store_enabled(self, user_id: int, enabled: bool) -> None:
+        with self._lock:
+            self._enabled[user_id] = enabled
+            self._loaded_at.setdefault(user_id, self._clock())
+
+    def invalidate_settings(self, user_id: int) -> None:
+        with self._lock:
+            self._enabled.pop(user_id, None)
+
+    def clear(self) -> None:
+        super().clear()
+        with self._lock:
+            self._enabled.clear()
+
+
+due_histograms = DueHistogramCache()
+
+
+def is_enabled(db: Session, user_id: int) -> bool:
+    """Whether the user opted in to load balancing (cached)."""
+    cached = due_histograms.get_enabled(user_id)
+    if cached is not None:
+        return cached
+
+    enabled = db.query(UserSettings.load_balance_enabled).filter(
+        UserSettings.user_id == user_id
+    ).scalar()
+    due_histograms.store_enabled(user_id, bool(enabled))
+    return bool(enabled)
+
+
+def get_due_histogram(db: Session, user_id: int, today: date) -> Dict[date, int]:
+    """Due counts per day from today on, loaded with one GROUP BY on a miss."""
+    cached = due_histograms.get(user_id)
+    if cached is not None:
+        return cached
+
+    version = due_histograms.version(user_id)
+    day_col = func.date(SchedState.due_at)
+    rows = db.query(day_col, func.count(SchedState.card_id)).join(
+        Card, Card.id == SchedState.card_id
+    ).filter(
+        Card.user_id == user_id,
+        Card.suspended == False,  # noqa: E712
+        SchedState.state.in_(["learning", "review"]),
+        SchedState.due_at >= datetime.combine(today, datetime.min.time())
+    ).group_by(day_col).all()
+
+    # SQLite returns 'YYYY-MM-DD' strings, PostgreSQL returns dates
+    histogram = {date.fromisoformat(str(day)[:10]): count for day, count in rows}
+    due_histograms.store(user_id, version, histogram)
+    return due_histograms.get(user_id) or histogram
+
+
+def balance_due(
+    db: Session,
+    user_id: int,
+    due_at: datetime,
+    interval_days: float,
+    now: datetime
+) -> Tuple[datetime, float]:
+    """
+    Move a review due date to the least-loaded day within its fuzz window.
+    Ties go to the day closest to the original due date (earlier first).
+    Never schedules before tomorrow.
+
+    Returns:
+        (due_at, interval_days), shifted by the same number of days
+    """
+    spread = fuzz_range(interval_days)
+    if spread == 0:
+        return due_at, interval_days
+
+    histogram = get_due_histogram(db, user_id, now.date())
+    base_day = due_at.date()
+    earliest = now.date() + timedelta(days=1)
+
+    best_offset = 0
+    best_key = None
+    for offset in range(-spread, spread + 1):
+        day = base_day + timedelta(days=offset)
+        if day < earliest:
+            continue
+        key = (histogram.get(day, 0), abs(offset), offset)
+        if best_key is None or key < best_key:
+            best_key, best_offset = key, offset
+
+    if best_offset == 0:
+        return due_at, interval_days
+    return due_at + timedelta(days=best_offset), interval_days + best_offset
+
+
+def note_move(user_id: int, old_state: str, old_due: Optional[datetime], new_state: str, new_due: Optional[datetime]) -> None:
+    """Keep the cached histogram in step with one committed sched_state change."""
+    counted = ("learning", "review")
+    old_day = old_due.date() if old_due is not None and old_state in counted else None
+    new_day = new_due.date() if new_due is not None and new_state in counted else None
+    if old_day != new_day:
+        due_histograms.move(user_id, old_day, new_day)
@@ -0,0 +1,440 @@
+"""
+Offline SM-2 parameter optimizer (REQ-4).
+
+Calibrates a user's SM-2 parameters (UserSettings.sm2_ef_initial,
+sm2_lapse_multiplier, sm2_easy_bonus and the last learning step) so that
+reviews come due when the predicted recall probability equals a target
+retention.
+
+Each review-state answer tests the interval produced by the card's previous
+answer, so it is attributed to the parameter that scaled that interval:
+
+- lapse: previous answer was Again on a review card (LAPSE_MULTIPLIER)
+- easy: previous answer was Easy on a review card (EASY_BONUS)
+- ease: previous answer was Good on a review card (ease factor; the fit
+  moves EF_INITIAL, which new cards start from)
+- learning: previous answer graduated/advanced a learning card (last step)
+
+Recall is modelled per group as p = exp(-lambda * elapsed / interval),
+fitted by maximum likelihood (vectorized Newton steps across groups). The
+interval that hits the target retention r is then k = -ln(r) / lambda times
+the current one, and the group's parameter is scaled by k (clamped).
+
+review_logs is streamed in chunks ordered by (card_id, reviewed_at) and
+reduced to fixed-size histograms of (group, elapsed/interval) counts, so
+memory stays bounded by chunk_size regardless of history length.
+
+Runs are CPU-bound and are kept off the API process: POST
+/api/settings/optimize submits them to a process pool (optimizer_jobs), and
+the command line fans users out over a pool as well.
+
+Command line (from server/):
+    python -m app.services.param_optimizer (--user-id N | --all) [--workers N]
+        [--chunk-size N] [--target-retention R] [--dry-run]
+"""
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.database import ReviewLog, UserSettings
+from app.services.analytics import EPOCH, RATING_CODES, SECONDS_PER_DAY, STATE_CODES
+from app.services.data_version import data_versions
+from app.services.job_registry import JobRegistry
+from app.services.scheduler_engines import engine_cache, sm2_params
+
+# Add root directory to path to import the scheduler module
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+import scheduler  # noqa: E402
+
+GROUPS = ("ease", "easy", "lapse", "learning")
+RATIO_BIN_WIDTH = 0.05
+RATIO_BINS = 80  # elapsed/interval from 0 to 4; later reviews share the last bin
+
+DEFAULT_TARGET_RETENTION = 0.9
+DEFAULT_CHUNK_SIZE = 20000
+MIN_GROUP_REVIEWS = 50
+MAX_NEWTON_ITERATIONS = 50
+NEWTON_TOLERANCE = 1e-6
+
+# Largest change one run may make to a parameter, and parameter bounds
+MIN_SCALE, MAX_SCALE = 0.5, 2.0
+LAPSE_MULTIPLIER_BOUNDS = (0.1, 1.0)
+EASY_BONUS_BOUNDS = (1.0, 2.0)
+MAX_LAST_STEP_MINUTES = 4320  # 3 days
+
+
+@dataclass
+class RatioHistogram:
+    """Review counts and successes per (group, elapsed/interval bin)."""
+    counts: np.ndarray = field(default_factory=lambda: np.zeros((len(GROUPS), RATIO_BINS)))
+    successes: np.ndarray = field(default_factory=lambda: np.zeros((len(GROUPS), RATIO_BINS)))
+
+    def add(self, group: np.ndarray, ratio: np.ndarray, success: np.ndarray) -> None:
+        bins = np.clip((ratio / RATIO_BIN_WIDTH).astype(np.int64), 0, RATIO_BINS - 1)
+        index = group * RATIO_BINS + bins
+        size = len(GROUPS) * RATIO_BINS
+        self.counts += np.bincount(index, minlength=size).reshape(self.counts.shape)
+        self.successes += np.bincount(index, weights=success, minlength=size).reshape(self.counts.shape)
+
+
+@dataclass
+class OptimizerResult:
+    """Fitted parameters and run metrics."""
+    user_id: int
+    params: Dict[str, Any]
+    groups: Dict[str, Dict[str, Any]]
+    reviews: int
+    rows_read: int
+    chunks: int
+    chunk_size: int
+    target_retention: float
+    fit_seconds: float
+    saved: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _chunk_arrays(rows) -> Tuple[np.ndarray, ...]:
+    card_id, rating, state_before, interval_before, reviewed_at = zip(*rows)
+    count = len(rows)
+    return (
+        np.fromiter(card_id, dtype=np.int64, count=count),
+        np.fromiter((RATING_CODES.get(r, 0) for r in rating), dtype=np.int8, count=count),
+        np.fromiter((STATE_CODES.get(s, -1) for s in state_before), dtype=np.int8, count=count),
+        np.fromiter(interval_before, dtype=np.float64, count=count),
+        np.fromiter(((ts - EPOCH).total_seconds() for ts in reviewed_at), dtype=np.float64, count=count),
+    )
+
+
+def accumulate(histogram: RatioHistogram, arrays: Tuple[np.ndarray, ...]) -> int:
+    """
+    Add consecutive review rows (ordered by card_id, reviewed_at) to the
+    histogram. Returns the number of reviews that were attributed to a group.
+    """
+    card_id, rating, state, interval, reviewed_at = arrays
+    if len(card_id) < 2:
+        return 0
+
+    prev_state, prev_rating = state[:-1], rating[:-1]
+    prev_review = prev_state == STATE_CODES["review"]
+    group = np.select(
+        [
+            prev_review & (prev_rating == RATING_CODES["good"]),
+            prev_review & (prev_rating == RATING_CODES["easy"]),
+            prev_review & (prev_rating == RATING_CODES["again"]),
+            (prev_state == STATE_CODES["learning"]) & (prev_rating != RATING_CODES["again"]),
+        ],
+        list(range(len(GROUPS))),
+        default=-1
+    )
+    current_interval = interval[1:]
+    mask = (
+        (card_id[1:] == card_id[:-1])
+        & (state[1:] == STATE_CODES["review"])
+        & (current_interval > 0)
+        & (group >= 0)
+    )
+    elapsed = np.diff(reviewed_at) / SECONDS_PER_DAY
+    ratio = elapsed[mask] / current_interval[mask]
+    success = (rating[1:][mask] != RATING_CODES["again"]).astype(np.float64)
+    histogram.add(group[mask], ratio, success)
+    return int(mask.sum())
+
+
+def stream_histogram(
+    db: Session,
+    user_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Tuple[RatioHistogram, int, int, int]:
+    """
+    Build the user's RatioHistogram from review_logs, chunk_size rows at a
+    time. The last row of each chunk is carried into the next so cards that
+    straddle a chunk boundary keep their previous answer.
+
+    Returns:
+        (histogram, attributed reviews, rows read, chunks)
+    """
+    query = select(
+        ReviewLog.card_id,
+        ReviewLog.rating,
+        ReviewLog.state_before,
+        ReviewLog.interval_before,
+        ReviewLog.reviewed_at
+    ).where(ReviewLog.user_id == user_id).order_by(ReviewLog.card_id, ReviewLog.reviewed_at, ReviewLog.id)
+
+    histogram = RatioHistogram()
+    reviews = rows_read = chunks = 0
+    carry = None
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    for rows in result.partitions(chunk_size):
+        arrays = _chunk_arrays(rows)
+        if carry is not None:
+            arrays = tuple(np.concatenate([[last], values]) for last, values in zip(carry, arrays))
+        reviews += accumulate(histogram, arrays)
+        carry = tuple(values[-1] for values in arrays)
+        rows_read += len(rows)
+        chunks += 1
+    return histogram, reviews, rows_read, chunks
+
+
+def _log_likelihood(decay: np.ndarray, ratio: np.ndarray, counts: np.ndarray, successes: np.ndarray) -> np.ndarray:
+    q = np.exp(-decay[:, None] * ratio)
+    failures = counts - successes
+    return (successes * -decay[:, None] * ratio + failures * np.log(np.clip(1.0 - q, 1e-12, None))).sum(axis=1)
+
+
+def fit_decay(histogram: RatioHistogram) -> Dict[str, np.ndarray]:
+    """
+    Maximum-likelihood decay rate per group for p = exp(-decay * ratio).
+    Newton's method on the concave log-likelihood, all groups at once.
+
+    Returns:
+        Dict of per-group arrays: decay, iterations, converged
+    """
+    ratio = (np.arange(RATIO_BINS) + 0.5) * RATIO_BIN_WIDTH
+    counts, successes = histogram.counts, histogram.successes
+    failures = counts - successes
+    totals = counts.sum(axis=1)
+
+    # Start from the decay that matches the observed retention at the mean ratio
+    mean_ratio = (counts * ratio).sum(axis=1) / np.maximum(totals, 1)
+    observed = np.clip(successes.sum(axis=1) / np.maximum(totals, 1), 0.01, 0.99)
+    decay = -np.log(observed) / np.maximum(mean_ratio, RATIO_BIN_WIDTH)
+
+    iterations = np.zeros(len(GROUPS), dtype=np.int64)
+    converged = totals == 0
+    for _ in range(MAX_NEWTON_ITERATIONS):
+        active = ~converged
+        if not active.any():
+            break
+        q = np.exp(-decay[:, None] * ratio)
+        odds = q / np.clip(1.0 - q, 1e-12, None)
+        gradient = (-successes * ratio + failures * ratio * odds).sum(axis=1)
+        hessian = -(failures * ratio ** 2 * odds / np.clip(1.0 - q, 1e-12, None)).sum(axis=1)
+        step = np.where(active & (hessian < 0), gradient / np.where(hessian < 0, hessian, -1.0), 0.0)
+        updated = np.maximum(decay - step, decay / 10.0)
+        iterations += active
+        converged |= np.abs(updated - decay) <= NEWTON_TOLERANCE * np.maximum(decay, 1e-9)
+        decay = np.where(active, updated, decay)
+
+    return {"decay": decay, "iterations": iterations, "converged": converged}
+
+
+def fit_params(
+    histogram: RatioHistogram,
+    current: "scheduler.SM2Params",
+    target_retention: float = DEFAULT_TARGET_RETENTION
+) -> Tuple["scheduler.SM2Params", Dict[str, Dict[str, Any]]]:
+    """Scale each parameter so its intervals hit target_retention."""
+    fitted = fit_decay(histogram)
+    ratio = (np.arange(RATIO_BINS) + 0.5) * RATIO_BIN_WIDTH
+    target_decay = np.full(len(GROUPS), -math.log(target_retention))
+    totals = histogram.counts.sum(axis=1)
+    loss_before = -_log_likelihood(target_decay, ratio, histogram.counts, histogram.successes) / np.maximum(totals, 1)
+    loss_after = -_log_likelihood(fitted["decay"], ratio, histogram.counts, histogram.successes) / np.maximum(totals, 1)
+
+    values = current._asdict()
+    metrics = {}
+    for index, name in enumerate(GROUPS):
+        reviews = int(totals[index])
+        decay = float(fitted["decay"][index])
+        usable = reviews >= MIN_GROUP_REVIEWS and decay > 0
+        scale = min(MAX_SCALE, max(MIN_SCALE, -math.log(target_retention) / decay)) if usable else 1.0
+
+        if usable and name == "ease":
+            values["ef_initial"] = round(min(scheduler.EF_MAX, max(scheduler.EF_MIN, current.ef_initial * scale)), 3)
+        elif usable and name == "lapse":
+            low, high = LAPSE_MULTIPLIER_BOUNDS
+            values["lapse_multiplier"] = round(min(high, max(low, current.lapse_multiplier * scale)), 3)
+        elif usable and name == "easy":
+            low, high = EASY_BONUS_BOUNDS
+            values["easy_bonus"] = round(min(high, max(low, current.easy_bonus * scale)), 3)
+        elif usable and name == "learning":
+            steps = list(current.learning_steps_minutes)
+            low = steps[-2] if len(steps) > 1 else 1
+            steps[-1] = int(min(MAX_LAST_STEP_MINUTES, max(low, round(steps[-1] * scale))))
+            values["learning_steps_minutes"] = tuple(steps)
+
+        metrics[name] = {
+            "reviews": reviews,
+            "observed_retention": round(float(histogram.successes[index].sum()) / reviews, 4) if reviews else None,
+            "retention_at_due": round(math.exp(-decay), 4) if usable else None,
+            "scale": round(scale, 4),
+            "applied": usable,
+            "iterations": int(fitted["iterations"][index]),
+            "converged": bool(fitted["converged"][index]),
+            "log_loss_before": round(float(loss_before[index]), 5) if reviews else None,
+            "log_loss_after": round(float(loss_after[index]), 5) if reviews else None,
+        }
+
+    return scheduler.SM2Params(**values), metrics
+
+
+def optimize_user(
+    db: Session,
+    user_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    target_retention: float = DEFAULT_TARGET_RETENTION,
+    save: bool = True
+) -> OptimizerResult:
+    """Fit a user's SM-2 parameters and (if save) store them in UserSettings. Commits."""
+    started = time.perf_counter()
+    settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
+    current = sm2_params(settings)
+
+    histogram, reviews, rows_read, chunks = stream_histogram(db, user_id, chunk_size)
+    params, metrics = fit_params(histogram, current, target_retention)
+
+    result = OptimizerResult(
+        user_id=user_id,
+        params={
+            "ef_initial": params.ef_initial,
+            "lapse_multiplier": params.lapse_multiplier,
+            "easy_bonus": params.easy_bonus,
+            "learning_steps": ",".join(str(step) for step in params.learning_steps_minutes),
+        },
+        groups=metrics,
+        reviews=reviews,
+        rows_read=rows_read,
+        chunks=chunks,
+        chunk_size=chunk_size,
+        target_retention=target_retention,
+        fit_seconds=round(time.perf_counter() - started, 3),
+    )
+
+    if save and settings is not None:
+        settings.sm2_ef_initial = params.ef_initial
+        settings.sm2_lapse_multiplier = params.lapse_multiplier
+        settings.sm2_easy_bonus = params.easy_bonus
+        settings.learning_steps = result.params["learning_steps"]
+        result.saved = True
+        settings.scheduler_fit = {**result.to_dict(), "fitted_at": datetime.utcnow().isoformat()}
+        db.commit()
+        engine_cache.invalidate(user_id)
+    return result
+
+
+def run_job(
+    database_url: str,
+    user_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    target_retention: float = DEFAULT_TARGET_RETENTION,
+    save: bool = True
+) -> Dict[str, Any]:
+    """Process-pool entry point: run optimize_user with a private engine."""
+    from app.db.session import configure_sqlite_pragmas, engine_options, is_sqlite
+
+    engine = create_engine(database_url, **engine_options(database_url))
+    if is_sqlite(database_url):
+        configure_sqlite_pragmas(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        return optimize_user(session, user_id, chunk_size, target_retention, save).to_dict()
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _process_pool(max_workers: int) -> ProcessPoolExecutor:
+    # spawn: workers must not inherit the API's open connections or threads
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _fit_saved(user_id: int) -> None:
+    """
+    The worker process saved the fitted parameters: drop this process's
+    cached engines (the worker's invalidation only reached its own cache)
+    and outdate the user's ETags.
+    """
+    engine_cache.invalidate(user_id)
+    data_versions.bump(user_id)
+
+
+class OptimizerJobs(JobRegistry):
+    """Optimizer runs submitted by the API, executed in a lazily created process pool."""
+
+    def __init__(self):
+        super().__init__()
+        self.max_workers = 1
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return _process_pool(self.max_workers)
+
+    def _shutdown_executor(self, executor: ProcessPoolExecutor) -> None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, database_url: str, user_id: int, max_workers: int, **options) -> str:
+        self.max_workers = max(1, max_workers)
+        return self._submit(
+            user_id,
+            partial(run_job, database_url, user_id, **options),
+            on_done=lambda _: _fit_saved(user_id)
+        )
+
+
+optimizer_jobs = OptimizerJobs()
+
+
+def run_many(
+    database_url: str,
+    user_ids: List[int],
+    workers: int = 1,
+    **options
+) -> List[Dict[str, Any]]:
+    """Optimize several users across a process pool; results in completion order."""
+    results = []
+    with _process_pool(max(1, workers)) as pool:
+        futures = [pool.submit(run_job, database_url, user_id, **options) for user_id in user_ids]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.core.config import settings
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Fit per-user SM-2 parameters from review history")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user-id", type=int)
+    target.add_argument("--all", action="store_true", help="Every user with settings")
+    parser.add_argument("--workers", type=int, default=settings.optimizer_workers)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--target-retention", type=float, default=DEFAULT_TARGET_RETENTION)
+    parser.add_argument("--dry-run", action="store_true", help="Fit without saving")
+    args = parser.parse_args()
+
+    if args.all:
+        session = SessionLocal()
+        try:
+            user_ids = [row[0] for row in session.query(UserSettings.user_id).all()]
+        finally:
+            session.close()
+    else:
+        user_ids = [args.user_id]
+
+    for item in run_many(
+        settings.database_url, user_ids, args.workers,
+        chunk_size=args.chunk_size, target_retention=args.target_retention, save=not args.dry_run
+    ):
+        print(f"✓ user {item['user_id']}: {item['reviews']} reviews in {item['chunks']} chunks, "
+              f"{item['fit_seconds']}s -> {item['params']}")
+        for name, group in item["groups"].items():
+            print(f"    {name}: {group}")
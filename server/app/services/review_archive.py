@@ -0,0 +1,314 @@
+"""
+Review log partitioning and archival (REQ-9 analytics storage).
+
+review_logs is append-only; this module keeps the hot table small.
+
+- PostgreSQL: review_logs is range-partitioned by month on reviewed_at
+  (see the add_review_logs_partitioning migration). Partitions are named
+  review_logs_pYYYYMM; ensure_partitions() creates upcoming months and the
+  planner prunes partitions for queries that filter on reviewed_at.
+- SQLite has no partitioning and gets no monthly shard tables: review_logs
+  stays one table, indexed on (user_id, reviewed_at), and archival deletes
+  the archived month range instead of dropping a partition. Only archival
+  keeps it small there.
+
+archive_reviews() exports whole months older than a cutoff to compressed
+files (gzip NDJSON, or Parquet when pyarrow is installed), one file per
+month, then drops/deletes those rows. Stats read review_daily_rollup, which
+is not touched, so archived history still counts. After archiving, rebuild
+the rollup only from the cutoff onwards (rebuild_rollup(..., since=cutoff)).
+
+Everything else that reads review_logs only sees hot months: the columnar
+analytics (/api/stats/analytics/*) and the SM-2 and FSRS optimizers.
+Archiving therefore shortens their input; keep
+review_hot_months at least as long as the history they should learn from.
+
+Command line (from server/):
+    python -m app.services.review_archive archive [--hot-months N] [--dir D] [--format ndjson|parquet]
+    python -m app.services.review_archive partitions [--ahead N]
+"""
+import gzip
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.database import ReviewLog
+
+ARCHIVE_FORMATS = ("ndjson", "parquet")
+
+
+@dataclass
+class ArchivedMonth:
+    """One exported month."""
+    month: datetime
+    path: str
+    rows: int
+
+
+def month_start(ts: datetime) -> datetime:
+    """First instant of the timestamp's month."""
+    return datetime(ts.year, ts.month, 1)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    """Shift a month start by count months (negative goes back)."""
+    index = month.year * 12 + (month.month - 1) + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    """PostgreSQL partition table name for a month."""
+    return f"review_logs_p{month.year:04d}{month.month:02d}"
+
+
+def archive_cutoff(hot_months: int, now: Optional[datetime] = None) -> datetime:
+    """Start of the oldest month kept hot (current month counts as one)."""
+    if now is None:
+        now = datetime.utcnow()
+    return add_months(month_start(now), -(max(hot_months, 1) - 1))
+
+
+def is_partitioned(db: Session) -> bool:
+    """True if review_logs is a native PostgreSQL partitioned table."""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = 'review_logs'"
+    )).first() is not None
+
+
+DEFAULT_PARTITION = "review_logs_default"
+
+
+def partition_statements(months: List[datetime], default_partition: Optional[str] = DEFAULT_PARTITION) -> List[str]:
+    """
+    SQL that creates monthly partitions. PostgreSQL refuses to create a
+    partition while the DEFAULT partition holds rows in its range, so the
+    default is detached first, its rows for the new months moved into them,
+    and it is re-attached afterwards (all in one transaction).
+    """
+    statements = []
+    if months and default_partition:
+        statements.append(f"ALTER TABLE review_logs DETACH PARTITION {default_partition}")
+    for month in months:
+        start, end = f"{month:%Y-%m-%d}", f"{add_months(month, 1):%Y-%m-%d}"
+        name = partition_name(month)
+        statements.append(
+            f"CREATE TABLE {name} PARTITION OF review_logs FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+        if default_partition:
+            in_range = f"reviewed_at >= '{start}' AND reviewed_at < '{end}'"
+            statements.append(f"INSERT INTO {name} SELECT * FROM {default_partition} WHERE {in_range}")
+            statements.append(f"DELETE FROM {default_partition} WHERE {in_range}")
+    if months and default_partition:
+        statements.append(f"ALTER TABLE review_logs ATTACH PARTITION {default_partition} DEFAULT")
+    return statements
+
+
+def _table_exists(db: Session, name: str) -> bool:
+    return db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+def ensure_partitions(
+    db: Session,
+    months_ahead: int = 3,
+    now: Optional[datetime] = None
+) -> List[str]:
+    """
+    Create monthly partitions from the current month through months_ahead
+    (see partition_statements). No-op unless review_logs is partitioned.
+    Commits.
+
+    Returns:
+        Names of the partitions that were checked/created
+    """
+    if not is_partitioned(db):
+        return []
+    if now is None:
+        now = datetime.utcnow()
+
+    first = month_start(now)
+    months = [add_months(first, offset) for offset in range(months_ahead + 1)]
+    missing = [month for month in months if not _table_exists(db, partition_name(month))]
+    default_partition = DEFAULT_PARTITION if _table_exists(db, DEFAULT_PARTITION) else None
+    for statement in partition_statements(missing, default_partition):
+        db.execute(text(statement))
+    db.commit()
+    return [partition_name(month) for month in months]
+
+
+def _serialize(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in row.items()
+    }
+
+
+def _iter_month_rows(
+    db: Session,
+    month: datetime,
+    batch_size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    """Stream a month of review_logs in batches of plain dicts."""
+    table = ReviewLog.__table__
+    result = db.execute(
+        select(table).where(
+            table.c.reviewed_at >= month,
+            table.c.reviewed_at < add_months(month, 1)
+        ).order_by(table.c.reviewed_at, table.c.id).execution_options(yield_per=batch_size)
+    )
+    for batch in result.mappings().partitions(batch_size):
+        yield [dict(row) for row in batch]
+
+
+def _write_ndjson(path: str, batches: Iterator[List[Dict[str, Any]]]) -> int:
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as handle:
+        for batch in batches:
+            for row in batch:
+                handle.write(json.dumps(_serialize(row)) + "\n")
+            count += len(batch)
+    return count
+
+
+def _write_parquet(path: str, batches: Iterator[List[Dict[str, Any]]]) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError(
+            "Parquet archives require pyarrow (pip install pyarrow); use format='ndjson' otherwise."
+        ) from exc
+
+    count = 0
+    writer = None
+    try:
+        for batch in batches:
+            table = pa.Table.from_pylist(batch)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table)
+            count += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def archive_month(
+    db: Session,
+    month: datetime,
+    archive_dir: str,
+    fmt: str = "ndjson",
+    batch_size: int = 5000
+) -> Optional[ArchivedMonth]:
+    """
+    Export one month of review_logs and remove it from the hot table. Commits.
+
+    The file is written to a temporary name and renamed once complete, and
+    rows are only removed afterwards, so an interrupted run can simply be
+    repeated. Returns None when the month has no rows.
+    """
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format: {fmt}")
+
+    os.makedirs(archive_dir, exist_ok=True)
+    suffix = "ndjson.gz" if fmt == "ndjson" else "parquet"
+    path = os.path.join(archive_dir, f"review_logs_{month:%Y_%m}.{suffix}")
+    tmp_path = path + ".tmp"
+
+    writer = _write_ndjson if fmt == "ndjson" else _write_parquet
+    rows = writer(tmp_path, _iter_month_rows(db, month, batch_size))
+    if rows == 0:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+    os.replace(tmp_path, path)
+
+    name = partition_name(month)
+    if is_partitioned(db) and _table_exists(db, name):
+        db.execute(text(f"ALTER TABLE review_logs DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+    else:
+        db.query(ReviewLog).filter(
+            ReviewLog.reviewed_at >= month,
+            ReviewLog.reviewed_at < add_months(month, 1)
+        ).delete(synchronize_session=False)
+    db.commit()
+
+    return ArchivedMonth(month=month, path=path, rows=rows)
+
+
+def archive_reviews(
+    db: Session,
+    before: datetime,
+    archive_dir: str,
+    fmt: str = "ndjson",
+    batch_size: int = 5000
+) -> List[ArchivedMonth]:
+    """
+    Archive every whole month of review_logs older than `before`
+    (rounded down to a month start), oldest first.
+    """
+    cutoff = month_start(before)
+    oldest = db.query(func.min(ReviewLog.reviewed_at)).filter(
+        ReviewLog.reviewed_at < cutoff
+    ).scalar()
+    if oldest is None:
+        return []
+
+    archived = []
+    month = month_start(oldest)
+    while month < cutoff:
+        result = archive_month(db, month, archive_dir, fmt, batch_size)
+        if result is not None:
+            archived.append(result)
+        month = add_months(month, 1)
+    return archived
+
+
+def read_archive(path: str) -> Iterator[Dict[str, Any]]:
+    """Iterate the rows of an NDJSON archive file (e.g. for ad-hoc analysis)."""
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            yield json.loads(line)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.core.config import settings
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Review log partitioning and archival")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = commands.add_parser("archive", help="Export and remove cold months")
+    archive_parser.add_argument("--hot-months", type=int, default=settings.review_hot_months)
+    archive_parser.add_argument("--dir", default=settings.review_archive_dir)
+    archive_parser.add_argument("--format", choices=ARCHIVE_FORMATS, default=settings.review_archive_format)
+
+    partitions_parser = commands.add_parser("partitions", help="Create upcoming PostgreSQL partitions")
+    partitions_parser.add_argument("--ahead", type=int, default=settings.review_partition_months_ahead)
+
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if args.command == "archive":
+            cutoff = archive_cutoff(args.hot_months)
+            for item in archive_reviews(session, cutoff, args.dir, args.format):
+                print(f"✓ {item.month:%Y-%m}: {item.rows} reviews -> {item.path}")
+            print(f"Rebuild the rollup with --since {cutoff:%Y-%m-%d} if needed")
+        else:
+            names = ensure_partitions(session, args.ahead)
+            print(f"✓ Partitions ready: {', '.join(names)}" if names else "review_logs is not partitioned")
+    finally:
+        session.close()
@@ -0,0 +1,122 @@
+"""
+Live queue counts over Server-Sent Events (GET /api/review/events).
+
+Instead of polling /api/review/stats, a client keeps one stream open. Each
+stream subscribes to its user's data version (app.services.data_version):
+every committed write that bumps it (answers, card edits and suspends via
+app.main's middleware, background jobs via bump()) wakes the stream, which
+recounts and sends only the sections that changed. Without writes it
+recounts every REVIEW_EVENTS_REFRESH_S seconds, so cards coming due still
+show up, and sends a comment line as keep-alive when nothing changed.
+
+Fan-out is in process, like the caches: a write wakes the streams held by
+the worker process that served it.
+"""
+import asyncio
+import json
+from threading import Lock
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from app.services.data_version import data_versions
+
+
+class Subscription:
+    """Wake-up flag of one stream; notify() may be called from any thread."""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def notify(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            pass  # loop closed: the stream is gone
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for a notification (True) or the timeout (False); resets the flag."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        return True
+
+
+class ReviewEventHub:
+    """Open streams by user."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Register a stream (call from its event loop)."""
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            streams = self._subscribers.get(subscription.user_id)
+            if streams is not None:
+                streams.discard(subscription)
+                if not streams:
+                    del self._subscribers[subscription.user_id]
+
+    def subscriber_count(self, user_id: int) -> int:
+        return len(self._subscribers.get(user_id, ()))
+
+    def publish(self, user_id: Optional[int]) -> None:
+        """Wake a user's streams (everyone's for None)."""
+        with self._lock:
+            if user_id is None:
+                targets = [s for streams in self._subscribers.values() for s in streams]
+            else:
+                targets = list(self._subscribers.get(user_id, ()))
+        for subscription in targets:
+            subscription.notify()
+
+
+review_events = ReviewEventHub()
+data_versions.watch(review_events.publish)
+
+
+def format_event(event: str, data: Any) -> str:
+    """One SSE message."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def changed_sections(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level entries of new that differ from old."""
+    return {key: value for key, value in new.items() if old.get(key) != value}
+
+
+async def count_stream(
+    user_id: int,
+    load_counts: Callable[[], Awaitable[Dict[str, Any]]],
+    refresh_s: float
+) -> AsyncIterator[str]:
+    """
+    SSE body: a "counts" event with everything, then a "delta" event with
+    the changed sections after each write (or refresh) that changed them.
+    Runs until the client disconnects (the response cancels it).
+    """
+    # Subscribe before the first count so no write falls in between
+    subscription = review_events.subscribe(user_id)
+    try:
+        counts = await load_counts()
+        yield format_event("counts", counts)
+        while True:
+            await subscription.wait(refresh_s)
+            latest = await load_counts()
+            delta = changed_sections(counts, latest)
+            if delta:
+                counts = latest
+                yield format_event("delta", delta)
+            else:
+                yield ": keep-alive\n\n"
+    finally:
+        review_events.unsubscribe(subscription)
@@ -0,0 +1,395 @@
+"""
+Daily review rollup service (REQ-9 analytics).
+
+Maintains review_daily_rollup: per (user, deck, day, state_before) counts by
+rating, lapse counts and summed time_taken_ms. The scheduler records each
+logged review incrementally; rebuild_rollup() recomputes the table from
+review_logs (after imports, migrations or manual log edits). Deleting
+cards takes their reviews back out (remove_card_reviews) and moving cards
+moves them to the new deck's rows (move_card_reviews), so the table always
+matches what a rebuild would produce: reviews count on the card's current
+deck.
+
+Stats endpoints read from here, so their cost grows with days, not reviews.
+
+Rebuild from the command line (from server/):
+    python -m app.services.review_rollup [--user-id N] [--since YYYY-MM-DD]
+"""
+from datetime import datetime, time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.database import Card, ReviewDailyRollup, ReviewLog
+
+
+class DailyRatingTotals(NamedTuple):
+    """Rating counts for one day (summed over decks and states)."""
+    date: datetime
+    again: int
+    good: int
+    easy: int
+
+    @property
+    def total(self) -> int:
+        return self.again + self.good + self.easy
+
+    @property
+    def successful(self) -> int:
+        return self.good + self.easy
+
+
+def day_start(ts: datetime) -> datetime:
+    """Midnight of the timestamp's day (rollup bucket key)."""
+    return datetime.combine(ts.date(), time.min)
+
+
+def _rollup_key_filter(user_id: int, deck_id: int, day: datetime, state_before: str):
+    return and_(
+        ReviewDailyRollup.user_id == user_id,
+        ReviewDailyRollup.deck_id == deck_id,
+        ReviewDailyRollup.date == day,
+        ReviewDailyRollup.state_before == state_before
+    )
+
+
+def record_review(
+    db: Session,
+    user_id: int,
+    deck_id: int,
+    reviewed_at: datetime,
+    state_before: str,
+    rating: str,
+    time_taken_ms: Optional[int] = None
+) -> None:
+    """
+    Add one logged review to the rollup. No commit; the caller owns the
+    transaction. Increments are issued as SQL expressions (col = col + 1)
+    so concurrent answers never lose updates.
+    """
+    day = day_start(reviewed_at)
+    key = _rollup_key_filter(user_id, deck_id, day, state_before)
+
+    row = db.query(ReviewDailyRollup).filter(key).first()
+    if not row:
+        row = ReviewDailyRollup(
+            user_id=user_id,
+            deck_id=deck_id,
+            date=day,
+            state_before=state_before,
+            again_count=0,
+            good_count=0,
+            easy_count=0,
+            lapse_count=0,
+            time_taken_ms=0
+        )
+        try:
+            # Savepoint: a concurrent insert only rolls back this row
+            with db.begin_nested():
+                db.add(row)
+        except IntegrityError:
+            row = db.query(ReviewDailyRollup).filter(key).one()
+
+    if rating == "again":
+        row.again_count = ReviewDailyRollup.again_count + 1
+        if state_before == "review":
+            row.lapse_count = ReviewDailyRollup.lapse_count + 1
+    elif rating == "good":
+        row.good_count = ReviewDailyRollup.good_count + 1
+    else:
+        row.easy_count = ReviewDailyRollup.easy_count + 1
+
+    if time_taken_ms:
+        row.time_taken_ms = ReviewDailyRollup.time_taken_ms + time_taken_ms
+
+
+def rebuild_rollup(
+    db: Session,
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None
+) -> int:
+    """
+    Recompute the rollup from review_logs for one user (or everyone).
+    Reviews are attributed to the card's current deck. Commits.
+
+    Once review logs have been archived (app.services.review_archive), pass
+    `since` (the archive cutoff) so days that only exist in the archive keep
+    their rollup rows.
+
+    Returns:
+        Number of rollup rows written
+    """
+    delete_query = db.query(ReviewDailyRollup)
+    if user_id is not None:
+        delete_query = delete_query.filter(ReviewDailyRollup.user_id == user_id)
+    if since is not None:
+        delete_query = delete_query.filter(ReviewDailyRollup.date >= day_start(since))
+    delete_query.delete(synchronize_session=False)
+
+    day_col = func.date(ReviewLog.reviewed_at)
+    is_again = ReviewLog.rating == "again"
+    query = db.query(
+        ReviewLog.user_id,
+        Card.deck_id,
+        day_col,
+        ReviewLog.state_before,
+        func.sum(case((is_again, 1), else_=0)),
+        func.sum(case((ReviewLog.rating == "good", 1), else_=0)),
+        func.sum(case((ReviewLog.rating == "easy", 1), else_=0)),
+        func.sum(case((and_(is_again, ReviewLog.state_before == "review"), 1), else_=0)),
+        func.coalesce(func.sum(ReviewLog.time_taken_ms), 0)
+    ).join(Card, Card.id == ReviewLog.card_id)
+    if user_id is not None:
+        query = query.filter(ReviewLog.user_id == user_id)
+    if since is not None:
+        query = query.filter(ReviewLog.reviewed_at >= day_start(since))
+    query = query.group_by(ReviewLog.user_id, Card.deck_id, day_col, ReviewLog.state_before)
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": row_user_id,
+            "deck_id": deck_id,
+            # SQLite returns 'YYYY-MM-DD' strings, PostgreSQL returns dates
+            "date": datetime.fromisoformat(str(day)[:10]),
+            "state_before": state_before,
+            "again_count": again,
+            "good_count": good,
+            "easy_count": easy,
+            "lapse_count": lapses,
+            "time_taken_ms": time_ms,
+            "created_at": now,
+            "updated_at": now
+        }
+        for row_user_id, deck_id, day, state_before, again, good, easy, lapses, time_ms in query.all()
+    ]
+    if rows:
+        db.bulk_insert_mappings(ReviewDailyRollup, rows)
+    db.commit()
+    return len(rows)
+
+
+class ReviewGroup(NamedTuple):
+    """Logged reviews of some cards for one rollup key."""
+    user_id: int
+    deck_id: int
+    date: datetime
+    state_before: str
+    again: int
+    good: int
+    easy: int
+    lapses: int
+    time_ms: int
+
+
+def _card_review_groups(
+    db: Session,
+    card_ids: List[int],
+    exclude_deck_id: Optional[int] = None
+) -> List[ReviewGroup]:
+    """The cards' logged reviews by rollup key (the card's current deck)."""
+    # Inlined: the list can exceed bind parameter limits
+    selected = bindparam("card_ids", card_ids, expanding=True, literal_execute=True)
+    day_col = func.date(ReviewLog.reviewed_at)
+    is_again = ReviewLog.rating == "again"
+    query = db.query(
+        ReviewLog.user_id,
+        Card.deck_id,
+        day_col,
+        ReviewLog.state_before,
+        func.sum(case((is_again, 1), else_=0)),
+        func.sum(case((ReviewLog.rating == "good", 1), else_=0)),
+        func.sum(case((ReviewLog.rating == "easy", 1), else_=0)),
+        func.sum(case((and_(is_again, ReviewLog.state_before == "review"), 1), else_=0)),
+        func.coalesce(func.sum(ReviewLog.time_taken_ms), 0)
+    ).join(Card, Card.id == ReviewLog.card_id).filter(ReviewLog.card_id.in_(selected))
+    if exclude_deck_id is not None:
+        query = query.filter(Card.deck_id != exclude_deck_id)
+    rows = query.group_by(ReviewLog.user_id, Card.deck_id, day_col, ReviewLog.state_before).all()
+    return [
+        # SQLite returns 'YYYY-MM-DD' strings, PostgreSQL returns dates
+        ReviewGroup(user_id, deck_id, datetime.fromisoformat(str(day)[:10]), *counts)
+        for user_id, deck_id, day, *counts in rows
+    ]
+
+
+def _key_params(group: ReviewGroup) -> Dict[str, Any]:
+    return {
+        "b_user_id": group.user_id,
+        "b_deck_id": group.deck_id,
+        "b_date": group.date,
+        "b_state_before": group.state_before,
+        "b_again": group.again,
+        "b_good": group.good,
+        "b_easy": group.easy,
+        "b_lapses": group.lapses,
+        "b_time_ms": group.time_ms
+    }
+
+
+def _adjust_rows(db: Session, groups: List[ReviewGroup], sign: int) -> int:
+    """Add (sign=1) or subtract (sign=-1) groups on existing rows; returns rows matched."""
+    table = ReviewDailyRollup.__table__
+    return db.execute(
+        table.update().where(
+            table.c.user_id == bindparam("b_user_id"),
+            table.c.deck_id == bindparam("b_deck_id"),
+            table.c.date == bindparam("b_date"),
+            table.c.state_before == bindparam("b_state_before")
+        ).values(
+            again_count=table.c.again_count + sign * bindparam("b_again"),
+            good_count=table.c.good_count + sign * bindparam("b_good"),
+            easy_count=table.c.easy_count + sign * bindparam("b_easy"),
+            lapse_count=table.c.lapse_count + sign * bindparam("b_lapses"),
+            time_taken_ms=table.c.time_taken_ms + sign * bindparam("b_time_ms")
+        ),
+        [_key_params(group) for group in groups]
+    ).rowcount
+
+
+def _subtract_groups(db: Session, groups: List[ReviewGroup]) -> None:
+    """Take groups out of their rows and delete rows left without reviews."""
+    table = ReviewDailyRollup.__table__
+    _adjust_rows(db, groups, -1)
+    db.execute(table.delete().where(
+        table.c.user_id.in_({group.user_id for group in groups}),
+        table.c.deck_id.in_({group.deck_id for group in groups}),
+        table.c.again_count + table.c.good_count + table.c.easy_count <= 0
+    ))
+
+
+def _add_groups(db: Session, groups: List[ReviewGroup]) -> None:
+    """Add groups to their rows, creating missing rows."""
+    for group in groups:
+        if _adjust_rows(db, [group], 1):
+            continue
+        try:
+            # Savepoint: a concurrent insert only rolls back this row
+            with db.begin_nested():
+                db.add(ReviewDailyRollup(
+                    user_id=group.user_id,
+                    deck_id=group.deck_id,
+                    date=group.date,
+                    state_before=group.state_before,
+                    again_count=group.again,
+                    good_count=group.good,
+                    easy_count=group.easy,
+                    lapse_count=group.lapses,
+                    time_taken_ms=group.time_ms
+                ))
+        except IntegrityError:
+            _adjust_rows(db, [group], 1)
+
+
+def remove_card_reviews(db: Session, card_ids: List[int]) -> int:
+    """
+    Take the cards' logged reviews back out of the rollup, as rebuild_rollup
+    would after they are deleted; call before deleting their review_logs.
+    Rows left without reviews are removed. Archived reviews stay counted.
+    No commit.
+
+    Returns:
+        Number of rollup rows updated
+    """
+    if not card_ids:
+        return 0
+    groups = _card_review_groups(db, card_ids)
+    if groups:
+        _subtract_groups(db, groups)
+    return len(groups)
+
+
+def move_card_reviews(db: Session, card_ids: List[int], deck_id: int) -> int:
+    """
+    Move the cards' logged reviews to deck_id's rollup rows, as
+    rebuild_rollup would after the cards move; call before changing
+    Card.deck_id. Cards already in deck_id are skipped. Archived reviews
+    stay on the old deck. No commit.
+
+    Returns:
+        Number of rollup rows the reviews were taken from
+    """
+    if not card_ids:
+        return 0
+    groups = _card_review_groups(db, card_ids, exclude_deck_id=deck_id)
+    if not groups:
+        return 0
+    _subtract_groups(db, groups)
+
+    merged: Dict[Tuple[int, datetime, str], List[int]] = {}
+    for group in groups:
+        totals = merged.setdefault((group.user_id, group.date, group.state_before), [0] * 5)
+        for index, value in enumerate(group[4:]):
+            totals[index] += value
+    _add_groups(db, [
+        ReviewGroup(user_id, deck_id, day, state_before, *totals)
+        for (user_id, day, state_before), totals in merged.items()
+    ])
+    return len(groups)
+
+
+def daily_rating_totals(
+    db: Session,
+    user_id: int,
+    since: datetime,
+    deck_id: Optional[int] = None,
+    until: Optional[datetime] = None
+) -> List[DailyRatingTotals]:
+    """
+    Per-day rating counts from `since`'s day onwards (before `until` if
+    given), oldest first. One row per day with reviews.
+    """
+    query = db.query(
+        ReviewDailyRollup.date,
+        func.sum(ReviewDailyRollup.again_count),
+        func.sum(ReviewDailyRollup.good_count),
+        func.sum(ReviewDailyRollup.easy_count)
+    ).filter(
+        ReviewDailyRollup.user_id == user_id,
+        ReviewDailyRollup.date >= day_start(since)
+    )
+    if deck_id is not None:
+        query = query.filter(ReviewDailyRollup.deck_id == deck_id)
+    if until is not None:
+        query = query.filter(ReviewDailyRollup.date < until)
+
+    rows = query.group_by(ReviewDailyRollup.date).order_by(ReviewDailyRollup.date).all()
+    return [
+        DailyRatingTotals(day, int(again or 0), int(good or 0), int(easy or 0))
+        for day, again, good, easy in rows
+    ]
+
+
+def total_review_count(db: Session, user_id: int) -> int:
+    """All-time number of logged reviews (including archived logs)."""
+    total = db.query(
+        func.sum(
+            ReviewDailyRollup.again_count
+            + ReviewDailyRollup.good_count
+            + ReviewDailyRollup.easy_count
+        )
+    ).filter(ReviewDailyRollup.user_id == user_id).scalar()
+    return int(total or 0)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild review_daily_rollup from review_logs")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user")
+    parser.add_argument(
+        "--since", type=datetime.fromisoformat, default=None,
+        help="Only rebuild days from this date (YYYY-MM-DD), e.g. the archive cutoff"
+    )
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        written = rebuild_rollup(session, args.user_id, args.since)
+        print(f"✓ Rebuilt review_daily_rollup ({written} rows)")
+    finally:
+        session.close()
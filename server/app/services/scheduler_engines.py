@@ -0,0 +1,413 @@
+"""
+Pluggable scheduling engines (REQ-4).
+
+A SchedulerEngine turns (sched_state, rating, now) into the next scheduling
+state, for one card or a batch, and previews the interval each rating would
+give. Two engines are available:
+
+- "sm2": the original rules in the root-level scheduler module (default).
+- "fsrs": an FSRS-style model (FSRS-4.5 formulas). Each card keeps a memory
+  stability (days until recall probability falls to 90%) and a difficulty
+  (1-10) in SchedState; intervals are chosen so recall probability at the
+  due date equals the user's desired retention. Cards that were scheduled by
+  SM-2 get stability/difficulty derived from their interval and ease on
+  their first FSRS answer. The optional per-user weights are fitted from
+  review history by app.services.fsrs_optimizer.
+
+The engine is chosen per deck (Deck.scheduler_engine) with a fallback to the
+user's default (UserSettings.scheduler_engine). A user's engines and deck
+overrides are cached in process (engine_cache, a VersionedUserCache); writes
+to UserSettings engine parameters or Deck.scheduler_engine (settings PUT,
+deck create/update/delete, optimizer saves) call engine_cache.invalidate()
+after committing.
+"""
+import os
+import sys
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.database import Deck, SchedState, UserSettings
+from app.services.limits_cache import VersionedUserCache
+
+# Add root directory to path to import the scheduler module
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+import scheduler  # noqa: E402
+
+ENGINES = ("sm2", "fsrs")
+DEFAULT_ENGINE = "sm2"
+
+# FSRS-4.5 default weights
+FSRS_DEFAULT_WEIGHTS = (
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+    0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+)
+# (lower, upper) bounds per weight, applied when fitting
+FSRS_WEIGHT_BOUNDS = (
+    (0.01, 100.0), (0.01, 100.0), (0.01, 100.0), (0.01, 100.0),
+    (1.0, 10.0), (0.1, 4.0), (0.1, 4.0), (0.0, 0.75), (0.0, 4.5),
+    (0.0, 0.8), (0.01, 3.5), (0.1, 5.0), (0.01, 0.25), (0.01, 0.9),
+    (0.0, 4.0), (0.0, 1.0), (1.0, 6.0),
+)
+FSRS_DEFAULT_RETENTION = 0.9
+FSRS_DECAY = -0.5
+FSRS_FACTOR = 19.0 / 81.0  # makes retrievability 0.9 after `stability` days
+GRADES = {"again": 1, "good": 3, "easy": 4}  # FSRS grades (no "hard" button)
+MIN_STABILITY = 0.01
+MAX_INTERVAL_DAYS = 36500.0
+
+MINUTES_PER_DAY = 1440.0
+SECONDS_PER_DAY = 86400.0
+
+
+class SchedUpdate(NamedTuple):
+    """Next scheduling state for one card (None = leave the column unchanged)."""
+    state: str
+    due_at: datetime
+    interval_days: float
+    ease_factor: float
+    learning_step: int
+    stability: Optional[float] = None
+    difficulty: Optional[float] = None
+
+
+class SchedulerEngine(ABC):
+    """Scheduling algorithm interface."""
+
+    name = ""
+
+    @abstractmethod
+    def next_state(self, sched_state: SchedState, rating: str, now: datetime) -> SchedUpdate:
+        """Next state of one card after a rating."""
+
+    def next_states(
+        self,
+        sched_states: Sequence[SchedState],
+        ratings: Sequence[str],
+        now: datetime
+    ) -> List[SchedUpdate]:
+        """Next states for many cards (one rating per card)."""
+        return [self.next_state(s, r, now) for s, r in zip(sched_states, ratings)]
+
+    @abstractmethod
+    def preview(self, sched_states: Sequence[Optional[SchedState]], now: datetime) -> Dict[str, np.ndarray]:
+        """
+        Days until due after each rating for many cards (None = card without
+        a sched_state, previewed as new).
+
+        Returns:
+            Dict with keys "again", "good", "easy" -> float64 arrays of days
+        """
+
+
+class SM2Engine(SchedulerEngine):
+    """The SM-2 rules of the scheduler module, with the user's parameters."""
+
+    name = "sm2"
+
+    def __init__(self, params: Optional["scheduler.SM2Params"] = None):
+        self.params = params if params is not None else scheduler.DEFAULT_SM2_PARAMS
+
+    def next_state(self, sched_state: SchedState, rating: str, now: datetime) -> SchedUpdate:
+        return SchedUpdate(*scheduler.calculate_next_state(sched_state, rating, now, self.params))
+
+    def preview(self, sched_states: Sequence[Optional[SchedState]], now: datetime) -> Dict[str, np.ndarray]:
+        states, intervals, efs, steps = [], [], [], []
+        for sched in sched_states:
+            if sched is not None:
+                states.append(sched.state)
+                intervals.append(sched.interval_days)
+                efs.append(sched.ease_factor)
+                steps.append(sched.learning_step)
+            else:
+                states.append("new")
+                intervals.append(0.0)
+                efs.append(self.params.ef_initial)
+                steps.append(0)
+        return scheduler.preview_intervals(states, intervals, efs, steps, self.params)
+
+
+# FSRS formulas. `w` is indexed w[0]..w[16]; entries may be scalars or arrays
+# that broadcast against the card arrays (the optimizer evaluates many weight
+# vectors at once).
+
+def fsrs_retrievability(elapsed_days, stability):
+    """Probability of recall after elapsed_days."""
+    return (1.0 + FSRS_FACTOR * elapsed_days / stability) ** FSRS_DECAY
+
+
+def fsrs_interval(stability, retention: float):
+    """Days until recall probability falls to `retention`."""
+    return stability / FSRS_FACTOR * (retention ** (1.0 / FSRS_DECAY) - 1.0)
+
+
+def fsrs_init_stability(grade, w):
+    return np.maximum(np.choose(grade - 1, [w[0], w[1], w[2], w[3]]), MIN_STABILITY)
+
+
+def fsrs_init_difficulty(grade, w):
+    return np.clip(w[4] - w[5] * (grade - 3), 1.0, 10.0)
+
+
+def fsrs_next_difficulty(difficulty, grade, w):
+    updated = difficulty - w[6] * (grade - 3)
+    # Mean reversion towards the initial difficulty of an Easy answer
+    return np.clip(w[7] * fsrs_init_difficulty(4, w) + (1.0 - w[7]) * updated, 1.0, 10.0)
+
+
+def fsrs_review(stability, difficulty, elapsed_days, grade, w):
+    """Stability and difficulty after a review answered `elapsed_days` after the previous one."""
+    r = fsrs_retrievability(elapsed_days, stability)
+    hard_penalty = np.where(grade == 2, w[15], 1.0)
+    easy_bonus = np.where(grade == 4, w[16], 1.0)
+    recall = stability * (
+        1.0 + np.exp(w[8]) * (11.0 - difficulty) * stability ** -w[9]
+        * (np.exp(w[10] * (1.0 - r)) - 1.0) * hard_penalty * easy_bonus
+    )
+    forget = np.minimum(
+        w[11] * difficulty ** -w[12] * ((stability + 1.0) ** w[13] - 1.0) * np.exp(w[14] * (1.0 - r)),
+        stability
+    )
+    new_stability = np.maximum(np.where(grade == 1, forget, recall), MIN_STABILITY)
+    return new_stability, fsrs_next_difficulty(difficulty, grade, w)
+
+
+class FSRSArrays(NamedTuple):
+    """Vectorized FSRS result: one element per card."""
+    state: np.ndarray  # object: "learning" / "review"
+    days: np.ndarray  # days from now until due
+    learning_step: np.ndarray
+    stability: np.ndarray
+    difficulty: np.ndarray
+
+
+class FSRSEngine(SchedulerEngine):
+    """
+    FSRS-style engine.
+
+    New cards answered Again, and learning cards, step through the learning
+    steps (stability/difficulty are not updated within a day); Good/Easy
+    graduate to review. Review answers update stability/difficulty; Again
+    keeps the card in review with the (short) post-lapse interval.
+    """
+
+    name = "fsrs"
+
+    def __init__(
+        self,
+        weights: Optional[Sequence[float]] = None,
+        desired_retention: float = FSRS_DEFAULT_RETENTION,
+        learning_steps_minutes: Optional[Sequence[int]] = None
+    ):
+        if weights is None or len(weights) != len(FSRS_DEFAULT_WEIGHTS):
+            weights = FSRS_DEFAULT_WEIGHTS
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.desired_retention = desired_retention
+        if learning_steps_minutes is None:
+            learning_steps_minutes = scheduler.LEARNING_STEPS_MINUTES
+        self.step_days = np.asarray(learning_steps_minutes, dtype=np.float64) / MINUTES_PER_DAY
+
+    def _interval(self, stability: np.ndarray) -> np.ndarray:
+        days = np.round(fsrs_interval(stability, self.desired_retention))
+        return np.clip(days, 1.0, MAX_INTERVAL_DAYS)
+
+    def transition(
+        self,
+        state: np.ndarray,
+        interval: np.ndarray,
+        ease: np.ndarray,
+        step: np.ndarray,
+        stability: np.ndarray,
+        difficulty: np.ndarray,
+        elapsed: np.ndarray,
+        grade: np.ndarray
+    ) -> FSRSArrays:
+        """
+        Apply one answer to many cards. stability/difficulty may be NaN
+        (no FSRS memory state yet); elapsed is days since the last review.
+        """
+        w = self.weights
+        is_new = state == "new"
+        is_learning = state == "learning"
+
+        # Memory state for cards that have none: new cards start from the
+        # grade, SM-2 cards from their interval and ease
+        from_ease = np.clip(
+            1.0 + (scheduler.EF_MAX - ease) / (scheduler.EF_MAX - scheduler.EF_MIN) * 9.0, 1.0, 10.0
+        )
+        missing = np.isnan(stability) | np.isnan(difficulty)
+        legacy_stability = np.where(is_learning, w[2], np.maximum(interval, MIN_STABILITY))
+        stability = np.where(is_new, fsrs_init_stability(grade, w), np.where(missing, legacy_stability, stability))
+        difficulty = np.where(is_new, fsrs_init_difficulty(grade, w), np.where(missing, from_ease, difficulty))
+
+        # Review answers update the memory state
+        is_review = ~is_new & ~is_learning
+        reviewed_s, reviewed_d = fsrs_review(stability, difficulty, np.maximum(elapsed, 0.0), grade, w)
+        stability = np.where(is_review, reviewed_s, stability)
+        difficulty = np.where(is_review, reviewed_d, difficulty)
+
+        # Learning steps: Again restarts them, Good advances (graduating
+        # after the last step), Easy graduates
+        again = grade == 1
+        next_step = step + 1
+        in_steps = is_learning & (grade == 3) & (next_step < len(self.step_days))
+        stays_learning = (is_new & again) | (is_learning & again) | in_steps
+        learning_days = np.where(
+            again, self.step_days[0], self.step_days[np.clip(next_step, 0, len(self.step_days) - 1)]
+        )
+
+        days = np.where(stays_learning, learning_days, self._interval(stability))
+        return FSRSArrays(
+            state=np.where(stays_learning, "learning", "review").astype(object),
+            days=days,
+            learning_step=np.where(stays_learning & ~again, next_step, 0),
+            stability=stability,
+            difficulty=difficulty,
+        )
+
+    def _arrays(self, sched_states: Sequence[Optional[SchedState]], now: datetime):
+        count = len(sched_states)
+        state = np.empty(count, dtype=object)
+        interval = np.zeros(count)
+        ease = np.full(count, scheduler.EF_INITIAL)
+        step = np.zeros(count, dtype=np.int64)
+        stability = np.full(count, np.nan)
+        difficulty = np.full(count, np.nan)
+        elapsed = np.zeros(count)
+        for i, sched in enumerate(sched_states):
+            if sched is None:
+                state[i] = "new"
+                continue
+            state[i] = sched.state
+            interval[i] = sched.interval_days
+            ease[i] = sched.ease_factor
+            step[i] = sched.learning_step
+            if sched.stability is not None:
+                stability[i] = sched.stability
+            if sched.difficulty is not None:
+                difficulty[i] = sched.difficulty
+            # The last review was one interval before the due date
+            last_review = sched.due_at - timedelta(days=sched.interval_days)
+            elapsed[i] = (now - last_review).total_seconds() / SECONDS_PER_DAY
+        return state, interval, ease, step, stability, difficulty, elapsed
+
+    def next_states(
+        self,
+        sched_states: Sequence[SchedState],
+        ratings: Sequence[str],
+        now: datetime
+    ) -> List[SchedUpdate]:
+        arrays = self._arrays(sched_states, now)
+        grade = np.fromiter((GRADES[r] for r in ratings), dtype=np.int64, count=len(ratings))
+        result = self.transition(*arrays, grade)
+        return [
+            SchedUpdate(
+                state=result.state[i],
+                due_at=now + timedelta(days=float(result.days[i])),
+                interval_days=float(result.days[i]) if result.state[i] == "review" else 0.0,
+                ease_factor=sched.ease_factor,
+                learning_step=int(result.learning_step[i]),
+                stability=float(result.stability[i]),
+                difficulty=float(result.difficulty[i]),
+            )
+            for i, sched in enumerate(sched_states)
+        ]
+
+    def next_state(self, sched_state: SchedState, rating: str, now: datetime) -> SchedUpdate:
+        return self.next_states([sched_state], [rating], now)[0]
+
+    def preview(self, sched_states: Sequence[Optional[SchedState]], now: datetime) -> Dict[str, np.ndarray]:
+        arrays = self._arrays(sched_states, now)
+        return {
+            rating: self.transition(*arrays, np.full(len(sched_states), grade, dtype=np.int64)).days
+            for rating, grade in GRADES.items()
+        }
+
+
+def parse_learning_steps(text: Optional[str]) -> Tuple[int, ...]:
+    """UserSettings.learning_steps ("10,1440") as minutes; defaults if invalid."""
+    try:
+        steps = tuple(int(part) for part in (text or "").split(",") if part.strip())
+    except ValueError:
+        steps = ()
+    if not steps or any(step <= 0 for step in steps):
+        return tuple(scheduler.LEARNING_STEPS_MINUTES)
+    return steps
+
+
+def sm2_params(settings: Optional[UserSettings]) -> "scheduler.SM2Params":
+    """The user's SM-2 parameters; unset values fall back to the module constants."""
+    if settings is None:
+        return scheduler.DEFAULT_SM2_PARAMS
+    defaults = scheduler.DEFAULT_SM2_PARAMS
+    return scheduler.SM2Params(
+        ef_initial=settings.sm2_ef_initial or defaults.ef_initial,
+        lapse_multiplier=settings.sm2_lapse_multiplier or defaults.lapse_multiplier,
+        easy_bonus=settings.sm2_easy_bonus or defaults.easy_bonus,
+        learning_steps_minutes=parse_learning_steps(settings.learning_steps),
+    )
+
+
+def make_engine(name: Optional[str], settings: Optional[UserSettings] = None) -> SchedulerEngine:
+    """Build an engine by name with the user's parameters (if settings are given)."""
+    if name == "fsrs":
+        if settings is None:
+            return FSRSEngine()
+        return FSRSEngine(
+            weights=settings.fsrs_weights,
+            desired_retention=settings.fsrs_desired_retention or FSRS_DEFAULT_RETENTION,
+            learning_steps_minutes=parse_learning_steps(settings.learning_steps)
+        )
+    return SM2Engine(sm2_params(settings))
+
+
+class UserEngines(NamedTuple):
+    """A user's engines by name, default engine and per-deck overrides."""
+    default_name: str
+    by_name: Dict[str, SchedulerEngine]
+    overrides: Dict[int, str]
+
+    def for_deck(self, deck_id: int) -> SchedulerEngine:
+        name = self.overrides.get(deck_id) or self.default_name
+        return self.by_name.get(name) or self.by_name[DEFAULT_ENGINE]
+
+
+engine_cache = VersionedUserCache()
+
+
+def get_user_engines(db: Session, user_id: int) -> UserEngines:
+    """The user's engines, loaded with two queries on a miss."""
+    cached = engine_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    version = engine_cache.version(user_id)
+    settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
+    overrides = dict(db.query(Deck.id, Deck.scheduler_engine).filter(
+        Deck.user_id == user_id,
+        Deck.scheduler_engine.isnot(None)
+    ).all())
+    entry = UserEngines(
+        default_name=(settings.scheduler_engine if settings else None) or DEFAULT_ENGINE,
+        by_name={name: make_engine(name, settings) for name in ENGINES},
+        overrides=overrides,
+    )
+    engine_cache.store(user_id, version, entry)
+    return entry
+
+
+def get_engines(db: Session, user_id: int, deck_ids: Sequence[int]) -> Dict[int, SchedulerEngine]:
+    """Engine per deck: the deck's override, else the user's default."""
+    engines = get_user_engines(db, user_id)
+    return {deck_id: engines.for_deck(deck_id) for deck_id in deck_ids}
+
+
+def get_engine(db: Session, user_id: int, deck_id: int) -> SchedulerEngine:
+    """Engine used for cards of one deck."""
+    return get_user_engines(db, user_id).for_deck(deck_id)
@@ -0,0 +1,173 @@
+"""
+Closed-day cache for daily stats (REQ-9).
+
+/api/stats/retention and /api/stats/sessions read per-day rows (rollup
+rating totals, daily counters). Days that are over never change, so each
+(user, kind, deck) entry keeps the closed days it has loaded; a request
+then only queries the still-open days and, on a longer range than the
+entry covers, reloads once to extend it.
+
+"Open" means the last OPEN_DAYS days before the current UTC day onwards:
+review days are UTC but daily counters are keyed by the user's local date,
+which can trail UTC by up to a day.
+
+Entries are LRU-evicted beyond MAX_ENTRIES. Writes that land on a closed
+day invalidate the user (call after committing):
+
+- the scheduler calls note_review() for every logged review (a no-op for
+  reviews in the open window, i.e. all live answers);
+- card and deck deletion (which drop their reviews from the rollup) and
+  card moves (which move them to another deck's rows) call invalidate().
+
+The cache is per process: after rebuilding the rollup from the command line
+(app.services.review_rollup), restart the API to drop cached days.
+"""
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.database import DailyCounter
+from app.services.limits_cache import VersionedUserCache
+from app.services.review_rollup import DailyRatingTotals, daily_rating_totals, day_start
+
+OPEN_DAYS = 1
+MAX_ENTRIES = 512
+
+RATINGS = "ratings"
+COUNTERS = "counters"
+
+# (user_id, kind, deck_id)
+CacheKey = Tuple[int, str, Optional[int]]
+
+
+class DailyCounterRow(NamedTuple):
+    """Counters for one day (DailyCounter, detached)."""
+    date: datetime
+    reviews_done: int
+    introduced_new: int
+
+
+@dataclass(frozen=True)
+class ClosedDays:
+    """Rows for days in [covered_from, open_from), oldest first."""
+    covered_from: datetime
+    open_from: datetime
+    days: List[datetime]
+    rows: list
+
+
+def open_from(now: Optional[datetime] = None) -> datetime:
+    """First day that may still change."""
+    return day_start(now or datetime.utcnow()) - timedelta(days=OPEN_DAYS)
+
+
+class ClosedDayCache(VersionedUserCache):
+    """LRU of ClosedDays entries with per-user version stamps."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, **options):
+        super().__init__(**options)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, ClosedDays]" = OrderedDict()
+
+    def get(self, key: CacheKey) -> Optional[ClosedDays]:
+        with self._lock:
+            self._expire(key[0])
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def note_review(self, user_id: int, reviewed_at: datetime) -> None:
+        """A review was logged (call after committing); invalidates if its day is closed."""
+        if day_start(reviewed_at) < open_from():
+            self.invalidate(user_id)
+
+    def _owner(self, key: CacheKey) -> int:
+        return key[0]
+
+    def _put(self, key: CacheKey, entry: ClosedDays) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _drop(self, user_id: int) -> None:
+        for key in [key for key in self._entries if key[0] == user_id]:
+            del self._entries[key]
+
+
+closed_days = ClosedDayCache()
+
+
+def _cached_rows(
+    key: CacheKey,
+    since: datetime,
+    load: Callable[[datetime, Optional[datetime]], list],
+    now: Optional[datetime] = None
+) -> list:
+    """
+    Rows from since's day on: closed days from the cache (loading them on a
+    miss), open days from load(start, None). load(start, end) returns rows
+    for days in [start, end), oldest first, each with a .date.
+    """
+    first_day = day_start(since)
+    boundary = open_from(now)
+    entry = closed_days.get(key)
+    if entry is None or entry.open_from != boundary or entry.covered_from > first_day:
+        version = closed_days.version(key[0])
+        rows = load(first_day, boundary) if first_day < boundary else []
+        entry = ClosedDays(first_day, boundary, [row.date for row in rows], rows)
+        closed_days.store(key, version, entry)
+
+    closed = entry.rows[bisect_left(entry.days, first_day):]
+    return closed + load(max(first_day, boundary), None)
+
+
+def cached_daily_rating_totals(
+    db: Session,
+    user_id: int,
+    since: datetime,
+    deck_id: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> List[DailyRatingTotals]:
+    """daily_rating_totals with closed days served from the cache."""
+    return _cached_rows(
+        (user_id, RATINGS, deck_id),
+        since,
+        lambda start, end: daily_rating_totals(db, user_id, start, deck_id=deck_id, until=end),
+        now
+    )
+
+
+def _load_counters(
+    db: Session,
+    user_id: int,
+    start: datetime,
+    end: Optional[datetime]
+) -> List[DailyCounterRow]:
+    query = db.query(DailyCounter.date, DailyCounter.reviews_done, DailyCounter.introduced_new).filter(
+        DailyCounter.user_id == user_id,
+        DailyCounter.date >= start
+    )
+    if end is not None:
+        query = query.filter(DailyCounter.date < end)
+    return [DailyCounterRow(*row) for row in query.order_by(DailyCounter.date).all()]
+
+
+def cached_daily_counters(
+    db: Session,
+    user_id: int,
+    since: datetime,
+    now: Optional[datetime] = None
+) -> List[DailyCounterRow]:
+    """The user's DailyCounter rows from since's day on, closed days from the cache."""
+    return _cached_rows(
+        (user_id, COUNTERS, None),
+        since,
+        lambda start, end: _load_counters(db, user_id, start, end),
+        now
+    )
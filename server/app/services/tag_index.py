@@ -0,0 +1,267 @@
+"""
+Tag card counts and tag queries (REQ-3, REQ-8).
+
+Counts come from one GROUP BY over card_tags instead of loading each tag's
+Card collection.
+
+Tag filters are resolved against an in-process per-user index (tag_id ->
+sorted array of card ids, plus all card ids for NOT) before any card query
+runs. Expressions combine tag names with AND, OR, NOT and parentheses, e.g.
+`verbs AND (n5 OR n4) AND NOT "needs review"`; each operator is one numpy
+set operation on sorted id arrays.
+
+The index is loaded per user on first use (three narrow queries) and kept
+warm by the card write paths:
+
+- create/update call set_card_tags() and delete calls remove_card() after
+  committing, which patch the cached arrays in place.
+- Writes that change many cards or tag names (tag create/rename/delete,
+  deck delete, imports) call invalidate().
+
+The index is a VersionedUserCache (app.services.limits_cache) entry. Cached
+arrays are never mutated; writers swap in new ones, so readers need no lock.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.database import Card, Tag, card_tags
+from app.services.limits_cache import VersionedUserCache
+
+_EMPTY = np.empty(0, dtype=np.int64)
+_OPERATORS = ("AND", "OR", "NOT")
+
+# Parsed expression: a tag name, or (operator, operand, ...) tuples
+TagExpr = Union[str, Tuple]
+
+
+def tag_card_counts(
+    db: Session,
+    user_id: int,
+    tag_ids: Optional[Iterable[int]] = None
+) -> Dict[int, int]:
+    """
+    Number of cards per tag for the user's tags (all tags, or only tag_ids).
+    Tags without cards are omitted.
+    """
+    query = db.query(card_tags.c.tag_id, func.count(card_tags.c.card_id)).join(
+        Tag, Tag.id == card_tags.c.tag_id
+    ).filter(Tag.user_id == user_id)
+    if tag_ids is not None:
+        tag_ids = set(tag_ids)
+        if not tag_ids:
+            return {}
+        query = query.filter(card_tags.c.tag_id.in_(tag_ids))
+    return dict(query.group_by(card_tags.c.tag_id).all())
+
+
+class TagQueryError(ValueError):
+    """Malformed tag query expression."""
+
+
+@dataclass(frozen=True)
+class UserTagIndex:
+    """One user's cards by tag (all arrays sorted, unique int64)."""
+    all_cards: np.ndarray
+    by_tag: Dict[int, np.ndarray]
+    tag_ids_by_name: Dict[str, int]
+
+    def cards(self, tag_id: int) -> np.ndarray:
+        return self.by_tag.get(tag_id, _EMPTY)
+
+    def any_of(self, tag_ids: Iterable[int]) -> np.ndarray:
+        """Cards carrying at least one of the tags."""
+        arrays = [self.cards(tag_id) for tag_id in set(tag_ids)]
+        if not arrays:
+            return _EMPTY
+        return np.unique(np.concatenate(arrays)) if len(arrays) > 1 else arrays[0]
+
+    def evaluate(self, expr: TagExpr) -> np.ndarray:
+        """Card ids matching a parsed expression (unknown tag names match nothing)."""
+        if isinstance(expr, str):
+            return self.cards(self.tag_ids_by_name.get(expr, -1))
+        operator, *operands = expr
+        if operator == "NOT":
+            return np.setdiff1d(self.all_cards, self.evaluate(operands[0]), assume_unique=True)
+        result = self.evaluate(operands[0])
+        for operand in operands[1:]:
+            if operator == "AND":
+                if len(result) == 0:
+                    break
+                result = np.intersect1d(result, self.evaluate(operand), assume_unique=True)
+            else:
+                result = np.union1d(result, self.evaluate(operand))
+        return result
+
+
+def _insert(array: np.ndarray, card_id: int) -> np.ndarray:
+    position = int(np.searchsorted(array, card_id))
+    if position < len(array) and array[position] == card_id:
+        return array
+    return np.insert(array, position, card_id)
+
+
+def _remove(array: np.ndarray, card_id: int) -> np.ndarray:
+    position = int(np.searchsorted(array, card_id))
+    if position < len(array) and array[position] == card_id:
+        return np.delete(array, position)
+    return array
+
+
+class TagIndexCache(VersionedUserCache):
+    """Per-user UserTagIndex entries with version stamps."""
+
+    def _patch(self, user_id: int, card_id: int, tag_ids: Optional[Iterable[int]]) -> None:
+        """Set a card's tags (None removes the card)."""
+        with self._lock:
+            self._expire(user_id)
+            self._bump(user_id)
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            wanted = set(tag_ids) if tag_ids is not None else set()
+            if not wanted <= set(entry.tag_ids_by_name.values()):
+                # Tag we have never seen: reload rather than guess its name
+                del self._entries[user_id]
+                return
+
+            by_tag = dict(entry.by_tag)
+            for tag_id, cards in entry.by_tag.items():
+                if tag_id not in wanted:
+                    by_tag[tag_id] = _remove(cards, card_id)
+            for tag_id in wanted:
+                by_tag[tag_id] = _insert(entry.cards(tag_id), card_id)
+            if tag_ids is None:
+                all_cards = _remove(entry.all_cards, card_id)
+            else:
+                all_cards = _insert(entry.all_cards, card_id)
+            self._entries[user_id] = UserTagIndex(all_cards, by_tag, entry.tag_ids_by_name)
+
+    def set_card_tags(self, user_id: int, card_id: int, tag_ids: Iterable[int]) -> None:
+        """Record a created or re-tagged card (call after committing)."""
+        self._patch(user_id, card_id, list(tag_ids))
+
+    def remove_card(self, user_id: int, card_id: int) -> None:
+        """Forget a deleted card (call after committing)."""
+        self._patch(user_id, card_id, None)
+
+
+card_tag_index = TagIndexCache()
+
+
+def get_user_index(db: Session, user_id: int) -> UserTagIndex:
+    """The user's tag index, loaded with three narrow queries on a miss."""
+    cached = card_tag_index.get(user_id)
+    if cached is not None:
+        return cached
+
+    version = card_tag_index.version(user_id)
+    all_cards = np.fromiter(
+        (row[0] for row in db.query(Card.id).filter(Card.user_id == user_id).order_by(Card.id)),
+        dtype=np.int64
+    )
+    pairs = np.array(
+        db.query(card_tags.c.tag_id, card_tags.c.card_id).join(
+            Card, Card.id == card_tags.c.card_id
+        ).filter(Card.user_id == user_id).order_by(card_tags.c.tag_id, card_tags.c.card_id).all(),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    tag_ids, starts = np.unique(pairs[:, 0], return_index=True)
+    by_tag = {
+        int(tag_id): cards
+        for tag_id, cards in zip(tag_ids, np.split(pairs[:, 1], starts[1:]))
+    }
+    names = dict(db.query(Tag.name, Tag.id).filter(Tag.user_id == user_id).all())
+
+    entry = UserTagIndex(all_cards, by_tag, names)
+    card_tag_index.store(user_id, version, entry)
+    return entry
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    """Split into ("op", AND|OR|NOT), ("(", ...), (")", ...) and ("name", tag) tokens."""
+    tokens = []
+    position = 0
+    while position < len(expression):
+        char = expression[position]
+        if char.isspace():
+            position += 1
+        elif char in "()":
+            tokens.append((char, char))
+            position += 1
+        elif char == '"':
+            end = expression.find('"', position + 1)
+            if end < 0:
+                raise TagQueryError("Unterminated quote in tag query")
+            tokens.append(("name", expression[position + 1:end]))
+            position = end + 1
+        else:
+            end = position
+            while end < len(expression) and not expression[end].isspace() and expression[end] not in '()"':
+                end += 1
+            word = expression[position:end]
+            kind = "op" if word.upper() in _OPERATORS else "name"
+            tokens.append((kind, word.upper() if kind == "op" else word))
+            position = end
+    return tokens
+
+
+@lru_cache(maxsize=256)
+def parse_tag_query(expression: str) -> TagExpr:
+    """
+    Parse a tag query. Precedence: NOT, then AND, then OR; operators are
+    case-insensitive and names containing spaces or parentheses are quoted.
+
+    Raises:
+        TagQueryError: If the expression is empty or malformed
+    """
+    tokens = _tokenize(expression)
+    position = 0
+
+    def peek() -> Optional[Tuple[str, str]]:
+        return tokens[position] if position < len(tokens) else None
+
+    def binary(operator: str, operand):
+        nonlocal position
+        operands = [operand()]
+        while peek() == ("op", operator):
+            position += 1
+            operands.append(operand())
+        return operands[0] if len(operands) == 1 else (operator, *operands)
+
+    def unary():
+        nonlocal position
+        token = peek()
+        if token is None:
+            raise TagQueryError("Tag query ended unexpectedly")
+        position += 1
+        if token == ("op", "NOT"):
+            return ("NOT", unary())
+        if token[0] == "name":
+            return token[1]
+        if token[0] == "(":
+            inner = binary("OR", lambda: binary("AND", unary))
+            if peek() != (")", ")"):
+                raise TagQueryError("Missing ) in tag query")
+            position += 1
+            return inner
+        raise TagQueryError(f"Unexpected '{token[1]}' in tag query")
+
+    expr = binary("OR", lambda: binary("AND", unary))
+    if position != len(tokens):
+        raise TagQueryError(f"Unexpected '{tokens[position][1]}' in tag query")
+    return expr
+
+
+def resolve_tag_query(db: Session, user_id: int, expression: str) -> np.ndarray:
+    """
+    Sorted ids of the user's cards matching a tag query expression.
+
+    Raises:
+        TagQueryError: If the expression is malformed
+    """
+    return get_user_index(db, user_id).evaluate(parse_tag_query(expression))
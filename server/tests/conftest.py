@@ -9,8 +9,15 @@ from datetime import datetime
 
 from app.db.session import Base
 from app.main import app
+from app.api.deps import resolve_principal, user_cache
+from app.services.limits_cache import limits_cache
+from app.services.load_balancer import due_histograms
+from app.services.scheduler_engines import engine_cache
+from app.services.tag_index import card_tag_index
+from app.services.data_version import data_versions
+from app.services.stats_cache import closed_days
 from app.core.config import settings
-from app.models.database import User, UserSettings
+from app.models.database import ReviewLog, User, UserSettings
 
 # Test database URL
 TEST_DATABASE_URL = "sqlite:///./test.db"
@@ -25,8 +32,15 @@ def db():
     """
     Create a fresh database for each test.
     """
-    # Create tables
+    # Create tables (and forget anything cached from a previous test database)
     Base.metadata.create_all(bind=engine)
+    user_cache.invalidate()
+    limits_cache.clear()
+    due_histograms.clear()
+    engine_cache.clear()
+    card_tag_index.clear()
+    data_versions.clear()
+    closed_days.clear()
     
     # Create session
     session = TestingSessionLocal()
@@ -66,7 +80,7 @@ def client(db):
     """
     Create a test client with dependency override.
     """
-    from app.db.session import get_db
+    from app.db.session import get_db, get_read_db
     
     def override_get_db():
         try:
@@ -75,6 +89,9 @@ def client(db):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    # Requests act as the fixture's test_user
+    app.dependency_overrides[resolve_principal] = lambda: "test_user"
     
     with TestClient(app) as test_client:
         yield test_client
@@ -86,3 +103,25 @@ def client(db):
 def test_user(db):
     """Get the default test user."""
     return db.query(User).filter(User.username == "test_user").first()
+
+
+@pytest.fixture
+def add_review(db):
+    """
+    Factory that adds a ReviewLog (not committed): a Good answer on a review
+    card by default; keyword arguments override any column.
+    """
+    def add(user_id, card_id, reviewed_at, rating="good", **fields):
+        values = {
+            "state_before": "review",
+            "state_after": "review",
+            "interval_before": 1.0,
+            "interval_after": 6.0,
+            "ease_factor_before": 2.5,
+            "ease_factor_after": 2.5,
+            **fields
+        }
+        log = ReviewLog(card_id=card_id, user_id=user_id, rating=rating, reviewed_at=reviewed_at, **values)
+        db.add(log)
+        return log
+    return add
@@ -0,0 +1,113 @@
+"""
+Tests for the columnar review analytics (app.services.analytics).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.database import Card, Deck
+from app.services import analytics
+
+
+@pytest.fixture
+def cards(db, test_user):
+    """Two decks with one card each."""
+    result = []
+    for name in ["Deck A", "Deck B"]:
+        deck = Deck(user_id=test_user.id, name=name)
+        db.add(deck)
+        db.flush()
+        card = Card(user_id=test_user.id, deck_id=deck.id, front=name, back=name)
+        db.add(card)
+        db.flush()
+        result.append(card)
+    db.commit()
+    return result
+
+
+@pytest.fixture
+def history(db, test_user, cards, add_review):
+    """
+    Card A: new -> +1 day good -> +6 days again -> +1 day good
+    Card B: new -> +2 days good (ease 2.8)
+    Inserted out of order to exercise the lexsort.
+    """
+    start = datetime(2026, 1, 1, 9, 0)
+    card_a, card_b = cards
+    add_review(test_user.id, card_a.id, start + timedelta(days=7), "again", interval_before=6.0, ease_factor_after=2.3)
+    add_review(test_user.id, card_b.id, start + timedelta(days=2), "good", interval_before=1.0, ease_factor_after=2.8)
+    add_review(test_user.id, card_a.id, start, "good", state_before="new", interval_before=0.0)
+    add_review(test_user.id, card_a.id, start + timedelta(days=1), "good", interval_before=1.0)
+    add_review(test_user.id, card_b.id, start, "easy", state_before="new", interval_before=0.0)
+    add_review(test_user.id, card_a.id, start + timedelta(days=8), "good", interval_before=1.0, ease_factor_after=2.3)
+    db.commit()
+    return cards
+
+
+def _by_bucket(rows):
+    return {row["bucket"]: (row["reviews"], row["retention_rate"]) for row in rows if row["reviews"]}
+
+
+def test_load_review_columns_sorted_by_card_then_time(db, test_user, history):
+    columns = analytics.load_review_columns(db, test_user.id, chunk_size=2)
+
+    assert len(columns) == 6
+    card_a, card_b = history
+    assert columns.card_id.tolist() == [card_a.id] * 4 + [card_b.id] * 2
+    assert (columns.reviewed_at[:4] == sorted(columns.reviewed_at[:4])).all()
+    assert columns.rating.tolist()[:4] == [1, 1, 0, 1]
+
+
+def test_load_review_columns_filters_deck(db, test_user, history):
+    columns = analytics.load_review_columns(db, test_user.id, deck_id=history[1].deck_id)
+
+    assert columns.card_id.tolist() == [history[1].id] * 2
+
+
+def test_forgetting_curve_buckets_elapsed_days(db, test_user, history):
+    columns = analytics.load_review_columns(db, test_user.id)
+
+    assert _by_bucket(analytics.forgetting_curve(columns)) == {
+        "1": (2, 100.0),     # A day 1 good, A day 8 good
+        "2": (1, 100.0),     # B day 2 good
+        "5-7": (1, 0.0),     # A day 7 again
+    }
+
+
+def test_retention_by_interval(db, test_user, history):
+    columns = analytics.load_review_columns(db, test_user.id)
+
+    assert _by_bucket(analytics.retention_by_interval(columns)) == {
+        "1-2": (3, 100.0),
+        "3-6": (1, 0.0),
+    }
+
+
+def test_ease_distribution_uses_latest_review(db, test_user, history):
+    result = analytics.ease_distribution(analytics.load_review_columns(db, test_user.id))
+
+    assert result["cards"] == 2
+    assert result["mean"] == pytest.approx(2.55)
+    non_empty = [(b["min_ease"], b["cards"]) for b in result["bins"] if b["cards"]]
+    assert non_empty == [(2.3, 1), (2.8, 1)]
+
+
+def test_empty_history(db, test_user):
+    columns = analytics.load_review_columns(db, test_user.id)
+
+    assert len(columns) == 0
+    assert all(row["reviews"] == 0 for row in analytics.forgetting_curve(columns))
+    assert analytics.ease_distribution(columns)["mean"] is None
+
+
+def test_analytics_endpoints(client, db, test_user, history):
+    curve = client.get("/api/stats/analytics/forgetting-curve")
+    ease = client.get("/api/stats/analytics/ease-distribution")
+    by_interval = client.get(f"/api/stats/analytics/retention-by-interval?deck_id={history[0].deck_id}")
+
+    assert curve.status_code == 200
+    assert curve.json()["total_reviews"] == 6
+    assert ease.status_code == 200
+    assert ease.json()["cards"] == 2
+    assert by_interval.status_code == 200
+    assert _by_bucket(by_interval.json()["buckets"]) == {"1-2": (2, 100.0), "3-6": (1, 0.0)}
@@ -422,3 +422,122 @@ def test_suspend_card_not_found(client, test_user):
     response = client.patch("/api/cards/999/suspend?suspend=true")
     
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def _bulk_cards(client, deck, count=4, tag_ids=()):
+    return [
+        client.post(
+            "/api/cards/",
+            json={"deck_id": deck["id"], "front": f"Card {i}", "back": "Back", "tag_ids": list(tag_ids)}
+        ).json()["id"]
+        for i in range(count)
+    ]
+
+
+def test_bulk_suspend_and_move_by_ids(client, test_user, test_deck):
+    """Bulk suspend/move by card ids (REQ-2, REQ-7)."""
+    card_ids = _bulk_cards(client, test_deck)
+    other = client.post("/api/decks/", json={"name": "Other"}).json()
+    
+    response = client.post("/api/cards/bulk", json={"operation": "suspend", "card_ids": card_ids[:3] + [99999]})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"operation": "suspend", "matched": 3, "affected": 3}
+    
+    # Already-suspended cards are matched but not changed
+    again = client.post("/api/cards/bulk", json={"operation": "suspend", "card_ids": card_ids}).json()
+    assert (again["matched"], again["affected"]) == (4, 1)
+    
+    moved = client.post(
+        "/api/cards/bulk", json={"operation": "move", "card_ids": card_ids[:2], "deck_id": other["id"]}
+    ).json()
+    assert moved["affected"] == 2
+    assert client.get(f"/api/cards/{card_ids[0]}").json()["deck_id"] == other["id"]
+    assert client.get(f"/api/cards/{card_ids[0]}").json()["suspended"] is True
+
+
+def test_bulk_tags_and_delete_by_filter(client, test_user, test_deck):
+    """Bulk tag/untag/delete selected by a browse filter (REQ-3, REQ-8)."""
+    verbs = client.post("/api/tags/", json={"name": "verbs"}).json()
+    n5 = client.post("/api/tags/", json={"name": "n5"}).json()
+    tagged = _bulk_cards(client, test_deck, count=3, tag_ids=[verbs["id"]])
+    plain = _bulk_cards(client, test_deck, count=2)
+    
+    added = client.post(
+        "/api/cards/bulk",
+        json={"operation": "add_tags", "card_ids": tagged + plain, "tag_ids": [verbs["id"], n5["id"]]}
+    ).json()
+    # 2 missing verbs links + 5 n5 links
+    assert added["affected"] == 7
+    assert client.get(f"/api/tags/{n5['id']}").json()["card_count"] == 5
+    assert client.get("/api/cards/", params={"tag_query": "verbs AND n5"}).json()["total"] == 5
+    
+    removed = client.post(
+        "/api/cards/bulk",
+        json={"operation": "remove_tags", "filter": {"tag_query": "n5"}, "tag_ids": [n5["id"]]}
+    ).json()
+    assert (removed["matched"], removed["affected"]) == (5, 5)
+    
+    client.post("/api/cards/bulk", json={"operation": "suspend", "card_ids": plain})
+    deleted = client.post(
+        "/api/cards/bulk", json={"operation": "delete", "filter": {"state": "new", "suspended": True}}
+    ).json()
+    assert (deleted["matched"], deleted["affected"]) == (2, 2)
+    
+    remaining = client.get("/api/cards/").json()
+    assert sorted(card["id"] for card in remaining["cards"]) == sorted(tagged)
+    assert client.get(f"/api/tags/{verbs['id']}").json()["card_count"] == 3
+
+
+def test_bulk_validation(client, test_user, test_deck):
+    """Bulk requests need one selection and the operation's arguments."""
+    card_ids = _bulk_cards(client, test_deck, count=1)
+    
+    assert client.post("/api/cards/bulk", json={"operation": "suspend"}).status_code == 400
+    assert client.post(
+        "/api/cards/bulk", json={"operation": "suspend", "card_ids": card_ids, "filter": {}}
+    ).status_code == 400
+    assert client.post("/api/cards/bulk", json={"operation": "move", "card_ids": card_ids}).status_code == 400
+    assert client.post(
+        "/api/cards/bulk", json={"operation": "move", "card_ids": card_ids, "deck_id": 99999}
+    ).status_code == 404
+    assert client.post(
+        "/api/cards/bulk", json={"operation": "add_tags", "card_ids": card_ids, "tag_ids": [99999]}
+    ).status_code == 404
+    assert client.post("/api/cards/bulk", json={"operation": "explode", "card_ids": card_ids}).status_code == 422
+    
+    empty = client.post("/api/cards/bulk", json={"operation": "delete", "filter": {"tag_query": "missing"}})
+    assert empty.json() == {"operation": "delete", "matched": 0, "affected": 0}
+
+
+def test_batch_create_cards(client, test_user, test_deck):
+    """Batch creation inserts cards, tags and new sched states (REQ-2)."""
+    verbs = client.post("/api/tags/", json={"name": "verbs"}).json()
+    cards = [
+        {"deck_id": test_deck["id"], "front": f"Card {i}", "back": "Back",
+         "tag_ids": [verbs["id"], 99999] if i % 2 == 0 else []}
+        for i in range(500)
+    ]
+    
+    response = client.post("/api/cards/batch", json={"cards": cards})
+    
+    assert response.status_code == status.HTTP_201_CREATED
+    data = response.json()
+    assert data["created"] == 500
+    first = client.get(f"/api/cards/{data['card_ids'][0]}").json()
+    assert first["front"] == "Card 0" and first["state"] == "new"
+    assert [tag["name"] for tag in first["tags"]] == ["verbs"]
+    assert client.get(f"/api/cards/{data['card_ids'][1]}").json()["front"] == "Card 1"
+    assert client.get(f"/api/tags/{verbs['id']}").json()["card_count"] == 250
+    assert client.get("/api/cards/", params={"tag_query": "NOT verbs"}).json()["total"] == 250
+
+
+def test_batch_create_cards_unknown_deck(client, test_user, test_deck):
+    """A batch referencing another user's or a missing deck creates nothing."""
+    cards = [
+        {"deck_id": test_deck["id"], "front": "A", "back": "B"},
+        {"deck_id": 99999, "front": "C", "back": "D"},
+    ]
+    
+    assert client.post("/api/cards/batch", json={"cards": cards}).status_code == status.HTTP_404_NOT_FOUND
+    assert client.post("/api/cards/batch", json={"cards": []}).status_code == 422
+    assert client.get("/api/cards/").json()["total"] == 0
@@ -242,3 +242,96 @@ def test_deck_card_counts(client, test_user):
     # Check count updated
     response = client.get(f"/api/decks/{deck_id}")
     assert response.json()["card_count"] == 2
+
+
+def _deck_with_history(client, db, name, cards=5):
+    """Deck with tagged cards, review logs and a daily deck counter."""
+    from datetime import datetime
+    from app.models.database import DailyDeckCounter, ReviewLog
+    
+    deck_id = client.post("/api/decks/", json={"name": name}).json()["id"]
+    tag_id = client.post("/api/tags/", json={"name": f"{name} tag"}).json()["id"]
+    card_ids = client.post(
+        "/api/cards/batch",
+        json={"cards": [
+            {"deck_id": deck_id, "front": f"F{i}", "back": "B", "tag_ids": [tag_id]} for i in range(cards)
+        ]}
+    ).json()["card_ids"]
+    user_id = client.get(f"/api/decks/{deck_id}").json()["user_id"]
+    db.add_all([
+        ReviewLog(
+            card_id=card_id, user_id=user_id, rating="good", state_before="new",
+            state_after="review", interval_before=0, interval_after=1,
+            ease_factor_before=2.5, ease_factor_after=2.5, reviewed_at=datetime.utcnow()
+        )
+        for card_id in card_ids
+    ])
+    db.add(DailyDeckCounter(user_id=user_id, deck_id=deck_id, date=datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)))
+    db.commit()
+    return deck_id, tag_id, card_ids
+
+
+def _remaining_rows(db, card_ids):
+    from app.models.database import Card, ReviewLog, SchedState, card_tags
+    
+    return (
+        db.query(Card).filter(Card.id.in_(card_ids)).count(),
+        db.query(SchedState).filter(SchedState.card_id.in_(card_ids)).count(),
+        db.query(ReviewLog).filter(ReviewLog.card_id.in_(card_ids)).count(),
+        db.query(card_tags).filter(card_tags.c.card_id.in_(card_ids)).count(),
+    )
+
+
+def test_delete_deck_removes_dependent_rows(client, test_user, db):
+    """Set-based deck deletion removes cards, states, logs, tag links and counters."""
+    from app.models.database import DailyDeckCounter
+    
+    deck_id, tag_id, card_ids = _deck_with_history(client, db, "Doomed")
+    keep_id, _, kept = _deck_with_history(client, db, "Kept", cards=2)
+    
+    assert client.delete(f"/api/decks/{deck_id}").status_code == status.HTTP_204_NO_CONTENT
+    
+    db.expire_all()
+    assert _remaining_rows(db, card_ids) == (0, 0, 0, 0)
+    assert _remaining_rows(db, kept) == (2, 2, 2, 2)
+    assert db.query(DailyDeckCounter).filter(DailyDeckCounter.deck_id == deck_id).count() == 0
+    # The tag survives without cards
+    assert client.get(f"/api/tags/{tag_id}").json()["card_count"] == 0
+
+
+def test_delete_deck_in_background(client, test_user, db):
+    """background=true deletes the deck in chunks in a job (REQ-1)."""
+    from app.services.card_deletion import deletion_jobs
+    
+    deck_id, _, card_ids = _deck_with_history(client, db, "Huge", cards=30)
+    
+    response = client.delete(f"/api/decks/{deck_id}", params={"background": "true"})
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job_id = response.json()["job_id"]
+    
+    deletion_jobs.wait(job_id, timeout=30)
+    job = client.get(f"/api/decks/delete-jobs/{job_id}").json()
+    
+    assert job["status"] == "done", job
+    assert job["result"] == {"deck_id": deck_id, "cards_deleted": 30}
+    db.expire_all()
+    assert _remaining_rows(db, card_ids) == (0, 0, 0, 0)
+    assert client.get(f"/api/decks/{deck_id}").status_code == status.HTTP_404_NOT_FOUND
+    assert client.get("/api/decks/delete-jobs/unknown").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_delete_deck_chunks(db, test_user):
+    """delete_deck works through the cards chunk_size at a time."""
+    from app.models.database import Card, Deck
+    from app.services.card_deletion import delete_deck
+    
+    deck = Deck(user_id=test_user.id, name="Chunked")
+    db.add(deck)
+    db.flush()
+    db.add_all([Card(user_id=test_user.id, deck_id=deck.id, front=f"F{i}", back="B") for i in range(7)])
+    db.commit()
+    deck_id = deck.id
+    
+    assert delete_deck(db, deck_id, chunk_size=3) == 7
+    db.commit()
+    assert db.query(Deck).filter(Deck.id == deck_id).count() == 0
@@ -9,6 +9,10 @@ from sqlalchemy.orm import sessionmaker
 
 from app.main import app
 from app.db.session import Base, get_db
+from app.api.deps import user_cache
+from app.services.limits_cache import limits_cache
+from app.services.load_balancer import due_histograms
+from app.services.scheduler_engines import engine_cache
 from app.models.database import User, UserSettings
 
 # Test database
@@ -37,6 +41,10 @@ def setup_database():
     Base.metadata.drop_all(bind=engine)
     # Then create all tables
     Base.metadata.create_all(bind=engine)
+    user_cache.invalidate()
+    limits_cache.clear()
+    due_histograms.clear()
+    engine_cache.clear()
     yield
     # Clean up after test
     Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,122 @@
+"""
+Tests for Statistics API endpoints.
+"""
+from datetime import datetime, timedelta
+
+from app.models.database import Card, Deck
+from app.api.stats import _calculate_study_streak
+from app.services.review_rollup import rebuild_rollup
+
+
+def _make_card(db, user_id):
+    deck = Deck(user_id=user_id, name="Stats Deck")
+    db.add(deck)
+    db.flush()
+    card = Card(user_id=user_id, deck_id=deck.id, front="Front", back="Back")
+    db.add(card)
+    db.flush()
+    return card
+
+
+def test_study_streak_counts_consecutive_days(db, test_user, add_review):
+    """Streak counts back from today and stops at the first gap."""
+    card = _make_card(db, test_user.id)
+    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for days_ago in [0, 0, 1, 2, 4]:  # gap on day 3
+        add_review(test_user.id, card.id, today_start - timedelta(days=days_ago, hours=-9))
+    db.commit()
+    rebuild_rollup(db, test_user.id)
+
+    assert _calculate_study_streak(db, test_user.id, today_start) == 3
+
+
+def test_study_streak_zero_without_review_today(db, test_user, add_review):
+    """No review today means no current streak."""
+    card = _make_card(db, test_user.id)
+    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    add_review(test_user.id, card.id, today_start - timedelta(hours=2))
+    db.commit()
+    rebuild_rollup(db, test_user.id)
+
+    assert _calculate_study_streak(db, test_user.id, today_start) == 0
+
+
+def test_study_streak_capped_at_365(db, test_user, add_review):
+    """Streaks longer than a year are reported as 365."""
+    card = _make_card(db, test_user.id)
+    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for days_ago in range(400):
+        add_review(test_user.id, card.id, today_start - timedelta(days=days_ago, hours=-12))
+    db.commit()
+    rebuild_rollup(db, test_user.id)
+
+    assert _calculate_study_streak(db, test_user.id, today_start) == 365
+
+
+def test_today_stats_endpoint_reports_streak(client, db, test_user, add_review):
+    """GET /api/stats/today includes the streak and total reviews."""
+    card = _make_card(db, test_user.id)
+    now = datetime.now()
+    add_review(test_user.id, card.id, now)
+    add_review(test_user.id, card.id, now - timedelta(days=1))
+    db.commit()
+    rebuild_rollup(db, test_user.id)
+
+    response = client.get("/api/stats/today")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["study_streak"] == 2
+    assert data["total_reviews"] == 2
+
+
+def test_retention_stats_aggregates_by_day(client, db, test_user, add_review):
+    """Daily retention is computed from per-day rating counts."""
+    card = _make_card(db, test_user.id)
+    day = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=2)
+    for rating in ["good", "easy", "again", "good"]:
+        add_review(test_user.id, card.id, day, rating)
+    add_review(test_user.id, card.id, day + timedelta(days=1), "again")
+    db.commit()
+    rebuild_rollup(db, test_user.id)
+
+    response = client.get("/api/stats/retention?days=7")
+
+    assert response.status_code == 200
+    assert response.json()["daily_stats"] == [
+        {"date": str(day.date()), "retention_rate": 75.0, "total_reviews": 4},
+        {"date": str((day + timedelta(days=1)).date()), "retention_rate": 0.0, "total_reviews": 1},
+    ]
+
+
+def test_session_stats_performance_trends(client, db, test_user, add_review):
+    """Rating percentages and trend come from grouped counts."""
+    card = _make_card(db, test_user.id)
+    now = datetime.now()
+    # Older reviews: 1/2 successful; recent reviews: 2/2 successful
+    add_review(test_user.id, card.id, now - timedelta(days=10), "again")
+    add_review(test_user.id, card.id, now - timedelta(days=10), "good")
+    add_review(test_user.id, card.id, now - timedelta(days=1), "good")
+    add_review(test_user.id, card.id, now - timedelta(days=1), "easy")
+    db.commit()
+    rebuild_rollup(db, test_user.id)
+
+    response = client.get("/api/stats/sessions?days=30")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["performance_trends"] == {
+        "again_percentage": 25.0,
+        "good_percentage": 50.0,
+        "easy_percentage": 25.0,
+        "improvement_trend": "improving"
+    }
+    assert data["section_completions"]["review_section_completions"] == 4
+    assert data["section_completions"]["total_section_attempts"] == 4
+
+
+def test_stats_days_must_be_in_range(client):
+    for path in ("/api/stats/retention", "/api/stats/sessions", "/api/stats/analytics/forgetting-curve"):
+        assert client.get(f"{path}?days=0").status_code == 422
+        assert client.get(f"{path}?days=100000000").status_code == 422
+        assert client.get(f"{path}?days=7").status_code == 200
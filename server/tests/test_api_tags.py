@@ -126,6 +126,31 @@ def test_tag_card_count(client, test_user):
     assert response.json()["card_count"] == 2
 
 
+def test_tag_counts_in_list_and_card_responses(client, test_user):
+    """Tag list and card responses carry real card counts (REQ-3)."""
+    common = client.post("/api/tags/", json={"name": "common"}).json()
+    rare = client.post("/api/tags/", json={"name": "rare"}).json()
+    client.post("/api/tags/", json={"name": "unused"})
+    deck = client.post("/api/decks/", json={"name": "Test Deck"}).json()
+    
+    for i in range(3):
+        tag_ids = [common["id"], rare["id"]] if i == 0 else [common["id"]]
+        client.post(
+            "/api/cards/",
+            json={"deck_id": deck["id"], "front": f"Card {i}", "back": "Back", "tag_ids": tag_ids}
+        )
+    
+    tags = {t["name"]: t["card_count"] for t in client.get("/api/tags/").json()["tags"]}
+    assert tags == {"common": 3, "rare": 1, "unused": 0}
+    
+    cards = client.get("/api/cards/").json()["cards"]
+    counts = {t["name"]: t["card_count"] for card in cards for t in card["tags"]}
+    assert counts == {"common": 3, "rare": 1}
+    
+    card = client.get(f"/api/cards/{cards[0]['id']}").json()
+    assert all(t["card_count"] == counts[t["name"]] for t in card["tags"])
+
+
 def test_delete_tag(client, test_user):
     """Test deleting a tag (REQ-3)."""
     # Create tag
@@ -0,0 +1,64 @@
+"""
+Tests for engine configuration in app.db.session.
+"""
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.db.session import configure_sqlite_pragmas, engine_options
+
+
+def test_engine_options_file_sqlite_uses_pool_settings():
+    """File-based SQLite gets the configured QueuePool sizing and no echo."""
+    options = engine_options("sqlite:///./kotoba_dojo.db")
+
+    assert options["pool_size"] == settings.db_pool_size
+    assert options["max_overflow"] == settings.db_max_overflow
+    assert options["pool_recycle"] == settings.db_pool_recycle
+    assert options["echo"] is settings.sql_echo
+    assert "connect_args" not in options
+
+
+def test_engine_options_memory_sqlite_skips_pool_sizing():
+    """In-memory SQLite uses a singleton pool, so sizing is left out."""
+    options = engine_options("sqlite:///:memory:")
+
+    assert "pool_size" not in options
+    create_engine("sqlite:///:memory:", **options).dispose()
+
+
+def test_engine_options_postgres_statement_timeout(monkeypatch):
+    """statement_timeout is passed per connection."""
+    monkeypatch.setattr(settings, "db_statement_timeout_ms", 2500)
+
+    options = engine_options("postgresql://u:p@localhost/db")
+
+    assert options["connect_args"] == {"options": "-c statement_timeout=2500"}
+
+
+def test_sqlite_pragmas_applied_on_connect(tmp_path):
+    """WAL, synchronous and busy_timeout are set on every new connection."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    configure_sqlite_pragmas(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == settings.sqlite_busy_timeout_ms
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == settings.sqlite_cache_size
+
+    engine.dispose()
+
+
+def test_threadpool_size_applied_at_startup(monkeypatch):
+    """The lifespan sizes AnyIO's worker thread limiter from settings."""
+    from anyio import to_thread
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    monkeypatch.setattr(settings, "api_threadpool_size", 64)
+
+    with TestClient(app) as client:
+        tokens = client.portal.call(lambda: to_thread.current_default_thread_limiter().total_tokens)
+
+    assert tokens == 64
@@ -0,0 +1,98 @@
+"""
+Tests for per-user data versions and conditional GETs on polled endpoints.
+"""
+import pytest
+
+from app.core.config import settings
+from app.services.data_version import data_versions
+
+
+POLLED = ["/api/decks/", "/api/review/stats", "/api/stats/today", "/api/settings"]
+
+
+@pytest.mark.parametrize("path", POLLED)
+def test_matching_etag_returns_304(client, test_user, path):
+    first = client.get(path)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+
+    cached = client.get(path, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+    assert client.get(path, headers={"If-None-Match": 'W/"stale"'}).status_code == 200
+    assert client.get(path, headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+
+
+def test_writes_change_etags(client, test_user):
+    etag = client.get("/api/decks/").headers["etag"]
+
+    deck = client.post("/api/decks/", json={"name": "New"}).json()
+    fresh = client.get("/api/decks/", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert [d["name"] for d in fresh.json()["decks"]] == ["New"]
+
+    etag = fresh.headers["etag"]
+    client.post("/api/cards/", json={"deck_id": deck["id"], "front": "F", "back": "B"})
+    assert client.get("/api/decks/", headers={"If-None-Match": etag}).status_code == 200
+
+    settings_etag = client.get("/api/settings").headers["etag"]
+    assert client.put("/api/settings", json={"new_per_day": 5}).status_code == 200
+    assert client.get("/api/settings", headers={"If-None-Match": settings_etag}).status_code == 200
+
+
+def test_failed_and_unmatched_writes_keep_etags(client, test_user):
+    etag = client.get("/api/decks/").headers["etag"]
+    version = data_versions.version(test_user.id)
+
+    assert client.post("/api/no-such-endpoint").status_code == 404
+    assert client.post("/api/decks/", json={}).status_code == 422
+    assert client.delete("/api/decks/999999").status_code == 404
+
+    assert data_versions.version(test_user.id) == version
+    assert client.get("/api/decks/", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_etag_is_per_user_and_per_url(client, test_user):
+    today = client.get("/api/stats/today").headers["etag"]
+    decks = client.get("/api/decks/").headers["etag"]
+    assert today != decks
+
+    data_versions.bump(test_user.id + 1)
+    assert client.get("/api/stats/today", headers={"If-None-Match": today}).status_code == 304
+
+    data_versions.bump_all()
+    assert client.get("/api/stats/today", headers={"If-None-Match": today}).status_code == 200
+
+
+def test_clocked_etag_expires_with_time_bucket(client, test_user, monkeypatch):
+    import app.api.deps as deps
+
+    monkeypatch.setattr(deps, "time", lambda: 1000.0)
+    etag = client.get("/api/review/stats").headers["etag"]
+    monkeypatch.setattr(deps, "time", lambda: 1000.0 + settings.etag_time_bucket_s)
+
+    assert client.get("/api/review/stats", headers={"If-None-Match": etag}).status_code == 200
+    # Settings do not depend on the clock
+    settings_etag = client.get("/api/settings").headers["etag"]
+    monkeypatch.setattr(deps, "time", lambda: 5000.0)
+    assert client.get("/api/settings", headers={"If-None-Match": settings_etag}).status_code == 304
+
+
+def test_not_modified_runs_no_queries(client, test_user, db):
+    from sqlalchemy import event
+
+    etag = client.get("/api/decks/").headers["etag"]
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        assert client.get("/api/decks/", headers={"If-None-Match": etag}).status_code == 304
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert statements == []
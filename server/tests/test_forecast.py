@@ -0,0 +1,155 @@
+"""
+Tests for the review workload forecast (app.services.forecast).
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.models.database import Card, Deck, SchedState
+from app.services import forecast
+
+import scheduler
+
+
+ALWAYS_GOOD = forecast.RatingMix(review=(0.0, 1.0, 0.0), new_easy=0.0)
+
+
+def _cards(due_day, interval, ease, state):
+    state = np.array(state)
+    scheduled = state != "new"
+    return forecast.CardArrays(
+        due_day=np.array(due_day, dtype=np.int32)[scheduled],
+        interval=np.array(interval, dtype=np.float32)[scheduled],
+        ease=np.array(ease, dtype=np.float32)[scheduled],
+        is_learning=state[scheduled] == "learning",
+        new_cards=int((~scheduled).sum()),
+    )
+
+
+def test_review_card_follows_sm2_intervals():
+    """Always-Good review card: day 0, then +round(6*2.5)=15, then +38 (past horizon)."""
+    cards = _cards([0], [6.0], [2.5], ["review"])
+
+    result = forecast.simulate(cards, ALWAYS_GOOD, 30, new_per_day=0, simulations=2, seed=1)
+
+    counts = result["review_counts"]
+    assert counts.shape == (2, 30)
+    assert np.flatnonzero(counts[0]).tolist() == [0, 15]
+    assert (counts[0] == counts[1]).all()
+
+
+def test_lapse_uses_lapse_multiplier():
+    """Always-Again card with a 10-day interval comes back after 5, then 2/3 days."""
+    cards = _cards([0], [10.0], [2.5], ["review"])
+    always_again = forecast.RatingMix(review=(1.0, 0.0, 0.0), new_easy=0.0)
+
+    result = forecast.simulate(cards, always_again, 30, new_per_day=0, simulations=1, seed=1)
+
+    assert np.flatnonzero(result["review_counts"][0]).tolist()[:3] == [0, 5, 7]
+
+
+def test_simulation_uses_user_params():
+    """A lapse multiplier of 0.3 brings the 10-day card back after 3 days."""
+    cards = _cards([0], [10.0], [2.5], ["review"])
+    always_again = forecast.RatingMix(review=(1.0, 0.0, 0.0), new_easy=0.0)
+    params = scheduler.SM2Params(lapse_multiplier=0.3)
+
+    result = forecast.simulate(cards, always_again, 30, new_per_day=0, simulations=1, seed=1, params=params)
+
+    assert np.flatnonzero(result["review_counts"][0]).tolist()[:2] == [0, 3]
+
+
+def test_new_cards_introduced_per_day_limit():
+    """Five new cards at 2/day: introduced on days 0-2, first reviews a day later."""
+    cards = _cards([-1] * 5, [0.0] * 5, [2.5] * 5, ["new"] * 5)
+
+    result = forecast.simulate(cards, ALWAYS_GOOD, 30, new_per_day=2, simulations=1, seed=1)
+
+    assert result["new_counts"][:4].tolist() == [2, 2, 1, 0]
+    assert result["review_counts"][0][:4].tolist() == [0, 2, 2, 1]
+    # Second review after I2 = 6 days
+    assert result["review_counts"][0][7:10].tolist() == [2, 2, 1]
+
+
+def test_learning_cards_graduate():
+    """A due learning card is answered today and reviewed again after I1."""
+    cards = _cards([0], [0.0], [2.5], ["learning"])
+
+    result = forecast.simulate(cards, ALWAYS_GOOD, 30, new_per_day=0, simulations=1, seed=1)
+
+    assert np.flatnonzero(result["review_counts"][0]).tolist()[:3] == [0, 1, 7]
+
+
+def test_forecast_endpoint(client, db, test_user):
+    deck = Deck(user_id=test_user.id, name="Forecast Deck")
+    db.add(deck)
+    db.flush()
+    now = datetime.utcnow()
+    for i in range(10):
+        card = Card(user_id=test_user.id, deck_id=deck.id, front=f"F{i}", back=f"B{i}")
+        db.add(card)
+        db.flush()
+        state = "new" if i < 4 else "review"
+        db.add(SchedState(
+            card_id=card.id,
+            user_id=test_user.id,
+            state=state,
+            due_at=now + timedelta(days=i),
+            interval_days=0.0 if state == "new" else 6.0,
+            ease_factor=2.5
+        ))
+    db.commit()
+
+    response = client.get("/api/stats/forecast?days=60&new_per_day=2")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["days"] == 60
+    assert data["total_cards"] == 10
+    assert len(data["daily"]) == 60
+    assert sum(day["new_cards"] for day in data["daily"]) == 4
+    assert data["total_expected_reviews"] > 0
+    assert all(day["reviews_low"] <= day["expected_reviews"] <= day["reviews_high"] for day in data["daily"])
+
+
+def test_forecast_endpoint_rejects_short_horizon(client):
+    assert client.get("/api/stats/forecast?days=7").status_code == 422
+
+
+def test_forecast_counts_unscheduled_cards_and_skips_fsrs_decks(client, db, test_user):
+    sm2_deck = Deck(user_id=test_user.id, name="SM-2")
+    fsrs_deck = Deck(user_id=test_user.id, name="FSRS", scheduler_engine="fsrs")
+    db.add_all([sm2_deck, fsrs_deck])
+    db.flush()
+    for deck, count in ((sm2_deck, 3), (fsrs_deck, 2)):
+        for i in range(count):
+            db.add(Card(user_id=test_user.id, deck_id=deck.id, front=f"F{i}", back="B"))
+    db.commit()
+
+    data = client.get("/api/stats/forecast?days=30&new_per_day=5").json()
+
+    # Cards without a SchedState are new cards of the SM-2 deck
+    assert data["total_cards"] == 3
+    assert sum(day["new_cards"] for day in data["daily"]) == 3
+    assert data["excluded_fsrs_cards"] == 2
+
+
+def test_load_skips_cards_due_after_horizon(db, test_user):
+    deck = Deck(user_id=test_user.id, name="Horizon")
+    db.add(deck)
+    db.flush()
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    for days in (-3, 5, 29, 30, 200):
+        card = Card(user_id=test_user.id, deck_id=deck.id, front=f"F{days}", back="B")
+        db.add(card)
+        db.flush()
+        db.add(SchedState(
+            card_id=card.id, user_id=test_user.id, state="review",
+            due_at=today + timedelta(days=days, hours=6), interval_days=10.0, ease_factor=2.5
+        ))
+    db.commit()
+
+    cards = forecast.load_card_arrays(db, test_user.id, today, 30)
+
+    assert sorted(cards.due_day.tolist()) == [0, 5, 29]
+    assert forecast.count_cards(db, test_user.id) == (5, 0)
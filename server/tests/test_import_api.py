@@ -9,6 +9,7 @@ from sqlalchemy.orm import sessionmaker
 
 from app.main import app
 from app.db.session import Base, get_db
+from app.api.deps import user_cache
 from app.models.database import User, Deck, Card, Tag
 
 # Test database
@@ -34,6 +35,7 @@ client = TestClient(app)
 def setup_database():
     """Create test database before each test."""
     Base.metadata.create_all(bind=engine)
+    user_cache.invalidate()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -0,0 +1,65 @@
+"""
+Tests for the background job registry shared by deck deletion and the optimizer.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import pytest
+
+from app.services.job_registry import JobRegistry
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _ThreadJobs(JobRegistry):
+    def _create_executor(self):
+        return ThreadPoolExecutor(max_workers=1)
+
+
+def test_finished_jobs_evicted_after_ttl():
+    clock = _Clock()
+    jobs = _ThreadJobs(ttl_seconds=60, clock=clock)
+    try:
+        job_id = jobs._submit(1, lambda: 42, key="deck-1")
+        jobs.wait(job_id, timeout=5)
+
+        assert jobs.status(job_id, 1) == {"job_id": job_id, "status": "done", "result": 42}
+        assert jobs.status(job_id, 2) is None  # not the owner
+
+        clock.now += 59
+        assert jobs.status(job_id, 1) is not None
+        clock.now += 2
+        assert jobs.status(job_id, 1) is None
+        assert len(jobs) == 0 and jobs._by_key == {}
+    finally:
+        jobs.shutdown()
+
+
+def test_unfinished_keyed_job_is_reused_and_kept():
+    clock = _Clock()
+    jobs = _ThreadJobs(ttl_seconds=0, clock=clock)
+    release = Event()
+    try:
+        job_id = jobs._submit(1, release.wait, key="deck-1")
+
+        assert jobs._submit(1, release.wait, key="deck-1") == job_id
+        clock.now += 3600
+        assert jobs.status(job_id, 1)["status"] in ("pending", "running")
+
+        release.set()
+        jobs.wait(job_id, timeout=5)
+        assert jobs._submit(1, lambda: None, key="deck-1") != job_id
+    finally:
+        release.set()
+        jobs.shutdown()
+
+
+def test_registry_requires_an_executor():
+    with pytest.raises(TypeError):
+        JobRegistry()
@@ -0,0 +1,100 @@
+"""
+Tests for the per-user settings/deck limits cache.
+"""
+from app.models.database import Deck, UserSettings
+from app.services.limits_cache import LimitsCache, limits_cache
+
+import queue_builder
+
+
+def test_store_after_invalidation_is_dropped():
+    """A load that raced an invalidation cannot repopulate stale data."""
+    cache = LimitsCache()
+    version = cache.version(1)
+
+    cache.invalidate_settings(1)  # write committed while the load was in flight
+    cache.store_global(1, version, {"new": 5, "review": 50})
+
+    assert cache.get_global(1) is None
+
+
+def test_deck_rows_cached_until_invalidated():
+    """Deck rows are served from cache and dropped by invalidate_decks."""
+    cache = LimitsCache()
+    cache.store_decks(1, cache.version(1), {10: (3, None)})
+
+    found, missing = cache.get_decks(1, [10, 11])
+    assert found == {10: (3, None)}
+    assert missing == [11]
+
+    cache.invalidate_decks(1)
+    found, missing = cache.get_decks(1, [10])
+    assert found == {}
+    assert missing == [10]
+
+
+def test_entries_expire_after_ttl():
+    """Writes in other workers are picked up once the TTL runs out."""
+    now = [100.0]
+    cache = LimitsCache(ttl_s=30, clock=lambda: now[0])
+    cache.store_global(1, cache.version(1), {"new": 5, "review": 50})
+    version = cache.version(1)
+
+    now[0] += 29
+    assert cache.get_global(1) == {"new": 5, "review": 50}
+    now[0] += 1
+    assert cache.get_global(1) is None
+    # A load started before the expiry cannot store its result
+    cache.store_global(1, version, {"new": 5, "review": 50})
+    assert cache.get_global(1) is None
+
+
+def test_global_limits_served_from_cache(db, test_user):
+    """Direct DB edits are not seen until the cache is invalidated."""
+    assert queue_builder.get_global_limits(db, test_user.id)["new"] == 15
+
+    user_settings = db.query(UserSettings).filter(UserSettings.user_id == test_user.id).first()
+    user_settings.new_per_day = 7
+    db.commit()
+    assert queue_builder.get_global_limits(db, test_user.id)["new"] == 15
+
+    limits_cache.invalidate_settings(test_user.id)
+    assert queue_builder.get_global_limits(db, test_user.id)["new"] == 7
+
+
+def test_settings_update_invalidates_global_limits(client, db, test_user):
+    """PUT /api/settings is write-through for the limits cache."""
+    assert queue_builder.get_global_limits(db, test_user.id)["review"] == 200
+
+    response = client.put("/api/settings", json={"review_per_day": 80})
+    assert response.status_code == 200
+
+    assert queue_builder.get_global_limits(db, test_user.id)["review"] == 80
+
+
+def test_settings_row_created_on_get_replaces_fallback_limits(client, db, test_user):
+    """Fallback limits of a user without settings are not cached past row creation."""
+    db.query(UserSettings).filter(UserSettings.user_id == test_user.id).delete()
+    db.commit()
+    assert client.get("/api/review/stats").json()["limits"] == {"new": 12, "review": 150}
+
+    created = client.get("/api/settings").json()
+    assert (created["new_per_day"], created["review_per_day"]) == (15, 200)
+    assert client.get("/api/review/stats").json()["limits"] == {"new": 15, "review": 200}
+
+
+def test_deck_update_invalidates_deck_limits(client, db, test_user):
+    """PUT /api/decks/{id} is write-through for per-deck limits."""
+    deck = Deck(user_id=test_user.id, name="Limits Deck", new_per_day=4)
+    db.add(deck)
+    db.commit()
+
+    global_limits = queue_builder.get_global_limits(db, test_user.id)
+    limits = queue_builder.get_deck_limits_map(db, test_user.id, [deck.id], global_limits)
+    assert limits[deck.id].new_cap == 4
+
+    response = client.put(f"/api/decks/{deck.id}", json={"new_per_day": 9})
+    assert response.status_code == 200
+
+    limits = queue_builder.get_deck_limits_map(db, test_user.id, [deck.id], global_limits)
+    assert limits[deck.id].new_cap == 9
@@ -0,0 +1,137 @@
+"""
+Tests for schedule load balancing (app.services.load_balancer).
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models.database import Card, Deck, SchedState, UserSettings
+from app.services import load_balancer
+from app.services.load_balancer import due_histograms, fuzz_range
+
+import scheduler
+
+
+NOW = datetime(2026, 3, 1, 10, 0)
+
+
+def _add_card(db, user_id, deck_id, state, due_at, interval):
+    card = Card(user_id=user_id, deck_id=deck_id, front="F", back="B")
+    db.add(card)
+    db.flush()
+    db.add(SchedState(
+        card_id=card.id,
+        user_id=user_id,
+        state=state,
+        due_at=due_at,
+        interval_days=interval,
+        ease_factor=2.5
+    ))
+    return card
+
+
+@pytest.fixture
+def deck(db, test_user):
+    deck = Deck(user_id=test_user.id, name="Balance Deck")
+    db.add(deck)
+    db.commit()
+    return deck
+
+
+def _enable(db, user_id):
+    db.query(UserSettings).filter(UserSettings.user_id == user_id).update(
+        {"load_balance_enabled": True}
+    )
+    db.commit()
+    due_histograms.invalidate_settings(user_id)
+
+
+def test_fuzz_range_scales_with_interval():
+    assert fuzz_range(1.0) == 0
+    assert fuzz_range(2.0) == 0
+    assert fuzz_range(6.0) == 1
+    assert fuzz_range(15.0) == 2
+    assert fuzz_range(40.0) == 2
+    assert fuzz_range(400.0) == 7
+
+
+def test_histogram_counts_due_learning_and_review(db, test_user, deck):
+    _add_card(db, test_user.id, deck.id, "review", NOW + timedelta(days=2), 6.0)
+    _add_card(db, test_user.id, deck.id, "review", NOW + timedelta(days=2, hours=3), 6.0)
+    _add_card(db, test_user.id, deck.id, "learning", NOW + timedelta(days=3), 0.0)
+    _add_card(db, test_user.id, deck.id, "new", NOW + timedelta(days=3), 0.0)
+    suspended = _add_card(db, test_user.id, deck.id, "review", NOW + timedelta(days=3), 6.0)
+    suspended.suspended = True
+    db.commit()
+
+    histogram = load_balancer.get_due_histogram(db, test_user.id, NOW.date())
+
+    assert histogram == {date(2026, 3, 3): 2, date(2026, 3, 4): 1}
+
+
+def test_balance_picks_least_loaded_day(db, test_user, deck):
+    """Interval 15 (+/-2 days): the emptiest day in the window wins."""
+    base = NOW + timedelta(days=15)
+    for offset, count in [(-2, 3), (-1, 2), (0, 4), (1, 1), (2, 3)]:
+        for _ in range(count):
+            _add_card(db, test_user.id, deck.id, "review", base + timedelta(days=offset), 15.0)
+    db.commit()
+
+    due_at, interval = load_balancer.balance_due(db, test_user.id, base, 15.0, NOW)
+
+    assert due_at == base + timedelta(days=1)
+    assert interval == 16.0
+
+
+def test_balance_prefers_original_day_on_tie(db, test_user, deck):
+    base = NOW + timedelta(days=6)
+
+    assert load_balancer.balance_due(db, test_user.id, base, 6.0, NOW) == (base, 6.0)
+
+
+def test_process_rating_spreads_graduations_when_enabled(db, test_user, deck):
+    """Many cards answered Good at interval 1 on the same day no longer all land on day +6."""
+    _enable(db, test_user.id)
+    cards = [_add_card(db, test_user.id, deck.id, "review", NOW, 1.0) for _ in range(9)]
+    db.commit()
+
+    for card in cards:
+        scheduler.process_rating(db, card, "good", test_user.id, now=NOW)
+
+    due_days = sorted({card.sched_state.due_at.date() for card in cards})
+    assert due_days == [date(2026, 3, 6), date(2026, 3, 7), date(2026, 3, 8)]
+    histogram = due_histograms.get(test_user.id)
+    assert [histogram.get(day, 0) for day in due_days] == [3, 3, 3]
+    assert {card.sched_state.interval_days for card in cards} == {5.0, 6.0, 7.0}
+
+
+def test_process_rating_unchanged_when_disabled(db, test_user, deck):
+    cards = [_add_card(db, test_user.id, deck.id, "review", NOW, 1.0) for _ in range(3)]
+    db.commit()
+
+    for card in cards:
+        scheduler.process_rating(db, card, "good", test_user.id, now=NOW)
+
+    assert {card.sched_state.due_at for card in cards} == {NOW + timedelta(days=6)}
+
+
+def test_settings_api_toggles_load_balance(client, db, test_user):
+    response = client.put("/api/settings", json={"load_balance_enabled": True})
+
+    assert response.status_code == 200
+    assert response.json()["load_balance_enabled"] is True
+    assert load_balancer.is_enabled(db, test_user.id) is True
+
+
+def test_card_update_suspend_invalidates_histogram(client, db, test_user, deck):
+    """Suspending through PUT /api/cards/{id} drops the card from the cached histogram."""
+    today = NOW.date()
+    card = _add_card(db, test_user.id, deck.id, "review", NOW + timedelta(days=2), 6.0)
+    db.commit()
+    assert load_balancer.get_due_histogram(db, test_user.id, today) == {date(2026, 3, 3): 1}
+
+    assert client.put(f"/api/cards/{card.id}", json={"suspended": True}).status_code == 200
+    assert load_balancer.get_due_histogram(db, test_user.id, today) == {}
+
+    assert client.put(f"/api/cards/{card.id}", json={"suspended": False}).status_code == 200
+    assert load_balancer.get_due_histogram(db, test_user.id, today) == {date(2026, 3, 3): 1}
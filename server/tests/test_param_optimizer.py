@@ -0,0 +1,156 @@
+"""
+Tests for the offline SM-2 parameter optimizer (app.services.param_optimizer).
+"""
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.database import Card, Deck, ReviewLog, SchedState, UserSettings
+from app.services import param_optimizer
+from app.services.analytics import RATING_CODES, STATE_CODES
+from app.services.param_optimizer import GROUPS, RatioHistogram, accumulate, fit_params
+from app.services.scheduler_engines import SM2Engine, get_engine
+
+import scheduler
+
+
+NOW = datetime(2026, 3, 1, 10, 0)
+DAY = 86400.0
+
+
+def _arrays(rows):
+    card_id, rating, state, interval, seconds = zip(*rows)
+    return (
+        np.array(card_id, dtype=np.int64),
+        np.array([RATING_CODES[r] for r in rating], dtype=np.int8),
+        np.array([STATE_CODES[s] for s in state], dtype=np.int8),
+        np.array(interval, dtype=np.float64),
+        np.array(seconds, dtype=np.float64),
+    )
+
+
+def _history(cards, prev_rating, retention, interval=10.0, seed=0):
+    """Two reviews per card: prev_rating on a review card, then one at the due date."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for card in range(cards):
+        recalled = rng.random() < retention
+        rows.append((card, prev_rating, "review", 4.0, 0.0))
+        rows.append((card, "good" if recalled else "again", "review", interval, interval * DAY))
+    return rows
+
+
+def test_accumulate_attributes_reviews_to_groups():
+    histogram = RatioHistogram()
+    rows = [
+        (1, "good", "new", 0.0, 0.0),
+        (1, "good", "review", 1.0, 1 * DAY),   # after a new card: not attributed
+        (1, "again", "review", 6.0, 7 * DAY),  # tests the Good interval -> ease
+        (1, "good", "review", 3.0, 10 * DAY),  # tests the lapse interval
+        (2, "easy", "review", 6.0, 0.0),       # first row of another card
+        (2, "good", "review", 8.0, 8 * DAY),   # tests the Easy interval
+    ]
+
+    assert accumulate(histogram, _arrays(rows)) == 3
+
+    counts = histogram.counts.sum(axis=1)
+    successes = histogram.successes.sum(axis=1)
+    assert dict(zip(GROUPS, counts)) == {"ease": 1, "easy": 1, "lapse": 1, "learning": 0}
+    assert dict(zip(GROUPS, successes)) == {"ease": 0, "easy": 1, "lapse": 1, "learning": 0}
+
+
+def test_fit_moves_parameters_towards_target_retention():
+    histogram = RatioHistogram()
+    accumulate(histogram, _arrays(_history(400, "good", retention=0.97)))
+    accumulate(histogram, _arrays(_history(400, "again", retention=0.75, seed=1)))
+
+    params, metrics = fit_params(histogram, scheduler.DEFAULT_SM2_PARAMS, target_retention=0.9)
+
+    # Too easy after Good: grow intervals; too hard after a lapse: shrink them
+    assert params.ef_initial > scheduler.EF_INITIAL
+    assert params.lapse_multiplier < scheduler.LAPSE_MULTIPLIER
+    assert params.easy_bonus == scheduler.EASY_BONUS
+    assert metrics["ease"]["converged"] and metrics["lapse"]["converged"]
+    assert metrics["ease"]["retention_at_due"] == pytest.approx(0.97, abs=0.02)
+    assert metrics["lapse"]["log_loss_after"] <= metrics["lapse"]["log_loss_before"]
+    assert metrics["easy"]["applied"] is False
+
+
+def _add_history(db, user_id, cards=120):
+    deck = Deck(user_id=user_id, name="History")
+    db.add(deck)
+    db.flush()
+    logs = []
+    for index, (_, rating, state, interval, seconds) in enumerate(_history(cards, "again", retention=0.6)):
+        if index % 2 == 0:
+            card = Card(user_id=user_id, deck_id=deck.id, front=f"F{index}", back="B")
+            db.add(card)
+            db.flush()
+        logs.append(ReviewLog(
+            card_id=card.id, user_id=user_id, rating=rating, state_before=state,
+            state_after="review", interval_before=interval, interval_after=interval,
+            ease_factor_before=2.5, ease_factor_after=2.5,
+            reviewed_at=NOW + timedelta(seconds=seconds)
+        ))
+    db.add_all(logs)
+    db.commit()
+    return deck
+
+
+def test_stream_histogram_is_independent_of_chunk_size(db, test_user):
+    _add_history(db, test_user.id, cards=30)
+
+    whole, reviews, rows, chunks = param_optimizer.stream_histogram(db, test_user.id, chunk_size=1000)
+    chunked, chunked_reviews, _, chunked_count = param_optimizer.stream_histogram(db, test_user.id, chunk_size=7)
+
+    assert (reviews, rows, chunks) == (30, 60, 1)
+    assert chunked_reviews == 30 and chunked_count == 9
+    np.testing.assert_array_equal(whole.counts, chunked.counts)
+    np.testing.assert_array_equal(whole.successes, chunked.successes)
+
+
+def test_optimize_user_stores_params_used_by_engine(db, test_user):
+    deck = _add_history(db, test_user.id)
+
+    result = param_optimizer.optimize_user(db, test_user.id, chunk_size=50)
+
+    assert result.saved and result.chunks == 5
+    settings = db.query(UserSettings).filter(UserSettings.user_id == test_user.id).one()
+    assert settings.sm2_lapse_multiplier == result.params["lapse_multiplier"] < scheduler.LAPSE_MULTIPLIER
+    assert settings.scheduler_fit["groups"]["lapse"]["reviews"] == 120
+
+    engine = get_engine(db, test_user.id, deck.id)
+    assert isinstance(engine, SM2Engine)
+    lapse = engine.next_state(
+        SchedState(state="review", due_at=NOW, interval_days=20.0, ease_factor=2.5, learning_step=0),
+        "again", NOW
+    )
+    assert lapse.interval_days == max(1.0, round(20.0 * settings.sm2_lapse_multiplier))
+
+
+def test_optimizer_job_runs_in_process_pool(client, db, test_user):
+    deck = _add_history(db, test_user.id)
+    client.get("/api/settings")  # settings row for the worker to save into
+    # Warm this process's engine cache with the defaults
+    assert get_engine(db, test_user.id, deck.id).params.lapse_multiplier == scheduler.LAPSE_MULTIPLIER
+
+    response = client.post("/api/settings/optimize")
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    param_optimizer.optimizer_jobs.wait(job_id, timeout=60)
+    job = client.get(f"/api/settings/optimize/{job_id}").json()
+
+    assert job["status"] == "done", job
+    assert job["result"]["reviews"] == 120
+    assert job["result"]["fit_seconds"] >= 0
+    db.expire_all()
+    settings = client.get("/api/settings").json()
+    assert settings["sm2_lapse_multiplier"] == job["result"]["params"]["lapse_multiplier"]
+    # The fit ran in another process; this process's engines must not stay stale
+    fitted = get_engine(db, test_user.id, deck.id).params.lapse_multiplier
+    assert fitted == job["result"]["params"]["lapse_multiplier"] < scheduler.LAPSE_MULTIPLIER
+
+    assert client.get("/api/settings/optimize/unknown").status_code == 404
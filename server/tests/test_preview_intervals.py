@@ -0,0 +1,71 @@
+"""
+Tests for vectorized next-interval previews (scheduler.preview_intervals).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.database import Card, Deck, SchedState
+
+import queue_builder
+import scheduler
+
+
+NOW = datetime(2026, 3, 1, 10, 0)
+
+CASES = [
+    ("new", 0.0, 2.5, 0),
+    ("learning", 0.0, 2.5, 0),
+    ("learning", 0.0, 2.2, 1),
+    ("review", 1.0, 2.5, 0),
+    ("review", 5.0, 1.3, 0),
+    ("review", 6.0, 2.5, 0),
+    ("review", 17.0, 2.36, 0),
+    ("review", 250.0, 3.0, 0),
+]
+
+
+@pytest.mark.parametrize("rating", ["again", "good", "easy"])
+def test_preview_matches_calculate_next_state(rating):
+    states, intervals, efs, steps = zip(*CASES)
+    previews = scheduler.preview_intervals(states, intervals, efs, steps)
+
+    for index, (state, interval, ef, step) in enumerate(CASES):
+        sched = SchedState(
+            state=state, due_at=NOW, interval_days=interval,
+            ease_factor=ef, learning_step=step
+        )
+        _, due_at, _, _, _ = scheduler.calculate_next_state(sched, rating, NOW)
+        expected = (due_at - NOW).total_seconds() / 86400.0
+        assert previews[rating][index] == pytest.approx(expected), (state, interval, rating)
+
+
+def test_get_next_review_times_uses_previews():
+    times = scheduler.get_next_review_times("review", 10.0, 2.5, 0, now=NOW)
+
+    assert times["again"] == NOW + timedelta(days=5)
+    assert times["good"] == NOW + timedelta(days=25)
+    assert times["easy"] == NOW + timedelta(days=32)
+
+
+def test_session_stubs_carry_preview_intervals(db, test_user):
+    deck = Deck(user_id=test_user.id, name="Preview Deck")
+    db.add(deck)
+    db.flush()
+
+    new_card = Card(user_id=test_user.id, deck_id=deck.id, front="New", back="B")
+    review_card = Card(user_id=test_user.id, deck_id=deck.id, front="Due", back="B")
+    db.add_all([new_card, review_card])
+    db.flush()
+    db.add(SchedState(
+        card_id=review_card.id, user_id=test_user.id, state="review",
+        due_at=NOW - timedelta(hours=1), interval_days=10.0, ease_factor=2.5
+    ))
+    db.commit()
+
+    sections, _ = queue_builder.build_session_queue(db, test_user.id, now=NOW, today=NOW.date())
+
+    assert [stub.id for stub in sections.review] == [review_card.id]
+    assert sections.review[0].preview_intervals == {"again": 5.0, "good": 25.0, "easy": 32.0}
+    for stub in sections.new:
+        assert stub.preview_intervals == {"again": 0.0, "good": 1.0, "easy": 1.0}
@@ -0,0 +1,116 @@
+"""
+Tests for read-replica session routing, using two local SQLite files
+as primary and replica stand-ins.
+"""
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base, SessionRouter
+from app.models.database import User
+
+
+@pytest.fixture
+def router(tmp_path):
+    """SessionRouter over separate primary and replica SQLite files."""
+    primary_engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(bind=primary_engine)
+    Base.metadata.create_all(bind=replica_engine)
+
+    router = SessionRouter(
+        sessionmaker(bind=primary_engine),
+        sessionmaker(bind=replica_engine),
+        window_s=60.0
+    )
+    yield router
+    primary_engine.dispose()
+    replica_engine.dispose()
+
+
+def _usernames(session):
+    try:
+        return [u.username for u in session.query(User).all()]
+    finally:
+        session.close()
+
+
+def test_reads_use_replica_without_recent_writes(router):
+    """With no recent primary write, reads go to the replica."""
+    assert router.has_replica
+    session = router.read_session()
+    assert session.get_bind().url.database.endswith("replica.db")
+    session.close()
+
+
+def test_read_your_writes_after_commit(router):
+    """A committed write routes reads to the primary for the window."""
+    primary = router.primary()
+    primary.add(User(username="default_user"))
+    primary.commit()
+    primary.close()
+
+    # Replica has not caught up, but the read still sees the write
+    assert _usernames(router.read_session()) == ["default_user"]
+
+
+def test_core_write_pins_primary(router):
+    """Core UPDATE/INSERT/DELETE executed through the session count as writes."""
+    primary = router.primary()
+    primary.execute(update(User).where(User.username == "nobody").values(timezone="UTC"))
+    primary.commit()
+    primary.close()
+
+    session = router.read_session()
+    assert session.get_bind().url.database.endswith("primary.db")
+    session.close()
+
+
+def test_replica_used_again_after_window(router):
+    """Once the window has passed, reads return to the replica."""
+    primary = router.primary()
+    primary.add(User(username="default_user"))
+    primary.commit()
+    primary.close()
+
+    router.last_write_at -= router.window_s + 1
+
+    assert _usernames(router.read_session()) == []
+
+
+def test_read_only_commit_does_not_pin_primary(router):
+    """Commits that flushed nothing do not count as writes."""
+    primary = router.primary()
+    primary.query(User).all()
+    primary.commit()
+    primary.close()
+
+    session = router.read_session()
+    assert session.get_bind().url.database.endswith("replica.db")
+    session.close()
+
+
+def test_rolled_back_write_does_not_pin_primary(router):
+    """A flushed-then-rolled-back write is not treated as a write."""
+    primary = router.primary()
+    primary.add(User(username="ghost"))
+    primary.flush()
+    primary.rollback()
+    primary.commit()
+    primary.close()
+
+    session = router.read_session()
+    assert session.get_bind().url.database.endswith("replica.db")
+    session.close()
+
+
+def test_no_replica_falls_back_to_primary(tmp_path):
+    """Without a replica, read sessions are plain primary sessions."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'only.db'}")
+    router = SessionRouter(sessionmaker(bind=engine))
+
+    assert not router.has_replica
+    session = router.read_session()
+    assert session.get_bind() is engine
+    session.close()
+    engine.dispose()
@@ -0,0 +1,101 @@
+"""
+Tests for review log archival (app.services.review_archive).
+"""
+from datetime import datetime
+
+import pytest
+
+from app.models.database import Card, Deck, ReviewLog
+from app.services.review_archive import (
+    add_months,
+    archive_cutoff,
+    archive_reviews,
+    ensure_partitions,
+    partition_statements,
+    read_archive,
+)
+from app.services.review_rollup import rebuild_rollup, total_review_count
+
+
+@pytest.fixture
+def card(db, test_user):
+    deck = Deck(user_id=test_user.id, name="Archive Deck")
+    db.add(deck)
+    db.flush()
+    card = Card(user_id=test_user.id, deck_id=deck.id, front="Front", back="Back")
+    db.add(card)
+    db.commit()
+    return card
+
+
+def test_month_helpers():
+    """Month arithmetic wraps years and the cutoff keeps hot_months months."""
+    assert add_months(datetime(2025, 11, 1), 3) == datetime(2026, 2, 1)
+    assert add_months(datetime(2026, 1, 1), -1) == datetime(2025, 12, 1)
+    assert archive_cutoff(12, now=datetime(2026, 10, 18, 9, 30)) == datetime(2025, 11, 1)
+    assert archive_cutoff(1, now=datetime(2026, 10, 18)) == datetime(2026, 10, 1)
+
+
+def test_archive_exports_and_removes_cold_months(db, test_user, card, tmp_path, add_review):
+    """Whole months before the cutoff go to one NDJSON file each; later rows stay hot."""
+    add_review(test_user.id, card.id, datetime(2026, 1, 5, 8, 0), "again", time_taken_ms=1200)
+    add_review(test_user.id, card.id, datetime(2026, 1, 31, 23, 59))
+    add_review(test_user.id, card.id, datetime(2026, 3, 2, 10, 0), "easy")
+    add_review(test_user.id, card.id, datetime(2026, 4, 1, 0, 0))
+    db.commit()
+
+    archived = archive_reviews(db, datetime(2026, 4, 15), str(tmp_path))
+
+    assert [(item.month, item.rows) for item in archived] == [
+        (datetime(2026, 1, 1), 2),
+        (datetime(2026, 3, 1), 1),
+    ]
+    january = list(read_archive(archived[0].path))
+    assert [row["rating"] for row in january] == ["again", "good"]
+    assert january[0]["reviewed_at"] == "2026-01-05T08:00:00"
+    assert january[0]["time_taken_ms"] == 1200
+
+    remaining = db.query(ReviewLog.reviewed_at).all()
+    assert remaining == [(datetime(2026, 4, 1, 0, 0),)]
+
+
+def test_archive_keeps_rollup_stats(db, test_user, card, tmp_path, add_review):
+    """Stats come from the rollup, so archived reviews still count."""
+    add_review(test_user.id, card.id, datetime(2026, 1, 5, 8, 0))
+    add_review(test_user.id, card.id, datetime(2026, 5, 5, 8, 0))
+    db.commit()
+    rebuild_rollup(db, test_user.id)
+
+    cutoff = datetime(2026, 5, 1)
+    archive_reviews(db, cutoff, str(tmp_path))
+    rebuild_rollup(db, test_user.id, since=cutoff)
+
+    assert total_review_count(db, test_user.id) == 2
+
+
+def test_archive_is_noop_without_cold_rows(db, test_user, card, tmp_path, add_review):
+    add_review(test_user.id, card.id, datetime(2026, 5, 5, 8, 0))
+    db.commit()
+
+    assert archive_reviews(db, datetime(2026, 5, 20), str(tmp_path)) == []
+    assert db.query(ReviewLog).count() == 1
+
+
+def test_ensure_partitions_skips_unpartitioned_sqlite(db):
+    assert ensure_partitions(db) == []
+
+
+def test_partition_statements_move_default_rows():
+    """New partitions are created with the default detached and its rows moved over."""
+    statements = partition_statements([datetime(2026, 11, 1)])
+
+    assert statements == [
+        "ALTER TABLE review_logs DETACH PARTITION review_logs_default",
+        "CREATE TABLE review_logs_p202611 PARTITION OF review_logs FOR VALUES FROM ('2026-11-01') TO ('2026-12-01')",
+        "INSERT INTO review_logs_p202611 SELECT * FROM review_logs_default "
+        "WHERE reviewed_at >= '2026-11-01' AND reviewed_at < '2026-12-01'",
+        "DELETE FROM review_logs_default WHERE reviewed_at >= '2026-11-01' AND reviewed_at < '2026-12-01'",
+        "ALTER TABLE review_logs ATTACH PARTITION review_logs_default DEFAULT",
+    ]
+    assert partition_statements([]) == []
+    assert partition_statements([datetime(2026, 11, 1)], default_partition=None) == statements[1:2]
@@ -0,0 +1,69 @@
+"""
+Tests for live queue counts over Server-Sent Events.
+"""
+import asyncio
+import json
+
+import pytest
+
+from api_review import stream_queue_events
+from app.services.data_version import data_versions
+from app.services.review_events import count_stream, review_events
+
+
+def _parse(message):
+    lines = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return lines["event"], json.loads(lines["data"])
+
+
+async def _next(stream, timeout=2.0):
+    return await asyncio.wait_for(stream.__anext__(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_stream_pushes_changed_sections_on_bump():
+    counts = {"due_counts": {"new": 1}, "total_due": 1}
+
+    async def load_counts():
+        return dict(counts)
+
+    stream = count_stream(7, load_counts, refresh_s=60)
+    assert _parse(await _next(stream)) == ("counts", counts)
+    assert review_events.subscriber_count(7) == 1
+
+    counts["total_due"] = 2
+    data_versions.bump(7)
+    assert _parse(await _next(stream)) == ("delta", {"total_due": 2})
+
+    data_versions.bump_all()
+    assert await _next(stream) == ": keep-alive\n\n"
+
+    # Another user's writes do not wake the stream
+    data_versions.bump(8)
+    with pytest.raises(asyncio.TimeoutError):
+        await _next(stream, timeout=0.2)
+
+    await stream.aclose()
+    assert review_events.subscriber_count(7) == 0
+
+
+@pytest.mark.asyncio
+async def test_write_request_updates_stream(client, db, test_user):
+    deck = client.post("/api/decks/", json={"name": "Live Deck"}).json()
+    card = client.post("/api/cards/", json={"deck_id": deck["id"], "front": "Front", "back": "Back"}).json()
+
+    response = await stream_queue_events(deck_ids=None, db=db, user=test_user)
+    assert response.media_type == "text/event-stream"
+    stream = response.body_iterator
+    event, counts = _parse(await _next(stream))
+    assert event == "counts"
+    assert counts["due_counts"]["new"] == 1
+
+    # The middleware bumps the version after the write, which wakes the stream
+    await asyncio.to_thread(client.put, f"/api/cards/{card['id']}", json={"suspended": True})
+    event, delta = _parse(await _next(stream))
+    assert event == "delta"
+    assert delta["due_counts"]["new"] == 0
+    assert "limits" not in delta
+
+    await stream.aclose()
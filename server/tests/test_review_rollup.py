@@ -0,0 +1,170 @@
+"""
+Tests for the daily review rollup (app.services.review_rollup).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.database import Card, Deck, ReviewDailyRollup, SchedState
+from app.services.review_rollup import daily_rating_totals, rebuild_rollup
+
+import scheduler
+
+
+@pytest.fixture
+def review_card(db, test_user):
+    """Deck with one review card."""
+    deck = Deck(user_id=test_user.id, name="Rollup Deck")
+    db.add(deck)
+    db.flush()
+    card = Card(user_id=test_user.id, deck_id=deck.id, front="Front", back="Back")
+    db.add(card)
+    db.flush()
+    db.add(SchedState(
+        card_id=card.id,
+        user_id=test_user.id,
+        state="review",
+        due_at=datetime.utcnow() - timedelta(hours=1),
+        interval_days=6.0,
+        ease_factor=2.5
+    ))
+    db.commit()
+    return card
+
+
+def _rollup_rows(db, user_id):
+    rows = db.query(ReviewDailyRollup).filter(
+        ReviewDailyRollup.user_id == user_id
+    ).order_by(ReviewDailyRollup.date, ReviewDailyRollup.state_before).all()
+    return [
+        (r.deck_id, r.date, r.state_before, r.again_count, r.good_count,
+         r.easy_count, r.lapse_count, r.time_taken_ms)
+        for r in rows
+    ]
+
+
+def test_process_rating_updates_rollup(db, test_user, review_card):
+    """Each logged answer increments its day bucket, including lapses and time."""
+    now = datetime(2026, 3, 14, 10, 30)
+    scheduler.process_rating(db, review_card, "again", test_user.id, now=now, time_taken_ms=1500)
+    scheduler.process_rating(db, review_card, "good", test_user.id, now=now + timedelta(minutes=10), time_taken_ms=500)
+    scheduler.process_rating(db, review_card, "easy", test_user.id, now=now + timedelta(days=1))
+
+    day = datetime(2026, 3, 14)
+    assert _rollup_rows(db, test_user.id) == [
+        (review_card.deck_id, day, "review", 1, 1, 0, 1, 2000),
+        (review_card.deck_id, day + timedelta(days=1), "review", 0, 0, 1, 0, 0),
+    ]
+
+
+def test_skipped_log_does_not_touch_rollup(db, test_user, review_card):
+    """Answers with log_review=False (in-session repeats) are not aggregated."""
+    scheduler.process_rating(db, review_card, "again", test_user.id, log_review=False)
+
+    assert _rollup_rows(db, test_user.id) == []
+
+
+def test_rebuild_matches_incremental(db, test_user, review_card):
+    """Rebuilding from review_logs reproduces the incrementally maintained rows."""
+    now = datetime(2026, 3, 14, 23, 50)
+    for offset, rating in enumerate(["good", "again", "good", "easy"]):
+        scheduler.process_rating(
+            db, review_card, rating, test_user.id,
+            now=now + timedelta(minutes=5 * offset), time_taken_ms=100 * (offset + 1)
+        )
+    incremental = _rollup_rows(db, test_user.id)
+
+    assert rebuild_rollup(db, test_user.id) == len(incremental)
+    assert _rollup_rows(db, test_user.id) == incremental
+
+
+def test_daily_rating_totals_sums_across_states(db, test_user, review_card):
+    """Per-day totals merge state buckets and honour the since cutoff."""
+    now = datetime(2026, 3, 14, 9, 0)
+    scheduler.process_rating(db, review_card, "again", test_user.id, now=now - timedelta(days=3))
+    scheduler.process_rating(db, review_card, "again", test_user.id, now=now)
+    scheduler.process_rating(db, review_card, "good", test_user.id, now=now)
+
+    totals = daily_rating_totals(db, test_user.id, now - timedelta(hours=1))
+
+    assert len(totals) == 1
+    assert (totals[0].again, totals[0].good, totals[0].easy) == (1, 1, 0)
+    assert totals[0].total == 2
+    assert totals[0].successful == 1
+
+
+def test_card_deletion_removes_reviews_from_rollup(client, db, test_user, review_card):
+    """Single and bulk card deletion leave the rollup as a rebuild would."""
+    cards = [review_card]
+    for front in ("Second", "Third"):
+        card = Card(user_id=test_user.id, deck_id=review_card.deck_id, front=front, back="Back")
+        db.add(card)
+        db.flush()
+        db.add(SchedState(card_id=card.id, user_id=test_user.id, state="review",
+                          due_at=datetime.utcnow(), interval_days=6.0, ease_factor=2.5))
+        cards.append(card)
+    db.commit()
+    now = datetime(2026, 3, 14, 9, 0)
+    for offset, card in enumerate(cards):
+        scheduler.process_rating(db, card, "again", test_user.id, now=now, time_taken_ms=100)
+        scheduler.process_rating(db, card, "good", test_user.id, now=now + timedelta(days=offset))
+    deck_id, kept = review_card.deck_id, cards[2].id
+
+    assert client.delete(f"/api/cards/{cards[0].id}").status_code == 204
+    assert client.post("/api/cards/bulk", json={"operation": "delete", "card_ids": [cards[1].id]}).status_code == 200
+    db.expire_all()
+    after_delete = _rollup_rows(db, test_user.id)
+
+    rebuild_rollup(db, test_user.id)
+    assert after_delete == _rollup_rows(db, test_user.id)
+    assert after_delete == [
+        (deck_id, datetime(2026, 3, 14), "review", 1, 0, 0, 1, 100),
+        (deck_id, datetime(2026, 3, 16), "review", 0, 1, 0, 0, 0),
+    ]
+    assert db.query(Card).filter(Card.id == kept).count() == 1
+
+
+def test_moved_cards_take_their_reviews_along(client, db, test_user, review_card):
+    """Moving cards (single and bulk), then deleting one, leaves the rollup as a rebuild would."""
+    old_deck_id = review_card.deck_id
+    new_deck = Deck(user_id=test_user.id, name="Target Deck")
+    db.add(new_deck)
+    db.flush()
+    cards = [review_card]
+    for deck_id, front in ((old_deck_id, "Second"), (new_deck.id, "Resident")):
+        card = Card(user_id=test_user.id, deck_id=deck_id, front=front, back="Back")
+        db.add(card)
+        db.flush()
+        db.add(SchedState(card_id=card.id, user_id=test_user.id, state="review",
+                          due_at=datetime.utcnow(), interval_days=6.0, ease_factor=2.5))
+        cards.append(card)
+    db.commit()
+    now = datetime(2026, 3, 14, 9, 0)
+    for offset, card in enumerate(cards):
+        scheduler.process_rating(db, card, "again", test_user.id, now=now, time_taken_ms=100)
+        scheduler.process_rating(db, card, "good", test_user.id, now=now + timedelta(days=offset))
+    moved, bulk_moved, resident = (card.id for card in cards)
+    new_deck_id = new_deck.id
+
+    def assert_matches_rebuild():
+        db.expire_all()
+        incremental = _rollup_rows(db, test_user.id)
+        rebuild_rollup(db, test_user.id)
+        assert incremental == _rollup_rows(db, test_user.id)
+        return incremental
+
+    assert client.put(f"/api/cards/{moved}", json={"deck_id": new_deck_id}).status_code == 200
+    assert_matches_rebuild()
+    assert client.post(
+        "/api/cards/bulk", json={"operation": "move", "card_ids": [bulk_moved], "deck_id": new_deck_id}
+    ).json()["affected"] == 1
+    rows = assert_matches_rebuild()
+    assert {row[0] for row in rows} == {new_deck_id}
+
+    assert client.delete(f"/api/cards/{moved}").status_code == 204
+    assert assert_matches_rebuild() == [
+        (new_deck_id, datetime(2026, 3, 14), "review", 2, 0, 0, 2, 200),
+        (new_deck_id, datetime(2026, 3, 15), "review", 0, 1, 0, 0, 0),
+        (new_deck_id, datetime(2026, 3, 16), "review", 0, 1, 0, 0, 0),
+    ]
+    assert db.query(Card).filter(Card.id == resident).count() == 1
@@ -0,0 +1,227 @@
+"""
+Tests for pluggable scheduling engines and the FSRS optimizer.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from app.models.database import Card, Deck, ReviewLog, SchedState, UserSettings
+from app.services import fsrs_optimizer
+from app.services.scheduler_engines import (
+    FSRS_DEFAULT_WEIGHTS,
+    FSRSEngine,
+    SM2Engine,
+    engine_cache,
+    fsrs_init_difficulty,
+    fsrs_init_stability,
+    fsrs_interval,
+    fsrs_retrievability,
+    fsrs_review,
+    get_engine,
+    get_engines,
+)
+
+import scheduler
+
+
+NOW = datetime(2026, 3, 1, 10, 0)
+
+
+def _sched(state, interval=0.0, ef=2.5, step=0, due_at=NOW, stability=None, difficulty=None):
+    return SchedState(
+        state=state, due_at=due_at, interval_days=interval, ease_factor=ef,
+        learning_step=step, stability=stability, difficulty=difficulty
+    )
+
+
+@pytest.mark.parametrize("rating", ["again", "good", "easy"])
+def test_sm2_engine_matches_scheduler(rating):
+    for sched in (_sched("new"), _sched("learning", step=0), _sched("review", 12.0, 2.2)):
+        assert SM2Engine().next_state(sched, rating, NOW)[:5] == scheduler.calculate_next_state(sched, rating, NOW)
+
+
+def test_fsrs_new_card_transitions():
+    engine = FSRSEngine()
+
+    again = engine.next_state(_sched("new"), "again", NOW)
+    good = engine.next_state(_sched("new"), "good", NOW)
+    easy = engine.next_state(_sched("new"), "easy", NOW)
+
+    assert again.state == "learning"
+    assert again.due_at == NOW + timedelta(minutes=10)
+    assert good.state == "review" and easy.state == "review"
+    assert good.stability == pytest.approx(FSRS_DEFAULT_WEIGHTS[2])
+    assert easy.interval_days > good.interval_days >= 1
+    assert easy.difficulty < good.difficulty < again.difficulty
+
+
+def test_fsrs_review_intervals_follow_stability():
+    engine = FSRSEngine()
+    sched = _sched("review", interval=10.0, due_at=NOW, stability=10.0, difficulty=5.0)
+
+    again = engine.next_state(sched, "again", NOW)
+    good = engine.next_state(sched, "good", NOW)
+    easy = engine.next_state(sched, "easy", NOW)
+
+    assert again.stability < 10.0 < good.stability < easy.stability
+    assert again.interval_days < good.interval_days < easy.interval_days
+    assert good.ease_factor == sched.ease_factor
+
+
+def test_fsrs_desired_retention_shortens_intervals():
+    sched = _sched("review", interval=20.0, stability=20.0, difficulty=5.0)
+
+    relaxed = FSRSEngine(desired_retention=0.8).next_state(sched, "good", NOW)
+    strict = FSRSEngine(desired_retention=0.95).next_state(sched, "good", NOW)
+
+    assert strict.interval_days < relaxed.interval_days
+
+
+def test_fsrs_initializes_sm2_cards_from_interval_and_ease():
+    update = FSRSEngine().next_state(_sched("review", interval=30.0, ef=3.0), "good", NOW)
+
+    expected_s, expected_d = fsrs_review(30.0, 1.0, 30.0, 3, np.array(FSRS_DEFAULT_WEIGHTS))
+    assert update.stability == pytest.approx(float(expected_s))
+    assert update.difficulty == pytest.approx(float(expected_d))
+
+
+def test_fsrs_preview_matches_next_states():
+    engine = FSRSEngine()
+    states = [None, _sched("learning", step=0), _sched("review", 8.0, stability=8.0, difficulty=6.0)]
+
+    previews = engine.preview(states, NOW)
+
+    for rating in ("again", "good", "easy"):
+        for index, sched in enumerate(states):
+            update = engine.next_state(sched or _sched("new"), rating, NOW)
+            expected = (update.due_at - NOW).total_seconds() / 86400.0
+            assert previews[rating][index] == pytest.approx(expected)
+
+
+def test_engine_selection_uses_deck_override(db, test_user):
+    sm2_deck = Deck(user_id=test_user.id, name="Default")
+    fsrs_deck = Deck(user_id=test_user.id, name="FSRS", scheduler_engine="fsrs")
+    db.add_all([sm2_deck, fsrs_deck])
+    db.commit()
+
+    assert isinstance(get_engine(db, test_user.id, sm2_deck.id), SM2Engine)
+    assert isinstance(get_engine(db, test_user.id, fsrs_deck.id), FSRSEngine)
+
+    db.query(UserSettings).filter(UserSettings.user_id == test_user.id).update(
+        {"scheduler_engine": "fsrs", "fsrs_desired_retention": 0.85}
+    )
+    db.commit()
+    assert isinstance(get_engine(db, test_user.id, sm2_deck.id), SM2Engine)  # cached
+
+    engine_cache.invalidate(test_user.id)
+
+    engine = get_engine(db, test_user.id, sm2_deck.id)
+    assert isinstance(engine, FSRSEngine)
+    assert engine.desired_retention == 0.85
+
+
+def test_engine_cache_write_paths(client, db, test_user):
+    deck = client.post("/api/decks/", json={"name": "Cached"}).json()
+    assert isinstance(get_engine(db, test_user.id, deck["id"]), SM2Engine)
+
+    client.put(f"/api/decks/{deck['id']}", json={"scheduler_engine": "fsrs"})
+    assert isinstance(get_engine(db, test_user.id, deck["id"]), FSRSEngine)
+
+    client.put("/api/settings", json={"fsrs_desired_retention": 0.8})
+    assert get_engine(db, test_user.id, deck["id"]).desired_retention == 0.8
+
+    created = client.post("/api/decks/", json={"name": "Created", "scheduler_engine": "fsrs"}).json()
+    assert isinstance(get_engine(db, test_user.id, created["id"]), FSRSEngine)
+
+    # Answers reuse the cached engines
+    statements = []
+    engine = db.get_bind()
+    record = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        get_engines(db, test_user.id, [deck["id"], created["id"]])
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements == []
+
+
+def test_process_rating_with_fsrs_deck(db, test_user):
+    deck = Deck(user_id=test_user.id, name="FSRS", scheduler_engine="fsrs")
+    db.add(deck)
+    db.flush()
+    card = Card(user_id=test_user.id, deck_id=deck.id, front="F", back="B")
+    db.add(card)
+    db.flush()
+    db.add(SchedState(card_id=card.id, user_id=test_user.id, state="new", due_at=NOW))
+    db.commit()
+
+    updated = scheduler.process_rating(db, card, "good", test_user.id, now=NOW)
+
+    assert updated.state == "review"
+    assert updated.stability == pytest.approx(FSRS_DEFAULT_WEIGHTS[2])
+    assert updated.difficulty is not None
+
+
+def _synthetic_history(weights, cards=300, reviews=6, seed=0):
+    """Review rows (card_id, rating code, state code, seconds) simulated from FSRS weights."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for card in range(cards):
+        grade = int(rng.choice([1, 3, 4], p=[0.2, 0.7, 0.1]))
+        stability = float(fsrs_init_stability(np.array(grade), weights))
+        difficulty = float(fsrs_init_difficulty(grade, weights))
+        seconds = 0.0
+        rows.append((card, {1: 0, 3: 1, 4: 2}[grade], 0, seconds))
+        for _ in range(reviews):
+            elapsed = max(1, round(float(fsrs_interval(stability, 0.9)) * rng.uniform(0.5, 1.5)))
+            seconds += elapsed * 86400
+            grade = 3 if rng.random() < fsrs_retrievability(elapsed, stability) else 1
+            rows.append((card, {1: 0, 3: 1}[grade], 2, seconds))
+            stability, difficulty = (float(v) for v in fsrs_review(stability, difficulty, elapsed, grade, weights))
+    table = np.array(rows)
+    return (table[:, 0].astype(np.int64), table[:, 1].astype(np.int8),
+            table[:, 2].astype(np.int8), table[:, 3])
+
+
+def test_build_training_data_skips_cards_without_first_review():
+    card_id = np.array([1, 1, 2, 2])
+    rating = np.array([1, 0, 1, 1], dtype=np.int8)
+    state = np.array([0, 2, 2, 2], dtype=np.int8)
+    reviewed_at = np.array([0.0, 3 * 86400.5, 0.0, 86400.0])
+
+    data = fsrs_optimizer.build_training_data(card_id, rating, state, reviewed_at)
+
+    assert data.grades.tolist() == [[3, 1]]
+    assert data.elapsed.tolist() == [[0.0, 3.0]]
+    assert data.scored_reviews == 1
+
+
+def test_fit_weights_reduces_loss():
+    true_weights = np.array(FSRS_DEFAULT_WEIGHTS)
+    true_weights[:4] *= 2.0
+    data = fsrs_optimizer.build_training_data(*_synthetic_history(true_weights))
+
+    result = fsrs_optimizer.fit_weights(data, iterations=40)
+
+    assert result.final_loss < result.initial_loss
+    assert result.reviews == data.scored_reviews
+    assert len(result.weights) == len(FSRS_DEFAULT_WEIGHTS)
+
+
+def test_optimize_user_needs_history(db, test_user):
+    deck = Deck(user_id=test_user.id, name="Few")
+    db.add(deck)
+    db.flush()
+    card = Card(user_id=test_user.id, deck_id=deck.id, front="F", back="B")
+    db.add(card)
+    db.flush()
+    db.add(ReviewLog(
+        card_id=card.id, user_id=test_user.id, rating="good", state_before="new",
+        state_after="review", interval_before=0, interval_after=1,
+        ease_factor_before=2.5, ease_factor_after=2.5, reviewed_at=NOW
+    ))
+    db.commit()
+
+    assert fsrs_optimizer.optimize_user(db, test_user.id) is None
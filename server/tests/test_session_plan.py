@@ -0,0 +1,129 @@
+"""
+Tests for the count-only session planner (queue_builder.plan_session_counts).
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+import queue_builder
+from app.models.database import Card, DailyCounter, DailyDeckCounter, Deck, SchedState, UserSettings
+from queue_builder import DeckLimits, plan_session_counts, round_robin_allocate, round_robin_counts
+
+
+def _limits(caps):
+    return {deck_id: DeckLimits(new, review, new_used, review_used) for deck_id, (new, review, new_used, review_used) in caps.items()}
+
+
+def test_round_robin_counts_match_allocation():
+    rng = random.Random(42)
+    for _ in range(300):
+        _check_round_robin_counts(rng)
+
+
+def _check_round_robin_counts(rng):
+    deck_ids = list(range(1, rng.randint(1, 6) + 1))
+    # Duplicate deck names map several names onto one id
+    names = [f"deck{rng.choice(deck_ids)}" if rng.random() < 0.2 else f"deck{d}" for d in deck_ids]
+    names.sort()
+    id_map = {name: int(name[4:]) for name in names}
+    pools = {d: rng.randint(0, 12) for d in deck_ids}
+    caps = {d: (rng.randint(0, 8), rng.randint(0, 8), rng.randint(0, 4), rng.randint(0, 4)) for d in deck_ids}
+    global_remaining = rng.choice([None, 0, rng.randint(1, 40)])
+    section = rng.choice(["new", "review", "learning"])
+    with_limits = rng.random() < 0.8
+
+    allocated = round_robin_allocate(
+        names, {d: [d] * size for d, size in pools.items()}, id_map,
+        _limits(caps) if with_limits else None, global_remaining, section
+    )
+    expected = {}
+    for deck_id in allocated:
+        expected[deck_id] = expected.get(deck_id, 0) + 1
+
+    counted = round_robin_counts(
+        [id_map[name] for name in names], pools,
+        _limits(caps) if with_limits else None, global_remaining, section
+    )
+    assert counted == expected
+
+
+def _seed_decks(db, user_id, now):
+    rng = random.Random(7)
+    db.query(UserSettings).filter(UserSettings.user_id == user_id).update({"new_per_day": 9, "review_per_day": 14})
+    today = datetime.combine(now.date(), datetime.min.time())
+    db.add(DailyCounter(user_id=user_id, date=today, introduced_new=2, reviews_done=3))
+    decks = []
+    for name, new_cap, review_cap in [("Kanji", 3, None), ("Verbs", None, 4), ("Adjectives", None, None), ("Kanji", 1, 1)]:
+        deck = Deck(user_id=user_id, name=name, new_per_day=new_cap, review_per_day=review_cap)
+        db.add(deck)
+        db.flush()
+        decks.append(deck)
+        for i in range(rng.randint(4, 10)):
+            card = Card(user_id=user_id, deck_id=deck.id, front=f"{name} {i}", back="Back", suspended=rng.random() < 0.1)
+            db.add(card)
+            db.flush()
+            state = rng.choice(["new", "learning", "review", None])
+            if state is not None:
+                db.add(SchedState(
+                    card_id=card.id, user_id=user_id, state=state,
+                    due_at=now + timedelta(hours=rng.choice([-2, 3])),
+                    interval_days=1.0, ease_factor=2.5
+                ))
+    db.add(DailyDeckCounter(user_id=user_id, deck_id=decks[1].id, date=today, introduced_new=1, reviews_done=2))
+    db.commit()
+    return decks
+
+
+def _built_counts(db, user_id, scope, deck_id, now):
+    sections, _ = queue_builder.build_session_queue(db, user_id, scope, deck_id, now)
+    db.rollback()
+    counts = {}
+    for name in ("new", "learning", "review"):
+        per_deck = {}
+        for stub in getattr(sections, name):
+            per_deck[stub.deck_id] = per_deck.get(stub.deck_id, 0) + 1
+        counts[name] = per_deck
+    return counts
+
+
+def test_plan_matches_build(db, test_user):
+    now = datetime.utcnow()
+    user_id = test_user.id
+    decks = _seed_decks(db, user_id, now)
+
+    for scope, deck_id in [("all", None)] + [("deck", deck.id) for deck in decks]:
+        plan = plan_session_counts(db, user_id, scope, deck_id, now)
+        built = _built_counts(db, user_id, scope, deck_id, now)
+        assert {"new": plan.new, "learning": plan.learning, "review": plan.review} == built
+        assert plan.sections == {name: sum(per_deck.values()) for name, per_deck in built.items()}
+
+
+def test_session_stats_endpoint_loads_no_cards(client, db, test_user):
+    now = datetime.utcnow()
+    _seed_decks(db, test_user.id, now)
+    built = _built_counts(db, test_user.id, "all", None, now)
+
+    statements = []
+
+    def record(*args):
+        statements.append(args[2])
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        body = client.get("/api/review/stats/session").json()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert body["sections"] == {name: sum(per_deck.values()) for name, per_deck in built.items()}
+    assert body["remaining"] == {"reviews": 11, "new": 7}
+    assert body["total_available"] == (
+        body["sections"]["learning"] + min(body["sections"]["review"], 11) + min(body["sections"]["new"], 7)
+    )
+    breakdown = {
+        int(key.split()[1]): counts for key, counts in body["deck_breakdown"].items()
+    }
+    for name, per_deck in built.items():
+        assert {deck_id: counts[name] for deck_id, counts in breakdown.items() if counts[name]} == per_deck
+    assert not any("cards.front" in statement for statement in statements)
@@ -0,0 +1,102 @@
+"""
+Tests for seeded session shuffles.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import queue_builder
+from app.models.database import Card, Deck, SchedState
+from queue_builder import shuffle_keys, take_shuffled
+
+
+def test_take_shuffled_is_prefix_of_full_shuffle():
+    ids = np.arange(1, 501, dtype=np.int64)
+    full = ids[np.argsort(shuffle_keys(ids, 11))].tolist()
+
+    assert take_shuffled(ids, 20, 11) == full[:20]
+    assert take_shuffled(ids, 900, 11) == full
+    assert take_shuffled(ids, 0, 11) == []
+    assert full != ids.tolist() and full != take_shuffled(ids, 500, 12)
+    # A card's rank does not depend on the rest of the pool
+    assert take_shuffled(ids[::-1].copy(), 20, 11) == full[:20]
+    assert take_shuffled(np.array(full[:50]), 5, 11) == full[:5]
+
+
+def _deck(db, user_id):
+    deck = Deck(user_id=user_id, name="Shuffle Deck", new_per_day=8)
+    db.add(deck)
+    db.flush()
+    now = datetime.utcnow()
+    for i in range(40):
+        card = Card(user_id=user_id, deck_id=deck.id, front=f"Front {i}", back="Back")
+        db.add(card)
+        db.flush()
+        db.add(SchedState(
+            card_id=card.id, user_id=user_id, state="new" if i % 2 else "review",
+            due_at=now - timedelta(hours=1), interval_days=1.0, ease_factor=2.5
+        ))
+    db.commit()
+    return deck
+
+
+def _order(sections):
+    return [[stub.id for stub in section] for section in (sections.new, sections.learning, sections.review)]
+
+
+def test_same_seed_rebuilds_same_session(db, test_user):
+    deck = _deck(db, test_user.id)
+
+    first, meta = queue_builder.build_session_queue(db, test_user.id, "deck", deck.id, seed=1234)
+    again, _ = queue_builder.build_session_queue(db, test_user.id, "deck", deck.id, seed=1234)
+    other, _ = queue_builder.build_session_queue(db, test_user.id, "deck", deck.id, seed=99)
+
+    assert meta.seed == 1234
+    assert len(first.new) == 8
+    assert _order(first) == _order(again)
+    assert _order(first) != _order(other)
+
+
+def test_build_endpoint_reports_and_accepts_seed(client, db, test_user):
+    deck = _deck(db, test_user.id)
+
+    body = client.post("/api/review/session/build", json={"scope": "deck", "deck_id": deck.id}).json()
+    seed = body["meta"]["seed"]
+    assert 0 <= seed < 2**53
+
+    replay = client.post(
+        "/api/review/session/build", json={"scope": "deck", "deck_id": deck.id, "seed": seed}
+    ).json()
+    assert [card["id"] for card in replay["sections"]["new"]] == [card["id"] for card in body["sections"]["new"]]
+    assert client.post("/api/review/session/build", json={"scope": "all", "seed": -1}).status_code == 422
+
+
+def test_candidates_skip_cards_not_yet_due(db, test_user):
+    deck = Deck(user_id=test_user.id, name="Due Deck")
+    db.add(deck)
+    db.flush()
+    now = datetime.utcnow()
+    ids = {}
+    for name, state, due_at in [
+        ("unscheduled", None, None),
+        ("new", "new", now + timedelta(days=3)),
+        ("learning", "learning", now - timedelta(minutes=5)),
+        ("review", "review", now - timedelta(hours=1)),
+        ("future", "review", now + timedelta(days=2)),
+    ]:
+        card = Card(user_id=test_user.id, deck_id=deck.id, front=name, back="Back")
+        db.add(card)
+        db.flush()
+        ids[name] = card.id
+        if state is not None:
+            db.add(SchedState(
+                card_id=card.id, user_id=test_user.id, state=state,
+                due_at=due_at, interval_days=1.0, ease_factor=2.5
+            ))
+    db.commit()
+
+    new, learning, review = queue_builder.candidate_ids_by_deck(db, test_user.id, [deck.id], now)
+
+    assert sorted(new[deck.id].tolist()) == sorted([ids["unscheduled"], ids["new"]])
+    assert learning[deck.id].tolist() == [ids["learning"]]
+    assert review[deck.id].tolist() == [ids["review"]]
@@ -0,0 +1,118 @@
+"""
+Tests for the closed-day stats cache.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.models.database import Card, DailyCounter, Deck
+from app.services.review_rollup import daily_rating_totals, day_start, record_review
+from app.services.stats_cache import (
+    ClosedDayCache,
+    ClosedDays,
+    cached_daily_counters,
+    cached_daily_rating_totals,
+    closed_days,
+)
+
+
+@contextmanager
+def _statements(db):
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+
+def _deck_with_reviews(db, user_id, days_ago):
+    deck = Deck(user_id=user_id, name="Stats Deck")
+    db.add(deck)
+    db.flush()
+    db.add(Card(user_id=user_id, deck_id=deck.id, front="Front", back="Back"))
+    now = datetime.utcnow()
+    for days in days_ago:
+        record_review(db, user_id, deck.id, now - timedelta(days=days), "review", "good")
+    db.commit()
+    return deck
+
+
+def test_closed_days_served_from_cache(db, test_user):
+    user_id = test_user.id
+    deck = _deck_with_reviews(db, user_id, [20, 10, 5, 0])
+    since = datetime.utcnow() - timedelta(days=30)
+
+    assert cached_daily_rating_totals(db, user_id, since) == daily_rating_totals(db, user_id, since)
+
+    # Today stays live; closed days cost no query
+    record_review(db, user_id, deck.id, datetime.utcnow(), "review", "easy")
+    db.commit()
+    with _statements(db) as statements:
+        rows = cached_daily_rating_totals(db, user_id, since)
+        shorter = cached_daily_rating_totals(db, user_id, datetime.utcnow() - timedelta(days=7))
+    assert len(statements) == 2
+    assert rows == daily_rating_totals(db, user_id, since)
+    assert rows[-1].easy == 1
+    assert [row.date for row in shorter] == [row.date for row in rows[-2:]]
+
+    # A longer range than cached reloads once
+    with _statements(db) as statements:
+        cached_daily_rating_totals(db, user_id, since - timedelta(days=30))
+    assert len(statements) == 2
+
+
+def test_review_on_closed_day_invalidates(db, test_user):
+    deck = _deck_with_reviews(db, test_user.id, [5])
+    since = datetime.utcnow() - timedelta(days=30)
+    cached_daily_rating_totals(db, test_user.id, since)
+
+    closed_days.note_review(test_user.id, datetime.utcnow())
+    assert closed_days.get((test_user.id, "ratings", None)) is not None
+
+    backfilled = datetime.utcnow() - timedelta(days=3)
+    record_review(db, test_user.id, deck.id, backfilled, "review", "again")
+    db.commit()
+    closed_days.note_review(test_user.id, backfilled)
+
+    rows = cached_daily_rating_totals(db, test_user.id, since)
+    assert [row.date for row in rows] == [day_start(backfilled - timedelta(days=2)), day_start(backfilled)]
+    assert rows[-1].again == 1
+
+
+def test_session_stats_use_cached_counters(client, db, test_user):
+    today = day_start(datetime.utcnow())
+    for days, reviews in [(3, 4), (2, 0), (0, 6)]:
+        db.add(DailyCounter(user_id=test_user.id, date=today - timedelta(days=days), reviews_done=reviews))
+    db.commit()
+
+    body = client.get("/api/stats/sessions").json()
+    assert [day["cards_reviewed"] for day in body["daily_sessions"]] == [4, 0, 6]
+
+    rows = cached_daily_counters(db, test_user.id, today - timedelta(days=30))
+    assert [(row.date, row.reviews_done) for row in rows] == [
+        (today - timedelta(days=3), 4), (today - timedelta(days=2), 0), (today, 6)
+    ]
+
+
+def test_lru_eviction_and_stale_store():
+    cache = ClosedDayCache(max_entries=2)
+    entry = ClosedDays(datetime(2024, 1, 1), datetime(2024, 2, 1), [], [])
+    for user_id in (1, 2):
+        cache.store((user_id, "ratings", None), cache.version(user_id), entry)
+    cache.get((1, "ratings", None))
+    cache.store((3, "ratings", None), cache.version(3), entry)
+
+    assert cache.get((2, "ratings", None)) is None
+    assert cache.get((1, "ratings", None)) is entry
+
+    version = cache.version(3)
+    cache.invalidate(3)
+    cache.store((3, "counters", None), version, entry)
+    assert cache.get((3, "counters", None)) is None
@@ -0,0 +1,117 @@
+"""
+Tests for tag query expressions and the in-memory tag index.
+"""
+import numpy as np
+import pytest
+
+from app.services.tag_index import (
+    TagQueryError,
+    UserTagIndex,
+    card_tag_index,
+    get_user_index,
+    parse_tag_query,
+)
+
+
+def test_parse_precedence_and_quoting():
+    assert parse_tag_query("a OR b AND NOT c") == ("OR", "a", ("AND", "b", ("NOT", "c")))
+    assert parse_tag_query('(a or b) and "needs review"') == ("AND", ("OR", "a", "b"), "needs review")
+    assert parse_tag_query("not not a") == ("NOT", ("NOT", "a"))
+
+
+@pytest.mark.parametrize("expression", ["", "a AND", "(a OR b", "a b", ")", '"open'])
+def test_parse_rejects_malformed(expression):
+    with pytest.raises(TagQueryError):
+        parse_tag_query(expression)
+
+
+def test_evaluate_set_algebra():
+    index = UserTagIndex(
+        all_cards=np.arange(1, 7),
+        by_tag={1: np.array([1, 2, 3]), 2: np.array([3, 4]), 3: np.array([5])},
+        tag_ids_by_name={"a": 1, "b": 2, "c": 3},
+    )
+
+    def ids(expression):
+        return index.evaluate(parse_tag_query(expression)).tolist()
+
+    assert ids("a AND b") == [3]
+    assert ids("a OR c") == [1, 2, 3, 5]
+    assert ids("NOT a") == [4, 5, 6]
+    assert ids("(a OR b) AND NOT b") == [1, 2]
+    assert ids("missing OR c") == [5]
+    assert index.any_of([1, 2]).tolist() == [1, 2, 3, 4]
+
+
+def _tagged_cards(client):
+    tags = {name: client.post("/api/tags/", json={"name": name}).json()["id"] for name in ("n5", "n4", "verbs")}
+    deck = client.post("/api/decks/", json={"name": "Test Deck"}).json()
+    cards = {}
+    for front, names in [("taberu", ["n5", "verbs"]), ("iku", ["n4", "verbs"]), ("hon", ["n5"]), ("plain", [])]:
+        cards[front] = client.post(
+            "/api/cards/",
+            json={"deck_id": deck["id"], "front": front, "back": "Back", "tag_ids": [tags[n] for n in names]}
+        ).json()["id"]
+    return tags, cards
+
+
+def _fronts(client, **params):
+    response = client.get("/api/cards/", params=params)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == len(body["cards"])
+    return sorted(card["front"] for card in body["cards"])
+
+
+def test_list_cards_tag_query(client, test_user):
+    tags, _ = _tagged_cards(client)
+
+    assert _fronts(client, tag_query="verbs AND n5") == ["taberu"]
+    assert _fronts(client, tag_query="n5 OR n4") == ["hon", "iku", "taberu"]
+    assert _fronts(client, tag_query="NOT verbs") == ["hon", "plain"]
+    assert _fronts(client, tag_query="unknown") == []
+    # tag_ids keeps OR semantics without duplicating multi-tagged cards
+    assert _fronts(client, tag_ids=[tags["n5"], tags["verbs"]]) == ["hon", "iku", "taberu"]
+
+    assert client.get("/api/cards/", params={"tag_query": "n5 AND"}).status_code == 400
+
+
+def test_card_writes_keep_index_warm(client, test_user):
+    tags, cards = _tagged_cards(client)
+    assert _fronts(client, tag_query="verbs") == ["iku", "taberu"]
+    warm = card_tag_index.get(test_user.id)
+    assert warm is not None
+
+    client.put(f"/api/cards/{cards['hon']}", json={"tag_ids": [tags["verbs"]]})
+    client.delete(f"/api/cards/{cards['iku']}")
+    deck_id = client.get(f"/api/cards/{cards['plain']}").json()["deck_id"]
+    new_id = client.post(
+        "/api/cards/", json={"deck_id": deck_id, "front": "miru", "back": "Back", "tag_ids": [tags["n4"]]}
+    ).json()["id"]
+
+    # Patched in place, not reloaded
+    entry = card_tag_index.get(test_user.id)
+    assert entry is not None and entry.tag_ids_by_name is warm.tag_ids_by_name
+    assert _fronts(client, tag_query="verbs") == ["hon", "taberu"]
+    assert _fronts(client, tag_query="n4") == ["miru"]
+    assert new_id in entry.all_cards and cards["iku"] not in entry.all_cards
+
+    # Tag deletion drops the index; the reload matches the database
+    client.delete(f"/api/tags/{tags['n5']}")
+    assert card_tag_index.get(test_user.id) is None
+    assert _fronts(client, tag_query="NOT verbs") == ["miru", "plain"]
+
+
+def test_stale_load_is_discarded(db, test_user):
+    version = card_tag_index.version(test_user.id)
+    stale = get_user_index(db, test_user.id)
+    card_tag_index.invalidate(test_user.id)
+
+    card_tag_index.store(test_user.id, version, stale)
+    assert card_tag_index.get(test_user.id) is None
+
+    # A patch while nothing is cached also outdates in-flight loads
+    version = card_tag_index.version(test_user.id)
+    card_tag_index.remove_card(test_user.id, 1)
+    card_tag_index.store(test_user.id, version, stale)
+    assert card_tag_index.get(test_user.id) is None
@@ -0,0 +1,76 @@
+"""
+Tests for the shared, cached user-resolution dependency.
+"""
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps import CurrentUser, UserCache, get_current_user, user_cache
+from app.models.database import User
+
+
+def test_get_current_user_caches_by_principal(db, test_user):
+    """The second resolution is served from the cache, not the database."""
+    first = get_current_user("test_user", db)
+    assert first == CurrentUser(id=test_user.id, username="test_user", timezone="UTC")
+
+    # Change the row behind the cache's back: cached value is still returned
+    test_user.timezone = "Asia/Tokyo"
+    db.commit()
+    assert get_current_user("test_user", db).timezone == "UTC"
+
+    # Explicit invalidation forces a fresh lookup
+    user_cache.invalidate("test_user")
+    assert get_current_user("test_user", db).timezone == "Asia/Tokyo"
+
+
+def test_get_current_user_missing_principal(db):
+    """Unknown principals raise the usual 500 and are not cached."""
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_user("nobody", db)
+
+    assert exc_info.value.status_code == 500
+    assert user_cache.get("nobody") is None
+
+
+def test_cache_is_keyed_by_principal(db, test_user):
+    """Different principals resolve to different users."""
+    other = User(username="other_user", timezone="UTC")
+    db.add(other)
+    db.commit()
+
+    assert get_current_user("test_user", db).id == test_user.id
+    assert get_current_user("other_user", db).id == other.id
+
+
+def test_invalidate_all():
+    """invalidate() without a principal clears every entry."""
+    cache = UserCache()
+    cache.set("a", CurrentUser(id=1, username="a", timezone="UTC"))
+    cache.set("b", CurrentUser(id=2, username="b", timezone="UTC"))
+
+    cache.invalidate()
+
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+
+
+def test_endpoints_use_resolved_principal(client, test_user):
+    """API requests resolve the (overridden) principal through the cache."""
+    response = client.post("/api/decks/", json={"name": "Cached User Deck"})
+
+    assert response.status_code == 201
+    assert response.json()["user_id"] == test_user.id
+    assert user_cache.get("test_user").id == test_user.id
+
+
+def test_user_cache_entries_expire_after_ttl():
+    """Renames in another worker are seen once the TTL runs out."""
+    now = [100.0]
+    cache = UserCache(ttl_s=30, clock=lambda: now[0])
+    user = CurrentUser(id=1, username="test_user", timezone="UTC")
+    cache.set("test_user", user)
+
+    now[0] += 29
+    assert cache.get("test_user") == user
+    now[0] += 1
+    assert cache.get("test_user") is None
@@ -128,6 +128,39 @@ export const reviewApi = {
     const response = await apiClient.get(`/review/stats/session?${params.toString()}`);
     return response.data;
   },
+
+  /**
+   * Listen for queue changes on GET /review/events (Server-Sent Events)
+   * instead of polling. onChange fires when counts change, and after a
+   * reconnect (writes may have been missed while disconnected). onLive
+   * reports whether the stream is connected, so callers can fall back to
+   * polling. Returns a function that closes the stream.
+   */
+  subscribeToEvents: (handlers: {
+    onChange: () => void;
+    onLive?: (live: boolean) => void;
+  }): (() => void) => {
+    if (typeof EventSource === 'undefined') {
+      handlers.onLive?.(false);
+      return () => {};
+    }
+
+    const source = new EventSource(`${API_BASE_URL}/api/review/events`);
+    let connectedBefore = false;
+
+    source.onopen = () => handlers.onLive?.(true);
+    // EventSource reconnects by itself; until then, callers poll
+    source.onerror = () => handlers.onLive?.(false);
+    source.addEventListener('counts', () => {
+      if (connectedBefore) {
+        handlers.onChange();
+      }
+      connectedBefore = true;
+    });
+    source.addEventListener('delta', () => handlers.onChange());
+
+    return () => source.close();
+  },
 };
 
 // ============================================================================
@@ -185,6 +185,7 @@ export interface CardStub {
   state: 'new' | 'learning' | 'review';
   due_at: string;
   tags: string[];
+  preview_intervals?: { again: number; good: number; easy: number } | null; // days until due per rating
 }
 
 export interface SessionSections {
@@ -1,6 +1,6 @@
-import { useQuery } from '@tanstack/react-query';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
 import { useNavigate } from 'react-router-dom';
-import { useEffect } from 'react';
+import { useEffect, useState } from 'react';
 import { reviewApi, statsApi } from '../api';
 import { SessionDueCountsCard } from '../components/SessionDueCountsCard';
 import { QuickStatsCard } from '../components/QuickStatsCard';
@@ -8,12 +8,27 @@ import { AppHeader } from '../components/AppHeader';
 
 export function DashboardPage() {
   const navigate = useNavigate();
+  const queryClient = useQueryClient();
+
+  // Live updates from /review/events; poll every minute only while the stream is down
+  const [liveUpdates, setLiveUpdates] = useState(false);
+  const pollInterval = liveUpdates ? false : 60000;
+
+  useEffect(() => {
+    return reviewApi.subscribeToEvents({
+      onChange: () => {
+        queryClient.invalidateQueries({ queryKey: ['sessionStats'] });
+        queryClient.invalidateQueries({ queryKey: ['todayStats'] });
+      },
+      onLive: setLiveUpdates,
+    });
+  }, [queryClient]);
 
   // Fetch session-based queue stats
   const { data: sessionStats, isLoading: sessionLoading, error: sessionError, refetch: refetchSession } = useQuery({
     queryKey: ['sessionStats', 'all'],
     queryFn: () => reviewApi.getSessionStats('all'),
-    refetchInterval: 60000, // Refetch every minute
+    refetchInterval: pollInterval,
     staleTime: 30000, // Consider stale after 30 seconds
   });
 
@@ -21,7 +36,7 @@ export function DashboardPage() {
   const { data: todayStats, isLoading: todayLoading, refetch: refetchToday } = useQuery({
     queryKey: ['todayStats'],
     queryFn: statsApi.getToday,
-    refetchInterval: 60000, // Refetch every minute
+    refetchInterval: pollInterval,
     staleTime: 30000,
   });
 